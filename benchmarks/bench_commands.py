@@ -0,0 +1,82 @@
+"""Commands doing a lot of work, run against the mock API in-process."""
+
+import pytest
+
+
+@pytest.fixture
+def upload_dir(tmp_path, request):
+    path = tmp_path / "upload"
+    path.mkdir()
+    size = request.config.getoption("api_file_size")
+    for i in range(request.config.getoption("api_files")):
+        (path / f"file-{i}.csv").write_bytes(b"x" * size)
+    return path
+
+
+def test_datasets_ls_refresh(benchmark, okdata):
+    benchmark.pedantic(okdata, ["datasets", "ls", "--refresh"], rounds=5)
+
+
+def test_datasets_ls_cached(benchmark, okdata):
+    okdata("datasets", "ls")
+    benchmark.pedantic(okdata, ["datasets", "ls"], rounds=5)
+
+
+def test_datasets_ls_filter_cached(benchmark, okdata):
+    okdata("datasets", "ls")
+    benchmark.pedantic(okdata, ["datasets", "ls", "--filter=number 9"], rounds=5)
+
+
+def test_datasets_search_cached(benchmark, okdata):
+    okdata("datasets", "ls")
+    benchmark.pedantic(okdata, ["datasets", "search", "group-42"], rounds=5)
+
+
+def test_datasets_cp_upload(benchmark, okdata, upload_dir):
+    benchmark.pedantic(
+        okdata, ["datasets", "cp", str(upload_dir), "ds:dataset-0"], rounds=3
+    )
+
+
+def test_datasets_cp_download(benchmark, okdata, tmp_path):
+    # Download into a new directory every time, so that no file is skipped.
+    targets = iter(range(1_000_000))
+
+    def setup():
+        target = tmp_path / str(next(targets))
+        return ["datasets", "cp", "ds:dataset-0/1/latest", str(target)], {}
+
+    benchmark.pedantic(okdata, setup=setup, rounds=3)
+
+
+def test_status_watch(benchmark, okdata):
+    # The mock API finishes traces after a few polls; use a new trace ID for
+    # every round.
+    trace_ids = (f"trace-watch-{i}" for i in range(1_000_000))
+
+    def setup():
+        return ["status", next(trace_ids), "--watch"], {}
+
+    benchmark.pedantic(okdata, setup=setup, rounds=3)
+
+
+def test_status_many(benchmark, okdata):
+    trace_ids = [f"trace-many-{i}" for i in range(50)]
+    benchmark.pedantic(okdata, ["status", *trace_ids], rounds=5)
+
+
+def test_pubs_list_keys_all_clients(benchmark, okdata, monkeypatch):
+    # `pubs list-keys` asks which clients to list keys for; answer "all".
+    from okdata.cli.commands.pubs import pubs
+
+    def list_keys_wizard(pubs_client):
+        return {
+            "env": "test",
+            "clients": [
+                {"id": c["client_id"], "name": c["client_name"]}
+                for c in pubs_client.get_clients("test")
+            ],
+        }
+
+    monkeypatch.setattr(pubs, "list_keys_wizard", list_keys_wizard)
+    benchmark.pedantic(okdata, ["pubs", "list-keys"], rounds=5)
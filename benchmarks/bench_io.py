@@ -0,0 +1,20 @@
+"""Reading of large JSON inputs."""
+
+import io
+import json
+
+from okdata.cli.io import _iter_json_stream
+
+
+def test_iter_json_large_document(benchmark):
+    content = json.dumps(
+        {"rows": [{"id": i, "name": f"row {i}"} for i in range(400_000)]}
+    )
+    benchmark(lambda: list(_iter_json_stream(io.StringIO(content))))
+
+
+def test_iter_json_many_documents(benchmark):
+    content = "\n".join(
+        json.dumps({"id": i, "name": f"row {i}"}) for i in range(100_000)
+    )
+    benchmark(lambda: list(_iter_json_stream(io.StringIO(content))))
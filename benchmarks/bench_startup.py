@@ -0,0 +1,18 @@
+"""Cold start of each subcommand, each run in a new interpreter."""
+
+import pytest
+
+# A quick invocation of each subcommand, making at most a request or two.
+COMMANDS = {
+    "version": ["--version"],
+    "datasets": ["datasets", "ls", "dataset-0"],
+    "permissions": ["permissions", "ls", "okdata:dataset:dataset-0"],
+    "pubs": ["pubs", "--help"],
+    "status": ["status", "trace-startup"],
+    "teams": ["teams", "ls"],
+}
+
+
+@pytest.mark.parametrize("args", COMMANDS.values(), ids=COMMANDS.keys())
+def test_cold_start(benchmark, okdata_subprocess, args):
+    benchmark.pedantic(okdata_subprocess, args, rounds=5, warmup_rounds=1)
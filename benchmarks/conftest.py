@@ -0,0 +1,107 @@
+"""Fixtures for running the CLI against `okdata.cli.mock_server`.
+
+The benchmarks are run with pytest-benchmark:
+
+    pytest benchmarks -o python_files='bench_*.py'
+
+The mock API's latency and data sizes are set with the `--api-*` options
+below.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from okdata.cli import clients
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("mock API")
+    group.addoption("--api-latency", type=float, default=0.02, help="seconds")
+    group.addoption("--api-datasets", type=int, default=10_000)
+    group.addoption("--api-files", type=int, default=20)
+    group.addoption("--api-file-size", type=int, default=1_000_000)
+    group.addoption("--api-clients", type=int, default=200)
+
+
+@pytest.fixture(scope="session")
+def mock_api(request):
+    """Start the mock API in its own process, returning its base URL.
+
+    Running it in a separate process keeps it from competing with the CLI
+    for the GIL while being measured.
+    """
+    option = request.config.getoption
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "okdata.cli.mock_server",
+            "--port=0",
+            f"--latency={option('api_latency')}",
+            f"--datasets={option('api_datasets')}",
+            f"--files={option('api_files')}",
+            f"--file-size={option('api_file_size')}",
+            f"--clients={option('api_clients')}",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        yield proc.stdout.readline().strip()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+@pytest.fixture
+def api_env(mock_api, tmp_path, monkeypatch):
+    """Point the CLI at the mock API and keep its caches in `tmp_path`."""
+    monkeypatch.setenv("OKDATA_API_URL", mock_api)
+    monkeypatch.setenv("OKDATA_ENVIRONMENT", "dev")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    # Make requests anonymously, without logging in.
+    for var in [
+        "OKDATA_CLIENT_ID",
+        "OKDATA_CLIENT_SECRET",
+        "OKDATA_USERNAME",
+        "OKDATA_PASSWORD",
+    ]:
+        monkeypatch.delenv(var, raising=False)
+    return mock_api
+
+
+@pytest.fixture
+def okdata(api_env, monkeypatch, capsys):
+    """Return a function running `okdata` with the given arguments.
+
+    Every run starts without shared clients, like a new invocation of the
+    CLI would (apart from already imported modules).
+    """
+    from okdata.cli.__main__ import run
+
+    def okdata(*args):
+        clients.reset()
+        argv = ["okdata", *args]
+        monkeypatch.setattr(sys, "argv", argv)
+        run(argv)
+        capsys.readouterr()
+
+    yield okdata
+    clients.reset()
+
+
+@pytest.fixture
+def okdata_subprocess(api_env):
+    """Return a function running `okdata` in a new interpreter."""
+
+    def okdata(*args):
+        subprocess.run(
+            [sys.executable, "-m", "okdata.cli", *args],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    return okdata
@@ -0,0 +1,94 @@
+"""Measure the import cost of each `okdata` subcommand.
+
+Every subcommand is resolved through `get_command_class` in a fresh Python
+interpreter running with `-X importtime`, and the reported self times are
+summed up. Each measurement is repeated a number of times and the fastest run
+is reported, to filter out noise from a busy machine.
+
+Run `python benchmarks/importtime.py --help` for usage.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from okdata.cli.__main__ import COMMANDS
+
+# Measure the entry point alone as well, which is what `okdata -v` and friends
+# pay for.
+BASELINE = "(none)"
+
+SNIPPET = """\
+from okdata.cli.__main__ import get_command_class
+get_command_class(["okdata", {command!r}])
+"""
+
+
+def _parse_importtime(stderr):
+    """Return a list of `(module, self_us, cumulative_us, depth)` tuples."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return imports
+
+
+def measure(command):
+    """Return the imports done when resolving `command` in a new interpreter."""
+    code = (
+        "import okdata.cli.__main__"
+        if command == BASELINE
+        else SNIPPET.format(command=command)
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return _parse_importtime(result.stderr)
+
+
+def summarize(command, repeat):
+    runs = [measure(command) for _ in range(repeat)]
+    best = min(runs, key=lambda imports: sum(i[1] for i in imports))
+    top_level = sorted((i for i in best if i[3] == 0), key=lambda i: i[2], reverse=True)
+    return {
+        "command": command,
+        "total_ms": round(sum(i[1] for i in best) / 1000, 1),
+        "modules": len(best),
+        "heaviest": [
+            {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, _self, cumulative, _depth in top_level[:3]
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("commands", metavar="command", nargs="*")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    commands = args.commands or [BASELINE, *COMMANDS]
+    results = [summarize(command, args.repeat) for command in commands]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Command':<14}{'Import time':>14}{'Modules':>10}  Heaviest imports")
+    for r in results:
+        heaviest = ", ".join(
+            f"{h['module']} ({h['cumulative_ms']} ms)" for h in r["heaviest"]
+        )
+        print(f"{r['command']:<14}{r['total_ms']:>11} ms{r['modules']:>10}  {heaviest}")
+
+
+if __name__ == "__main__":
+    main()
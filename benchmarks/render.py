@@ -0,0 +1,82 @@
+"""Measure how long it takes to render large dataset listings.
+
+A listing of synthetic datasets is rendered with every output format, using
+the verbose dataset listing config since it covers the most column types.
+Each measurement is repeated a number of times and the fastest run is
+reported.
+
+Run `python benchmarks/render.py --help` for usage.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import time
+
+from okdata.cli.output import create_output
+
+CONFIG = "datasets_config_verbose.json"
+FORMATS = ["table", "json", "ndjson", "csv"]
+
+
+def make_datasets(count):
+    return [
+        {
+            "Id": f"dataset-{i}",
+            "title": f"Dataset number {i}",
+            "description": "A dataset generated for benchmarking purposes. " * 3,
+            "publisher": "Origo",
+            "objective": "Benchmarking",
+            "parent_id": f"dataset-{i - 1}" if i % 10 else None,
+            "accessRights": "public",
+            "theme": ["tech", "benchmarks"],
+            "keywords": ["benchmark"],
+            "frequency": "daily",
+            "contactPoint": {"name": "Origo", "email": "origo@example.org"},
+        }
+        for i in range(count)
+    ]
+
+
+def measure(fmt, datasets):
+    """Return the number of seconds spent rendering `datasets` as `fmt`."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        out = create_output(fmt, CONFIG)
+        out.add_rows(datasets)
+        print(out)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("formats", metavar="format", nargs="*")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    datasets = make_datasets(args.rows)
+    results = [
+        {
+            "format": fmt,
+            "rows": args.rows,
+            "seconds": round(
+                min(measure(fmt, datasets) for _ in range(args.repeat)), 3
+            ),
+        }
+        for fmt in args.formats or FORMATS
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'Format':<10}{'Rows':>10}{'Time':>12}")
+    for r in results:
+        print(f"{r['format']:<10}{r['rows']:>10}{r['seconds']:>10} s")
+
+
+if __name__ == "__main__":
+    main()
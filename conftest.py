@@ -1,6 +1,7 @@
 import sys
 
 import pytest
+from okdata.cli import clients
 from okdata.cli.command import BaseCommand
 
 BASECMD_QUAL = f"{BaseCommand.__module__}.{BaseCommand.__name__}"
@@ -11,6 +12,20 @@ def set_argv(*args):
     sys.argv = [old_sys_argv[0]] + list(args)
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep caches written by tests out of the user's cache directory."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def reset_clients():
+    yield
+    clients.reset()
+
+
 @pytest.fixture
 def mock_print_success(mocker):
     return mocker.patch(f"{BASECMD_QUAL}.print_success")
@@ -1,100 +1,172 @@
+# Imported first to measure the startup time as accurately as possible.
+from okdata.cli import timings
+
+import cProfile
 import json
 import os
 import sys
-
-from keycloak.exceptions import KeycloakGetError, KeycloakPostError
-from okdata.sdk.exceptions import ApiAuthenticateError
-from requests.exceptions import ConnectTimeout, RequestException
+from importlib import import_module
 
 from okdata.cli import MAINTAINER
 from okdata.cli.command import BaseCommand
-from okdata.cli.commands.datasets import DatasetsCommand
-from okdata.cli.commands.permissions import PermissionsCommand
-from okdata.cli.commands.pubs import PubsCommand
-from okdata.cli.commands.status import StatusCommand
-from okdata.cli.commands.teams.teams import TeamsCommand
+from okdata.cli.token_cache import clear_tokens
+
+# Command modules are imported on demand in `get_command_class`, so that only
+# the dependencies of the command actually being run are loaded.
+COMMANDS = {
+    "datasets": ("okdata.cli.commands.datasets", "DatasetsCommand"),
+    "permissions": ("okdata.cli.commands.permissions", "PermissionsCommand"),
+    "pubs": ("okdata.cli.commands.pubs", "PubsCommand"),
+    "shell": ("okdata.cli.commands.shell", "ShellCommand"),
+    "status": ("okdata.cli.commands.status", "StatusCommand"),
+    "teams": ("okdata.cli.commands.teams.teams", "TeamsCommand"),
+}
 
 
 def main():
-    argv = sys.argv
-    if len(argv) < 2:
-        BaseCommand().help()
+    run(sys.argv, started=timings.PROCESS_START)
+
+
+def _option_value(argv, name):
+    """Return the value of the option `name` in `argv`, if given.
+
+    Handles both the `--name=value` and the `--name value` forms.
+    """
+    for i, arg in enumerate(argv):
+        if arg.startswith(f"{name}="):
+            return arg.split("=", 1)[1]
+        if arg == name and i + 1 < len(argv):
+            return argv[i + 1]
+    return None
+
+
+def run(argv, started=None):
+    """Run the command given by the command line arguments in `argv`.
+
+    Errors are reported to the user rather than raised. Commands may still
+    raise `SystemExit` to end with a given exit code.
+
+    With `--timings`, a breakdown of where time was spent since `started` (a
+    `time.perf_counter()` value, defaulting to now) is printed to stderr
+    afterwards. With `--profile=<file>`, the whole run is profiled and the
+    statistics are written to the given file.
+    """
+    # These options are picked out before the command parses its arguments,
+    # so that parsing is included in the measurements.
+    profile_file = _option_value(argv, "--profile")
+    if profile_file:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if "--timings" in argv:
+        timings.start(started)
+
+    try:
+        _run(argv)
+    finally:
+        if profile_file:
+            profiler.disable()
+            profiler.dump_stats(profile_file)
+            print(
+                f"Profile written to {profile_file}, inspect it with: "
+                f"python -m pstats {profile_file}",
+                file=sys.stderr,
+            )
+        if timings.enabled():
+            timings.report(timings.stop())
+
+
+def _run(argv):
+    # These don't need the SDK, so answer them before anything else is loaded.
+    if len(argv) < 2 or argv[1] in ("-h", "--help"):
+        BaseCommand.help()
         return
     if argv[1] in ("-e", "--environment"):
-        BaseCommand().print_env()
+        BaseCommand.print_env()
         return
     if argv[1] in ("-v", "--version"):
-        BaseCommand().print_version()
+        BaseCommand.print_version()
         return
 
     command = get_command_class(argv)
 
     if command:
-        instance = command()
-        try:
+        _run_command(command)
+    else:
+        BaseCommand.help()
+
+
+def _run_command(command):
+    # The command module has already loaded these (through the SDK) by now.
+    from keycloak.exceptions import KeycloakGetError, KeycloakPostError
+    from okdata.sdk.exceptions import ApiAuthenticateError
+    from requests.exceptions import ConnectTimeout, RequestException
+
+    instance = command()
+    if timings.enabled():
+        timings.record("startup", timings.elapsed())
+    try:
+        with timings.phase("login"):
             instance.login()
+        with timings.phase("command"):
             instance.handle()
-            # Flush output here to force SIGPIPE to be triggered while inside
-            # this try block.
-            sys.stdout.flush()
-        except ConnectTimeout as e:
-            instance.print(
-                f"Connection to '{e.request.url}' timed out. Please try again, "
-                f"or contact {MAINTAINER} if the problem persists.",
-            )
-        except RequestException as e:
-            if hasattr(e.response, "json"):
-                instance.print_error_response(e.response.json())
-            else:
-                instance.print(
-                    "A server error occurred. Please try again, or contact "
-                    f"{MAINTAINER} if the problem persists.",
-                )
-        except ApiAuthenticateError:
+        # Flush output here to force SIGPIPE to be triggered while inside
+        # this try block.
+        sys.stdout.flush()
+    except ConnectTimeout as e:
+        instance.print(
+            f"Connection to '{e.request.url}' timed out. Please try again, "
+            f"or contact {MAINTAINER} if the problem persists.",
+        )
+    except RequestException as e:
+        if getattr(e.response, "status_code", None) == 401:
+            # The cached token was rejected; start from scratch next time.
+            clear_tokens(instance.sdk.auth)
+        if hasattr(e.response, "json"):
+            instance.print_error_response(e.response.json())
+        else:
             instance.print(
-                "An error occurred (ApiAuthenticateError): Invalid credentials",
-                {"error": 1, "message": "Invalid credentials"},
+                "A server error occurred. Please try again, or contact "
+                f"{MAINTAINER} if the problem persists.",
             )
-        except (KeycloakGetError, KeycloakPostError) as e:
-            error = json.loads(e.error_message)
-            error_type = e.__class__.__name__
-            instance.log.info(f"Keycloak reported: {e}")
-            instance.print(
-                f"An error occurred ({error_type}): {error['error_description']}"
-            )
-        except (EOFError, KeyboardInterrupt):
-            instance.print("\nAbort.")
-        except BrokenPipeError:
-            # https://docs.python.org/3/library/signal.html#note-on-sigpipe
-            devnull = os.open(os.devnull, os.O_WRONLY)
-            os.dup2(devnull, sys.stdout.fileno())
-            sys.exit(1)
-        except Exception as e:
-            instance.print(
-                "An exception occurred",
-                {
-                    "error": 1,
-                    "message": (
-                        "okdata-cli failed with an exception, see log output "
-                        "for more information",
-                    ),
-                },
-            )
-            instance.log.exception(f"okdata-cli failed with: {e}")
-
-    else:
-        BaseCommand().help()
+    except ApiAuthenticateError:
+        instance.print(
+            "An error occurred (ApiAuthenticateError): Invalid credentials",
+            {"error": 1, "message": "Invalid credentials"},
+        )
+    except (KeycloakGetError, KeycloakPostError) as e:
+        error = json.loads(e.error_message)
+        error_type = e.__class__.__name__
+        instance.log.info(f"Keycloak reported: {e}")
+        instance.print(
+            f"An error occurred ({error_type}): {error['error_description']}"
+        )
+    except (EOFError, KeyboardInterrupt):
+        instance.print("\nAbort.")
+    except BrokenPipeError:
+        # https://docs.python.org/3/library/signal.html#note-on-sigpipe
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+    except Exception as e:
+        instance.print(
+            "An exception occurred",
+            {
+                "error": 1,
+                "message": (
+                    "okdata-cli failed with an exception, see log output "
+                    "for more information",
+                ),
+            },
+        )
+        instance.log.exception(f"okdata-cli failed with: {e}")
 
 
 def get_command_class(argv):
-    commands = {
-        "datasets": DatasetsCommand,
-        "permissions": PermissionsCommand,
-        "pubs": PubsCommand,
-        "status": StatusCommand,
-        "teams": TeamsCommand,
-    }
-    return commands.get(argv[1], False)
+    try:
+        module_name, class_name = COMMANDS[argv[1]]
+    except KeyError:
+        return False
+    return getattr(import_module(module_name), class_name)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+
+from okdata.sdk import SDK
+from okdata.sdk.auth.auth import Authenticate
+from okdata.sdk.config import Config
+from okdata.sdk.sdk import TimeoutHTTPAdapter
+
+from okdata.cli import timings
+from okdata.cli.token_cache import track_token_expiry
+
+log = logging.getLogger()
+
+# Maximum number of connections kept alive per host. Should be at least as
+# large as the number of requests commands make concurrently.
+POOL_MAXSIZE = 32
+
+# Where each API lives relative to the base URL of the Origo APIs. Used when
+# pointing the CLI at another deployment of them (like `okdata-mock-server`)
+# by setting `OKDATA_API_URL`.
+API_PATHS = {
+    "datasetUrl": "/metadata/datasets",
+    "dataExporterUrl": "/data-exporter",
+    "keycloakServerUrl": "/auth",
+    "permissionApiUrl": "/okdata-permission-api",
+    "pipelineUrl": "/pipeline",
+    "s3BucketUrl": "/s3-upload",
+    "s3DownloadBaseUrl": "/s3-download",
+    "statusApiUrl": "/status-api/status",
+    "tokenService": "/token-service/token",
+    "uploadUrl": "/data-uploader",
+}
+
+_lock = threading.Lock()
+_configs = {}
+_auths = {}
+_sessions = {}
+
+
+def _config(env):
+    if env not in _configs:
+        config = Config(env=env)
+        if api_url := os.environ.get("OKDATA_API_URL", "").rstrip("/"):
+            log.info(f"Using the Origo APIs at: {api_url}")
+            config.config = {
+                **config.config,
+                **{key: f"{api_url}{path}" for key, path in API_PATHS.items()},
+                "apiUrl": api_url,
+            }
+        _configs[env] = config
+    return _configs[env]
+
+
+def api_base_url(config):
+    """Return the base URL of the Origo APIs in the environment of `config`."""
+    return config.config.get("apiUrl") or "https://api.data{}.oslo.systems".format(
+        "-dev" if config.config["env"] == "dev" else ""
+    )
+
+
+def _auth(env):
+    if env not in _auths:
+        _auths[env] = Authenticate(_config(env))
+        track_token_expiry(_auths[env])
+    return _auths[env]
+
+
+def session(retries=0):
+    """Return the shared HTTP session retrying failed requests `retries` times.
+
+    Sessions keep their connections alive, so that requests made through them
+    reuse TCP connections and TLS sessions to hosts they've talked to before.
+    """
+    with _lock:
+        if retries not in _sessions:
+            log.info(f"Creating HTTP session with {retries} retries")
+            # Reuse the SDK's retry strategy and timeouts, but with a
+            # connection pool large enough for concurrent requests.
+            s = SDK.prepared_request_with_retries(retries)
+            adapter = TimeoutHTTPAdapter(
+                max_retries=s.get_adapter("https://").max_retries,
+                pool_maxsize=POOL_MAXSIZE,
+            )
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.hooks["response"].append(timings.record_response)
+            _sessions[retries] = s
+        return _sessions[retries]
+
+
+def get_client(client_class, env=None):
+    """Return an SDK client of type `client_class` for `env`.
+
+    Every client created in a process shares configuration and
+    authentication with the other clients for the same environment, so that
+    logging in once is enough for all of them. They also share HTTP sessions
+    (see `session`).
+    """
+    with _lock:
+        config = _config(env)
+        auth = _auth(env)
+
+    client = client_class(config=config, auth=auth)
+    # The SDK creates a new session for every request; make it use the
+    # shared sessions instead.
+    client.prepared_request_with_retries = session
+    return client
+
+
+def reset():
+    """Forget all shared configuration, authentication, and sessions."""
+    with _lock:
+        for s in _sessions.values():
+            s.close()
+        _configs.clear()
+        _auths.clear()
+        _sessions.clear()
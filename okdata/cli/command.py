@@ -1,16 +1,27 @@
 import json
 import logging
+import os
 import sys
+from functools import cached_property
 from importlib import metadata
 
 from docopt import docopt, DocoptExit
-from okdata.sdk import SDK
+
+from okdata.cli import timings
+from okdata.cli.token_cache import restore_tokens, store_tokens
 
 BASE_COMMAND_OPTIONS = """
   -h, --help                # Print this help
   -d, --debug               # Output debug information while executing task
-  --format=<value>          # Output format: table OR json
-  --env=<value>             # Environment to run command in: prod OR dev"""
+  --format=<value>          # Output format: table, json, ndjson OR csv
+  --env=<value>             # Environment to run command in: prod OR dev
+  --timings                 # Print where time was spent to stderr afterwards
+  --profile=<file>          # Write profiling statistics for the run to <file>"""
+
+# Mirrors `okdata.sdk.config.Config.resolve_environment`, which can't be used
+# without loading the whole SDK.
+ENVIRONMENTS = ("dev", "prod")
+DEFAULT_ENVIRONMENT = "prod"
 
 
 class BaseCommand:
@@ -22,6 +33,7 @@ usage:
   okdata datasets [options]
   okdata permissions [options]
   okdata pubs [options]
+  okdata shell [options]
   okdata status [options]
   okdata teams [options]
   okdata -e | --environment
@@ -32,6 +44,7 @@ Commands available:
   datasets
   permissions
   pubs
+  shell
   status
   teams
 
@@ -41,19 +54,31 @@ Options:{BASE_COMMAND_OPTIONS}
     sub_commands = []
     args: dict
 
-    def __init__(self, sdk=SDK):
+    def __init__(self, sdk=None):
         self.args = docopt(str(self.__doc__))
-        self.sdk = sdk(env=self.opt("env"))
+        self.sdk_class = sdk
 
         if self.opt("debug"):
             logging.basicConfig(level=logging.DEBUG)
 
+    @cached_property
+    def sdk(self):
+        """The main SDK client of the command, created on first use.
+
+        The SDK is only loaded when needed, so that commands that merely print
+        help or version information start quickly.
+        """
+        if self.sdk_class is None:
+            from okdata.sdk import SDK
+
+            self.sdk_class = SDK
+        return self.make_client(self.sdk_class)
+
     def handle(self):
-        self.args = docopt(str(self.__doc__))
         for cmd in self.sub_commands:
             try:
                 self.log.debug(f"Checking if sub_command '{cmd.__name__}' is valid")
-                return cmd(self.sdk.__class__).handle()
+                return cmd(self.sdk_class).handle()
             except DocoptExit as d:
                 self.log.debug(d.usage)
         return self.handler()
@@ -61,6 +86,12 @@ Options:{BASE_COMMAND_OPTIONS}
     def handler(self):
         raise NotImplementedError("Missing handler")
 
+    def make_client(self, client_class):
+        """Return an SDK client sharing login and connections with the others."""
+        from okdata.cli.clients import get_client
+
+        return get_client(client_class, self.opt("env"))
+
     def cmd(self, key):
         return self.args.get(key)
 
@@ -79,21 +110,32 @@ Options:{BASE_COMMAND_OPTIONS}
         return content
 
     def print(self, str, payload=None):
-        is_structured_data = self.opt("format") in ("csv", "json")
+        is_structured_data = self.opt("format") in ("csv", "json", "ndjson")
 
         if not is_structured_data:
             print(str)
         # Normally a return json value from the API
         if payload:
-            # If it is a pure dict or list we want to json dump it out in order to correctly
-            # use it together with jq on the commandline
-            if isinstance(payload, dict) or isinstance(payload, list):
-                print(json.dumps(payload))
-            else:
-                print(payload)
+            with timings.phase("render"):
+                # If it is a pure dict or list we want to json dump it out in order to correctly
+                # use it together with jq on the commandline
+                if isinstance(payload, dict) or isinstance(payload, list):
+                    text = json.dumps(payload)
+                # Streaming outputs have already printed their rows
+                else:
+                    text = f"{payload}"
+            if text:
+                print(text)
 
     def login(self):
+        """Log in, reusing cached tokens from earlier invocations if possible.
+
+        A full login is only done when there are no cached tokens, or when
+        they can't be refreshed.
+        """
+        restore_tokens(self.sdk.auth)
         self.sdk.login()
+        store_tokens(self.sdk.auth)
 
     @staticmethod
     def pretty_json(data):
@@ -106,17 +148,21 @@ Options:{BASE_COMMAND_OPTIONS}
         print(table)
 
     def no_data(self, str):
-        if self.opt("format") == "json":
+        if self.opt("format") in ("json", "ndjson"):
             print(f"{str}")
 
-    def help(self):
-        print(self.__doc__, end="")
+    @classmethod
+    def help(cls):
+        print(cls.__doc__, end="")
 
-    def print_env(self):
-        print(self.sdk.config.resolve_environment(None))
+    @staticmethod
+    def print_env():
+        env = os.getenv("OKDATA_ENVIRONMENT")
+        print(env if env in ENVIRONMENTS else DEFAULT_ENVIRONMENT)
 
-    def print_version(self):
-        print(self.version)
+    @classmethod
+    def print_version(cls):
+        print(cls.version)
 
     def print_error_response(self, response_body):
         if not isinstance(response_body, dict):
@@ -125,7 +171,7 @@ Options:{BASE_COMMAND_OPTIONS}
 
         response_body.update({"error": 1})
 
-        if self.opt("format") == "json":
+        if self.opt("format") in ("json", "ndjson"):
             print(json.dumps(response_body))
         else:
             try:
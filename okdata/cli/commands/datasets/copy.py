@@ -0,0 +1,95 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger()
+
+
+class EditionCopy:
+    """Copy files from one edition to another.
+
+    The Origo APIs can't copy files between datasets by themselves, so every
+    file is streamed from its download URL straight into an upload to the
+    target edition, without storing it locally on the way.
+    """
+
+    def __init__(self, download, upload, max_workers=4, retries=3, progress=None):
+        self.download = download
+        self.upload = upload
+        self.max_workers = max_workers
+        self.retries = retries
+        self.progress = progress
+
+    def copy(self, source, files, target):
+        """Copy `files` from the edition `source` to the edition `target`.
+
+        `source` and `target` are (dataset ID, version, edition) tuples, and
+        `files` are listed by `ParallelDownload.get_edition_files`. Return a
+        list of dictionaries describing the outcome for each file. The
+        progress of each file is reported to the `TransferProgress` given to
+        the constructor, if any.
+        """
+        filenames = [file["key"].split("/")[-1] for file in files]
+        file_progress = [
+            self.progress and self.progress.file(filename) for filename in filenames
+        ]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda f, p: self.copy_file(source, f, target, p),
+                    files,
+                    file_progress,
+                )
+            )
+
+    def copy_file(self, source, file, target, progress=None):
+        row = self._copy_file(source, file, target, progress)
+        if progress:
+            progress.finish(row["status"])
+        return row
+
+    def _copy_file(self, source, file, target, progress):
+        filename = file["key"].split("/")[-1]
+        row = {
+            "source": f"ds:{'/'.join(source)}/{filename}",
+            "target": f"ds:{'/'.join(target)}/{filename}",
+            "status": "failed",
+            "size": None,
+            "throughput": None,
+            "trace_id": None,
+        }
+        log.info(f"Copying {row['source']} to {row['target']}")
+        started = time.monotonic()
+
+        try:
+            session = self.download.prepared_request_with_retries(self.retries)
+            with session.get(file["url"], stream=True) as res:
+                res.raise_for_status()
+                if "Content-Length" not in res.headers:
+                    # Uploads must state their size up front.
+                    raise ValueError("The server didn't tell the size of the file")
+                size = int(res.headers["Content-Length"])
+                # Pass the raw stream on to keep the file exactly as it's
+                # stored, even if it has a `Content-Encoding`.
+                result = self.upload.upload_stream(
+                    res.raw,
+                    filename,
+                    size,
+                    *target,
+                    retries=self.retries,
+                    progress=progress,
+                )
+        except Exception as e:
+            log.exception(f"Copying {row['source']} failed")
+            return {**row, "error": str(e)}
+
+        elapsed = time.monotonic() - started
+        if not result["result"]:
+            return {**row, "size": size, "error": "The upload was rejected"}
+        return {
+            **row,
+            "status": "copied",
+            "size": size,
+            "throughput": round(size / elapsed / 1e6, 2) if elapsed else None,
+            "trace_id": result["trace_id"],
+        }
@@ -1,27 +1,73 @@
+import glob
+import os
+import re
+import shutil
+import sqlite3
 import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 from okdata.sdk.data.dataset import Dataset
-from okdata.sdk.data.download import Download, DownloadURLAssertionError
-from okdata.sdk.data.upload import Upload
+from okdata.sdk.data.download import DownloadURLAssertionError
 from requests.exceptions import HTTPError
 
 from okdata.cli.command import BaseCommand, BASE_COMMAND_OPTIONS, confirm_to_continue
-from okdata.cli.commands.datasets.wizards import (
-    DatasetCreateWizard,
-    PipelineCreateWizard,
+from okdata.cli.commands.datasets.copy import EditionCopy
+from okdata.cli.commands.datasets.download import (
+    DownloadChecksumError,
+    ParallelDownload,
 )
-from okdata.cli.io import read_json, resolve_output_filepath
+from okdata.cli.commands.datasets.index import (
+    DatasetIndex,
+    index_path,
+    search_datasets,
+    ttl,
+)
+from okdata.cli.commands.datasets.manifest import (
+    FAILED,
+    SKIPPED,
+    ManifestApply,
+    ManifestError,
+    load_manifest,
+)
+from okdata.cli.commands.datasets.upload import StreamingUpload
+from okdata.cli.commands.datasets.upload_cache import (
+    UploadCache,
+    file_sha256,
+    journal_key,
+    upload_cache_path,
+)
+from okdata.cli.io import iter_json, read_json, resolve_output_filepath
 from okdata.cli.output import create_output
+from okdata.cli.progress import create_progress
+
+# Standard input is kept in memory up to this size while it's being read for an
+# upload, after which it's spooled to a temporary file instead.
+STDIN_SPOOL_SIZE = 64 * 1024 * 1024
+
+
+def _run_concurrently(*calls):
+    """Call every function in `calls` at the same time.
+
+    Return a list of their return values, in the same order as `calls`.
+    """
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(call) for call in calls]
+        return [future.result() for future in futures]
 
 
 class DatasetsCommand(BaseCommand):
     __doc__ = f"""Oslo :: Datasets
 
 Usage:
-  okdata datasets ls [--filter=<filter> --verbose options]
+  okdata datasets ls [--filter=<filter> --verbose --refresh options]
   okdata datasets ls <uri> [--verbose options]
-  okdata datasets cp <source> <target> [options]
+  okdata datasets search <query>... [--verbose --refresh options]
+  okdata datasets cp <path>... [options]
   okdata datasets create [options]
+  okdata datasets apply <manifest> [--dry-run options]
   okdata datasets create-version <dataset_id> [options]
   okdata datasets create-edition <dataset_id> [<version>] [options]
   okdata datasets create-distribution <dataset_id> [<version> <edition>] [options]
@@ -34,6 +80,7 @@ Examples:
   okdata datasets ls
   okdata datasets ls --filter=bydelsfakta
   okdata datasets ls --verbose
+  okdata datasets search bydel befolkning
   okdata datasets ls my-dataset
   okdata datasets ls my-dataset --verbose
   okdata datasets ls my-dataset/1
@@ -41,13 +88,27 @@ Examples:
   okdata datasets ls my-dataset/1/20240101T102030 --format=csv
   okdata datasets ls my-dataset/1/20240101T102030 --format=json
   okdata datasets create --file=dataset.json
+  okdata datasets apply manifest.yaml --dry-run
+  okdata datasets apply manifest.json --parallel=8 --format=ndjson
   okdata datasets cp /tmp/file.csv ds:my-dataset-id
+  okdata datasets cp /tmp/a.csv /tmp/b.csv ds:my-dataset-id
+  okdata datasets cp /tmp/partitions/ "/tmp/*.parquet" ds:my-dataset-id --parallel=8
+  okdata datasets cp /tmp/export/ ds:my-dataset-id --skip-unchanged
+  okdata datasets cp ds:my-dataset/1/latest ds:my-copy
+  okdata datasets cp ds:my-dataset/1/latest - | zstd -d
+  gzip -c data.csv | okdata datasets cp - ds:my-dataset-id --filename=data.csv.gz
   okdata datasets create-pipeline my-dataset
 
 Options:{BASE_COMMAND_OPTIONS}
   --file=<file>             # Use this file for configuration or upload
   --prompt=<prompt>         # Use input prompt to collect data, default "no"
   --pipeline=<pipeline>     # Required when --prompt=no
+  --parallel=<n>            # Number of files to transfer (or resources to create) at once [default: 4]
+  --dry-run                 # Only show what would be created
+  --refresh                 # Update the local dataset index before listing
+  --skip-unchanged          # Don't upload anything if no files have changed since they were last uploaded
+  --resume                  # Only upload the files that an interrupted upload didn't get to
+  --filename=<filename>     # Name of the file uploaded from standard input
     """
 
     def __init__(self):
@@ -57,11 +118,19 @@ Options:{BASE_COMMAND_OPTIONS}
         self.log.info("DatasetsCommand.handle()")
         if self.cmd("ls"):
             self.list_metadata()
+        elif self.cmd("search"):
+            self.search()
         elif self.cmd("create"):
             if self.opt("file"):
                 self.create_dataset()
             else:
+                # Wizards pull in questionary and prompt_toolkit, so only
+                # import them when actually needed.
+                from okdata.cli.commands.datasets.wizards import DatasetCreateWizard
+
                 DatasetCreateWizard(self).start()
+        elif self.cmd("apply"):
+            self.apply_manifest()
         elif self.cmd("cp"):
             self.copy_file()
         elif self.cmd("create-version"):
@@ -77,6 +146,8 @@ Options:{BASE_COMMAND_OPTIONS}
         elif self.cmd("delete-distribution"):
             self.delete_distribution()
         elif self.cmd("create-pipeline"):
+            from okdata.cli.commands.datasets.wizards import PipelineCreateWizard
+
             PipelineCreateWizard(self, self.arg("dataset_id")).start()
         else:
             self.help()
@@ -98,9 +169,50 @@ Options:{BASE_COMMAND_OPTIONS}
     # #################################### #
     # Datasets
     # #################################### #
+    def _dataset_index_path(self):
+        return index_path(self.sdk.config, self.sdk.auth)
+
+    def dataset_index(self):
+        """Return the local dataset index, refreshing it first if it's stale."""
+        index = DatasetIndex(self._dataset_index_path())
+        if self.opt("refresh") or index.is_stale(ttl()):
+            self.log.info("Refreshing dataset index")
+            index.replace(self.sdk.get_datasets())
+        return index
+
+    def _query_dataset_index(self, query):
+        """Return the result of calling `query` with the dataset index.
+
+        Return None if the index can't be used, e.g. when the cache directory
+        isn't writable or SQLite lacks full-text search.
+        """
+        try:
+            with self.dataset_index() as index:
+                return query(index)
+        except (OSError, sqlite3.Error) as e:
+            self.log.info(f"Not using the dataset index: {e}")
+            return None
+
+    def invalidate_dataset_index(self):
+        try:
+            with DatasetIndex(self._dataset_index_path()) as index:
+                index.invalidate()
+        except (OSError, sqlite3.Error) as e:
+            self.log.info(f"Couldn't invalidate the dataset index: {e}")
+
     def datasets(self):
         self.log.info("Listing datasets")
-        dataset_list = self.sdk.get_datasets(filter=self.opt("filter"))
+        pattern = self.opt("filter")
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                sys.exit(f"Invalid filter '{pattern}': {e}")
+
+        dataset_list = self._query_dataset_index(lambda i: i.datasets(pattern))
+        if dataset_list is None:
+            dataset_list = self.sdk.get_datasets(filter=pattern)
+
         out = create_output(
             self.opt("format"),
             f"datasets_config{'_verbose' if self.opt('verbose') else ''}.json",
@@ -108,14 +220,31 @@ Options:{BASE_COMMAND_OPTIONS}
         out.add_rows(dataset_list)
         self.print("Available datasets", out)
 
+    def search(self):
+        query = " ".join(self.arg("query"))
+        self.log.info(f"Searching for datasets matching: {query}")
+
+        dataset_list = self._query_dataset_index(lambda i: i.search(query))
+        if dataset_list is None:
+            dataset_list = search_datasets(self.sdk.get_datasets(), query)
+
+        out = create_output(
+            self.opt("format"),
+            f"datasets_config{'_verbose' if self.opt('verbose') else ''}.json",
+        )
+        out.add_rows(dataset_list)
+        self.print(f"Datasets matching '{query}'", out)
+
     def dataset(self, dataset_id):
         self.log.info(f"DatasetsCommand.handle_dataset({dataset_id})")
 
-        dataset = self.sdk.get_dataset(dataset_id)
-        versions = self.sdk.get_versions(dataset_id)
-        latest = self._get_latest_version(dataset_id, False)
+        dataset, versions, latest = _run_concurrently(
+            lambda: self.sdk.get_dataset(dataset_id),
+            lambda: self.sdk.get_versions(dataset_id),
+            lambda: self._get_latest_version(dataset_id, False),
+        )
 
-        if self.opt("format") == "json":
+        if self.opt("format") in ("json", "ndjson"):
             self.print(
                 "",
                 {"dataset": dataset, "versions": versions, "latest": latest},
@@ -146,8 +275,36 @@ Options:{BASE_COMMAND_OPTIONS}
         dataset = self.sdk.create_dataset(payload)
         dataset_id = dataset["Id"]
         self.log.info(f"Created dataset with id: {dataset_id}")
+        self.invalidate_dataset_index()
         self.print(f"Created dataset: {dataset_id}", dataset)
 
+    def apply_manifest(self):
+        try:
+            resources = load_manifest(self.arg("manifest"))
+        except ManifestError as e:
+            sys.exit(str(e))
+
+        dry_run = self.opt("dry-run")
+        applier = ManifestApply(self.sdk, self._parallelism(), dry_run)
+        out = create_output(self.opt("format"), "datasets_apply_config.json")
+        results = []
+        for result in applier.run(resources):
+            results.append(result)
+            out.add_row(result)
+
+        if not dry_run and any(r["kind"] == "dataset" for r in results):
+            self.invalidate_dataset_index()
+
+        counts = Counter(r["status"] for r in results)
+        summary = ", ".join(f"{count} {status}" for status, count in counts.items())
+        self.print(
+            f"{'Dry run' if dry_run else 'Applied manifest'}: {summary or 'nothing to do'}",
+            out,
+        )
+
+        if counts[FAILED] or counts[SKIPPED]:
+            sys.exit(1)
+
     # #################################### #
     # Version
     # #################################### #
@@ -221,13 +378,15 @@ Options:{BASE_COMMAND_OPTIONS}
     def edition_information(self, dataset_id, version, edition):
         self.log.info(f"Listing edition for: {dataset_id}, {version}, {edition}")
 
-        edition_metadata = self.sdk.get_edition(dataset_id, version, edition)
+        edition_metadata, distributions = _run_concurrently(
+            lambda: self.sdk.get_edition(dataset_id, version, edition),
+            lambda: self.sdk.get_distributions(dataset_id, version, edition),
+        )
         out = create_output(
             self.opt("format"), "datasets_dataset_version_edition_config.json"
         )
         out.add_rows([edition_metadata])
         self.print(out)
-        distributions = self.sdk.get_distributions(dataset_id, version, edition)
         out = create_output(
             self.opt("format"),
             "datasets_dataset_version_edition_distributions_config.json",
@@ -282,18 +441,37 @@ Options:{BASE_COMMAND_OPTIONS}
     # Distribution
     # #################################### #
     def create_distribution(self):
-        payload = read_json(self.opt("file"))
+        """Create a distribution for every JSON document in the input.
+
+        The input is streamed, so that large numbers of distributions can be
+        created without reading them all into memory first. The first document
+        is read before resolving the edition, so that unreadable input doesn't
+        leave an empty edition behind.
+        """
+        payloads = iter_json(self.opt("file"))
+        try:
+            first = next(payloads)
+        except StopIteration:
+            sys.exit("No distributions to create.")
+        except (OSError, ValueError) as e:
+            sys.exit(f"Couldn't read distributions: {e}")
+
         dataset_id = self.arg("dataset_id")
         version = self.resolve_or_load_version(dataset_id)
         edition_id = self.resolve_or_create_edition(dataset_id, version)["Id"]
         edition = edition_id.split("/")[-1]
-        self.log.info(f"Creating distribution for {edition_id} with payload: {payload}")
 
-        distribution = self.sdk.create_distribution(
-            dataset_id, version, edition, payload
-        )
-        self.print(f"Created distribution for {edition_id}", distribution)
-        return distribution
+        distributions = []
+        for payload in chain([first], payloads):
+            self.log.info(
+                f"Creating distribution for {edition_id} with payload: {payload}"
+            )
+            distribution = self.sdk.create_distribution(
+                dataset_id, version, edition, payload
+            )
+            self.print(f"Created distribution for {edition_id}", distribution)
+            distributions.append(distribution)
+        return distributions
 
     def delete_distribution(self):
         dist_id = self.arg("distribution_id")
@@ -312,15 +490,33 @@ Options:{BASE_COMMAND_OPTIONS}
     # File handling
     # #################################### #
     def copy_file(self):
-        source = self.arg("source")
-        target = self.arg("target")
+        """Copy files to or from a dataset.
+
+        The last path given is the target, the rest are sources.
+        """
+        *sources, target = self.arg("path")
+
+        if not sources:
+            sys.exit("Both a source and a target must be given.")
 
-        if source.startswith("ds:") and target.startswith("ds:"):
-            self.log.error("Copying between datasets isn't supported yet.")
+        if any(s.startswith("ds:") for s in sources) and target.startswith("ds:"):
+            if len(sources) > 1:
+                sys.exit("Only one dataset can be copied from at a time.")
+            self.copy_between_datasets(sources[0][3:], target[3:])
         elif target.startswith("ds:"):
-            self.upload_file(source, target[3:])
-        elif source.startswith("ds:"):
-            self.download_files(source[3:], target)
+            if "-" not in sources:
+                self.upload_files(sources, target[3:])
+            elif len(sources) > 1:
+                sys.exit("Standard input can't be uploaded along with other files.")
+            else:
+                self.upload_stdin(target[3:])
+        elif sources[0].startswith("ds:"):
+            if len(sources) > 1:
+                sys.exit("Only one dataset can be downloaded at a time.")
+            if target == "-":
+                self.stream_files(sources[0][3:])
+            else:
+                self.download_files(sources[0][3:], target)
         else:
             self.log.error(
                 "Either source or target needs to be a dataset (prefixed with 'ds:')."
@@ -365,11 +561,12 @@ Options:{BASE_COMMAND_OPTIONS}
                 "'dataset_id/version', or 'dataset_id/version/edition'."
             )
 
-        # First verify that the dataset exists; `get_dataset` raises an error
-        # if not.
-        self.sdk.get_dataset(dataset_id)
-
         if auto_resolve:
+            # First verify that the dataset exists; `get_dataset` raises an
+            # error if not. Without resolving, it's up to the caller to look
+            # up whatever it needs.
+            self.sdk.get_dataset(dataset_id)
+
             if not version:
                 version = self._get_latest_version(dataset_id)["version"]
 
@@ -387,55 +584,424 @@ Options:{BASE_COMMAND_OPTIONS}
 
         return dataset_id, version, edition
 
-    def upload_file(self, source, target):
-        upload = Upload(env=self.opt("env"))
-        dataset_id, version, edition = self._dataset_components_from_uri(target, True)
+    def _parallelism(self):
+        try:
+            parallelism = int(self.opt("parallel"))
+        except (TypeError, ValueError):
+            parallelism = 0
+        if parallelism < 1:
+            sys.exit("The --parallel option must be a positive integer.")
+        return parallelism
+
+    @staticmethod
+    def _resolve_upload_sources(sources):
+        """Return a list of files to upload given a list of `sources`.
+
+        Sources may be files, directories (which are traversed recursively), or
+        glob patterns. Sources that exist are never treated as glob patterns,
+        so files with names like `report[1].csv` can be given as they are.
+        """
+        filenames = []
+        for source in map(os.path.expanduser, sources):
+            if os.path.exists(source):
+                paths = [source]
+            elif any(c in source for c in "*?["):
+                paths = sorted(glob.glob(source, recursive=True))
+            else:
+                sys.exit(f"No such file or directory: {source}")
+
+            for path in paths:
+                if os.path.isdir(path):
+                    for root, dirs, files in os.walk(path):
+                        dirs.sort()
+                        filenames += [os.path.join(root, f) for f in sorted(files)]
+                else:
+                    filenames.append(path)
+
+        # The same file may have been matched by several sources.
+        filenames = list(dict.fromkeys(filenames))
+
+        if not filenames:
+            sys.exit("No files to upload.")
+
+        # Files are stored by their base name in the edition, so two files
+        # with the same name would overwrite each other.
+        duplicates = [
+            name
+            for name, count in Counter(map(os.path.basename, filenames)).items()
+            if count > 1
+        ]
+        if duplicates:
+            sys.exit(
+                "Can't upload several files with the same name to one edition: "
+                + ", ".join(sorted(duplicates))
+            )
+
+        return filenames
+
+    def _progress(self):
+        """Return a progress reporter for transfers in the chosen format."""
+        return create_progress(self.opt("format"))
+
+    def _upload_file(
+        self, upload, filename, dataset_id, version, edition, progress=None, f=None
+    ):
+        """Upload a single file and return a summary row for it.
 
-        self.log.info(f"Will upload file to: {dataset_id}/{version}/{edition})")
+        The contents are read from the file object `f` instead of from the
+        file `filename` if given.
+        """
+        self.log.info(f"Uploading {filename} to: {dataset_id}/{version}/{edition}")
+        row = {
+            "dataset": dataset_id,
+            "file": filename,
+            "uploaded": False,
+            "status": "failed",
+        }
 
         try:
-            res = upload.upload(source, dataset_id, version, edition, 3)
-        except FileNotFoundError as e:
-            sys.exit(e)
+            if f:
+                res = upload.upload_fileobj(
+                    f, filename, dataset_id, version, edition, 3, progress
+                )
+            else:
+                res = upload.upload(
+                    filename, dataset_id, version, edition, 3, progress=progress
+                )
+        except Exception as e:
+            self.log.exception(f"Upload of {filename} failed")
+            row = {**row, "trace_id": None, "error": str(e)}
+        else:
+            self.log.info(f"Upload returned: {res}")
+            row = {
+                **row,
+                "uploaded": res["result"],
+                "status": "uploaded" if res["result"] else "failed",
+                "trace_id": res["trace_id"],
+            }
+
+        if progress:
+            progress.finish(row["status"])
+        return row
+
+    def _unchanged_files(self, filenames, target, cache):
+        """Return the files in `filenames` that can be skipped since they're
+        unchanged since they were last uploaded to the dataset version of
+        `target`, and the checksums of every file.
+
+        An edition is a complete snapshot of the dataset, so a new edition
+        needs every file if any of them have changed. Hence either every file
+        or none of them are returned.
+
+        Doesn't create any edition, so that nothing is changed if no files
+        need uploading.
+        """
+        dataset_id, version, _ = self._dataset_components_from_uri(
+            target, auto_resolve=False
+        )
+        version = version or self._get_latest_version(dataset_id)["version"]
+
+        with ThreadPoolExecutor(max_workers=self._parallelism()) as executor:
+            checksums = dict(zip(filenames, executor.map(file_sha256, filenames)))
 
-        self.log.info(f"Upload returned: {res}")
+        if all(
+            cache.is_unchanged(dataset_id, version, filename, checksums[filename])
+            for filename in filenames
+        ):
+            return set(filenames), checksums
+        return set(), checksums
 
+    def upload_files(self, sources, target):
+        filenames = self._resolve_upload_sources(sources)
+
+        with UploadCache(upload_cache_path(self.sdk.config)) as cache:
+            if self.opt("skip-unchanged"):
+                unchanged, checksums = self._unchanged_files(filenames, target, cache)
+            else:
+                unchanged, checksums = set(), {}
+            self._upload_files(filenames, target, cache, unchanged, checksums)
+
+    def _upload_files(self, filenames, target, cache, unchanged, checksums):
+        """Upload `filenames` to `target`, skipping the files in `unchanged`.
+
+        Uploaded files are journaled in `cache` until every file has been
+        uploaded, so that an interrupted upload can be resumed into the same
+        edition with `--resume`. With `--skip-unchanged`, the `checksums` of
+        the uploaded files are recorded as well. Without it, any checksums
+        recorded for the uploaded files earlier are forgotten, since they no
+        longer describe the latest upload.
+        """
+        upload = self.make_client(StreamingUpload)
+        key = journal_key(target, filenames)
+        journal = cache.journal(key) if self.opt("resume") else None
+        uploaded_earlier = journal[1] if journal else {}
+
+        results = {
+            filename: {
+                "dataset": target.split("/")[0],
+                "file": filename,
+                "uploaded": False,
+                "status": "skipped",
+                "trace_id": None,
+            }
+            for filename in unchanged
+        }
+        changed = [filename for filename in filenames if filename not in unchanged]
+        pending = []
+        for filename in changed:
+            if os.path.abspath(filename) in uploaded_earlier:
+                results[filename] = {
+                    "dataset": target.split("/")[0],
+                    "file": filename,
+                    "uploaded": True,
+                    "status": "uploaded",
+                    "trace_id": uploaded_earlier[os.path.abspath(filename)],
+                }
+            else:
+                pending.append(filename)
+
+        if journal:
+            dataset_id, version, edition = journal[0]
+            self.log.info(
+                f"Resuming upload to {dataset_id}/{version}/{edition}, "
+                f"{len(changed) - len(pending)} file(s) were uploaded earlier"
+            )
+        elif self.opt("resume"):
+            self.log.info("Found no upload to resume, starting from scratch")
+
+        if pending:
+            if not journal:
+                # Resolve the target once so that every file ends up in the
+                # same edition.
+                dataset_id, version, edition = self._dataset_components_from_uri(
+                    target, True
+                )
+                cache.start_journal(key, dataset_id, version, edition)
+            self.log.info(
+                f"Will upload {len(pending)} file(s) to: "
+                f"{dataset_id}/{version}/{edition}"
+            )
+
+            with self._progress() as progress, ThreadPoolExecutor(
+                max_workers=self._parallelism()
+            ) as executor:
+                file_progress = [
+                    progress.file(filename, os.path.getsize(filename))
+                    for filename in pending
+                ]
+                for filename, row in zip(
+                    pending,
+                    executor.map(
+                        lambda f, p: self._upload_file(
+                            upload, f, dataset_id, version, edition, p
+                        ),
+                        pending,
+                        file_progress,
+                    ),
+                ):
+                    results[filename] = row
+                    if not row["uploaded"]:
+                        continue
+                    cache.journal_file(key, filename, row["trace_id"])
+                    if filename in checksums:
+                        cache.record(
+                            dataset_id, version, edition, filename, checksums[filename]
+                        )
+                    else:
+                        cache.forget(dataset_id, version, filename)
+
+        rows = [results[filename] for filename in filenames]
+
+        if changed:
+            message = "Uploaded {} to dataset: {}/{}/{}".format(
+                "file" if len(changed) == 1 else f"{len(changed)} files",
+                dataset_id,
+                version,
+                edition,
+            )
+        else:
+            message = "No files have changed since they were last uploaded."
+        if unchanged:
+            message += " Skipped {} unchanged file{}.".format(
+                len(unchanged), "" if len(unchanged) == 1 else "s"
+            )
+        self._print_uploads(message, rows)
+
+        if any(row["status"] == "failed" for row in rows):
+            self.print(
+                "\nRun the same command again with --resume to upload the "
+                "remaining files to the same edition."
+            )
+            sys.exit(1)
+
+        cache.finish_journal(key)
+
+    def upload_stdin(self, target):
+        """Upload everything read from stdin as a file named by `--filename`.
+
+        Uploads must state their size up front, so stdin is read to the end
+        before the upload starts. Large inputs are spooled to a temporary file
+        rather than kept in memory.
+        """
+        filename = self.opt("filename")
+        if not filename:
+            sys.exit("Uploads from standard input must be named with --filename.")
+        if self.opt("skip-unchanged") or self.opt("resume"):
+            sys.exit(
+                "--skip-unchanged and --resume can't be used when uploading "
+                "from standard input."
+            )
+
+        with tempfile.SpooledTemporaryFile(max_size=STDIN_SPOOL_SIZE) as f:
+            shutil.copyfileobj(sys.stdin.buffer, f)
+            size = f.tell()
+            f.seek(0)
+            self.log.info(f"Read {size} bytes from stdin")
+
+            dataset_id, version, edition = self._dataset_components_from_uri(
+                target, True
+            )
+            with self._progress() as progress:
+                row = self._upload_file(
+                    self.make_client(StreamingUpload),
+                    filename,
+                    dataset_id,
+                    version,
+                    edition,
+                    progress.file(filename, size),
+                    f,
+                )
+
+        self._print_uploads(
+            f"Uploaded file to dataset: {dataset_id}/{version}/{edition}", [row]
+        )
+        if row["status"] == "failed":
+            sys.exit(1)
+
+    def _print_uploads(self, message, rows):
         out = create_output(self.opt("format"), "datasets_copy_file_config.json")
         out.output_singular_object = True
-        data = {
-            "dataset": dataset_id,
-            "file": source,
-            "uploaded": res["result"],
-            "trace_id": res["trace_id"],
-        }
-        out.add_row(data)
+        out.add_rows(rows)
+        self.print(message, out)
 
-        summary = [f"Uploaded file to dataset: {dataset_id}", str(out)]
-        if res["trace_id"]:
-            summary += [
-                "\nYou can watch the data processing status by running:\n",
-                f"  okdata status {res['trace_id']} --watch",
-            ]
-        self.print("\n".join(summary))
+        for row in rows:
+            if row.get("error"):
+                self.print(f"Failed to upload {row['file']}: {row['error']}")
+
+        self._print_status_hint(rows)
+
+    def _print_status_hint(self, rows):
+        trace_ids = [row["trace_id"] for row in rows if row["trace_id"]]
+        if len(trace_ids) == 1:
+            self.print(
+                "\nYou can watch the data processing status by running:\n\n"
+                f"  okdata status {trace_ids[0]} --watch"
+            )
+        elif trace_ids:
+            self.print(
+                "\nYou can watch the data processing status of each file by "
+                "running:\n\n  okdata status <trace_id> --watch"
+            )
 
     def download_files(self, source, target):
-        download = Download(env=self.opt("env"))
+        download = self.make_client(ParallelDownload)
         dataset_id, version, edition = self._dataset_components_from_uri(source)
 
         try:
-            downloaded_files = download.download(
-                dataset_id, version, edition, resolve_output_filepath(target)
-            )
-        except DownloadURLAssertionError as e:
+            with self._progress() as progress:
+                results = download.download_edition(
+                    dataset_id,
+                    version,
+                    edition,
+                    resolve_output_filepath(target),
+                    max_workers=self._parallelism(),
+                    progress=progress,
+                )
+        except (DownloadURLAssertionError, DownloadChecksumError) as e:
             sys.exit(e)
 
-        self.log.info(f"Download returned: {downloaded_files}")
+        self.log.info(f"Download returned: {results}")
         out = create_output(self.opt("format"), "datasets_copy_file_config_2.json")
         out.output_singular_object = True
-        data = {
-            "source": f"ds:{'/'.join([dataset_id, version, edition])}",
-            "target": "\n".join(downloaded_files["files"]),
-            "trace_id": "n/a",
-        }
-        out.add_row(data)
+        source_uri = f"ds:{'/'.join([dataset_id, version, edition])}"
+        out.add_rows(
+            [
+                {
+                    "source": source_uri,
+                    "target": result["path"],
+                    "status": result["status"],
+                    "size": result["size"],
+                    "throughput": result["throughput"],
+                    "trace_id": "n/a",
+                }
+                for result in results
+            ]
+        )
         self.print(f"Downloaded files from dataset: {dataset_id}", out)
+
+    def stream_files(self, source):
+        """Write the contents of every file in the edition `source` to stdout.
+
+        Nothing else is printed to stdout, so that it can be piped straight
+        into other programs.
+        """
+        download = self.make_client(ParallelDownload)
+        dataset_id, version, edition = self._dataset_components_from_uri(source)
+
+        try:
+            with self._progress() as progress:
+                results = download.stream_edition(
+                    dataset_id, version, edition, sys.stdout.buffer, progress=progress
+                )
+        except (DownloadURLAssertionError, DownloadChecksumError) as e:
+            sys.exit(e)
+
+        self.log.info(f"Streaming returned: {results}")
+
+    def copy_between_datasets(self, source, target):
+        download = self.make_client(ParallelDownload)
+        source_components = self._dataset_components_from_uri(source)
+
+        try:
+            files = download.get_edition_files(*source_components)
+        except DownloadURLAssertionError as e:
+            sys.exit(e)
+
+        if not files:
+            sys.exit(f"No files to copy in: {'/'.join(source_components)}")
+
+        # Only resolve the target once there's something to copy, since it
+        # may create a new edition.
+        target_components = self._dataset_components_from_uri(target, True)
+        self.log.info(
+            f"Will copy {len(files)} file(s) to: {'/'.join(target_components)}"
+        )
+
+        with self._progress() as progress:
+            copy = EditionCopy(
+                download,
+                self.make_client(StreamingUpload),
+                max_workers=self._parallelism(),
+                progress=progress,
+            )
+            rows = copy.copy(source_components, files, target_components)
+
+        out = create_output(self.opt("format"), "datasets_copy_file_config_2.json")
+        out.output_singular_object = True
+        out.add_rows(rows)
+        self.print(
+            "Copied {} to dataset: {}".format(
+                "file" if len(rows) == 1 else f"{len(rows)} files",
+                "/".join(target_components),
+            ),
+            out,
+        )
+
+        for row in rows:
+            if row.get("error"):
+                self.print(f"Failed to copy {row['source']}: {row['error']}")
+
+        self._print_status_hint(rows)
+
+        if any(row["status"] != "copied" for row in rows):
+            sys.exit(1)
@@ -0,0 +1,275 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from okdata.sdk.data.download import Download, DownloadURLAssertionError
+
+log = logging.getLogger()
+
+CHUNK_SIZE = 1024 * 1024
+
+# S3 ETags are plain MD5 checksums of the object, except for objects uploaded
+# in multiple parts (which have a "-<parts>" suffix).
+_MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+
+class DownloadChecksumError(Exception):
+    def __init__(self, path):
+        super().__init__(f"Checksum mismatch for downloaded file: {path}")
+
+
+def _md5_from_etag(etag):
+    match = _MD5_ETAG.match(etag or "")
+    return match.group(1) if match else None
+
+
+def _file_md5(path):
+    md5 = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            md5.update(chunk)
+    return md5
+
+
+class ParallelDownload(Download):
+    """Download client fetching the files of an edition concurrently.
+
+    Files are first written with a `.part` suffix and moved into place once
+    complete. Interrupted downloads are resumed from where they left off using
+    HTTP range requests, and files that already exist locally with the same
+    size and checksum as the remote file are skipped.
+    """
+
+    def download_edition(
+        self,
+        dataset_id,
+        version,
+        edition,
+        output_path,
+        retries=0,
+        max_workers=4,
+        progress=None,
+    ):
+        """Download every file in an edition to `output_path`.
+
+        The progress of each file is reported to `progress` (a
+        `TransferProgress`), if given. Return a list of dictionaries describing
+        the outcome for each file.
+        """
+        files = self.get_edition_files(dataset_id, version, edition, retries)
+        os.makedirs(output_path, exist_ok=True)
+        paths = [os.path.join(output_path, f["key"].split("/")[-1]) for f in files]
+        file_progress = [progress and progress.file(path) for path in paths]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(
+                executor.map(
+                    lambda f, path, p: self.download_file(f["url"], path, retries, p),
+                    files,
+                    paths,
+                    file_progress,
+                )
+            )
+
+    def stream_edition(
+        self, dataset_id, version, edition, out, retries=0, progress=None
+    ):
+        """Write the contents of every file in an edition to the stream `out`.
+
+        Files are written one after another in the order they're listed,
+        without being stored anywhere on the way. The progress of each file
+        is reported to `progress` (a `TransferProgress`), if given. Return a
+        list of dictionaries describing the outcome for each file.
+        """
+        files = self.get_edition_files(dataset_id, version, edition, retries)
+        names = [f["key"].split("/")[-1] for f in files]
+        file_progress = [progress and progress.file(name) for name in names]
+
+        return [
+            self.stream_file(f["url"], name, out, retries, p)
+            for f, name, p in zip(files, names, file_progress)
+        ]
+
+    def stream_file(self, url, name, out, retries=0, progress=None):
+        """Write the contents of the file `name` at `url` to the stream `out`.
+
+        The file is verified against its checksum once it's written, raising
+        `DownloadChecksumError` if it doesn't match. Since the contents have
+        already been passed on at that point, the reader of `out` must discard
+        them in that case.
+        """
+        session = self.prepared_request_with_retries(retries)
+        started = time.monotonic()
+        md5 = hashlib.md5(usedforsecurity=False)
+        transferred = 0
+
+        try:
+            with session.get(url, stream=True) as res:
+                res.raise_for_status()
+                if progress:
+                    progress.start(self._response_size(res))
+                for chunk in res.raw.stream(CHUNK_SIZE, decode_content=False):
+                    out.write(chunk)
+                    md5.update(chunk)
+                    transferred += len(chunk)
+                    if progress:
+                        progress.update(len(chunk))
+                expected_md5 = _md5_from_etag(res.headers.get("ETag"))
+            out.flush()
+            if expected_md5 and md5.hexdigest() != expected_md5:
+                raise DownloadChecksumError(name)
+        except Exception:
+            if progress:
+                progress.finish("failed")
+            raise
+
+        if progress:
+            progress.finish("streamed")
+        elapsed = time.monotonic() - started
+        return {
+            "path": name,
+            "status": "streamed",
+            "size": transferred,
+            "throughput": round(transferred / elapsed / 1e6, 2) if elapsed else None,
+        }
+
+    def get_edition_files(self, dataset_id, version, edition, retries=0):
+        """Return the key and download URL of every file in an edition.
+
+        Raise `DownloadURLAssertionError` if any of the URLs point somewhere
+        else than the expected download location.
+        """
+        files = self.get_files(dataset_id, version, edition, retries=retries)
+        base_url = self.config.get("s3DownloadBaseUrl")
+
+        for file in files:
+            if not file["url"].startswith(base_url):
+                raise DownloadURLAssertionError(file["url"], base_url)
+
+        return files
+
+    def _remote_file_info(self, session, url):
+        """Return the size and MD5 checksum (if known) of the file at `url`.
+
+        A single byte is requested rather than using `HEAD`, since presigned
+        S3 URLs are only valid for the method they were signed for.
+        """
+        with session.get(url, headers={"Range": "bytes=0-0"}, stream=True) as res:
+            res.raise_for_status()
+            if res.status_code == 206:
+                size = int(res.headers["Content-Range"].split("/")[-1])
+            else:
+                size = int(res.headers.get("Content-Length", -1))
+            return size, _md5_from_etag(res.headers.get("ETag"))
+
+    @staticmethod
+    def _response_size(res):
+        """Return the size of the whole file served by `res`, if known."""
+        if "Content-Range" in res.headers:
+            size = res.headers["Content-Range"].split("/")[-1]
+        else:
+            size = res.headers.get("Content-Length")
+        return int(size) if size and size != "*" else None
+
+    def download_file(self, url, path, retries=0, progress=None):
+        """Download the file at `url` to `path`, resuming if possible.
+
+        The progress of the download is reported to `progress` (a
+        `FileProgress`), if given.
+        """
+        try:
+            result = self._download_file(url, path, retries, progress)
+        except Exception:
+            if progress:
+                progress.finish("failed")
+            raise
+        if progress:
+            progress.finish(result["status"])
+        return result
+
+    def _download_file(self, url, path, retries, progress):
+        session = self.prepared_request_with_retries(retries)
+
+        if os.path.exists(path):
+            size, md5 = self._remote_file_info(session, url)
+            if (
+                md5
+                and size == os.path.getsize(path)
+                and _file_md5(path).hexdigest() == md5
+            ):
+                log.info(f"Skipping {path}, it's identical to the remote file")
+                return {
+                    "path": path,
+                    "status": "skipped",
+                    "size": size,
+                    "throughput": None,
+                }
+
+        resumable = os.path.exists(f"{path}.part")
+        try:
+            return self._fetch(session, url, path, True, progress)
+        except DownloadChecksumError:
+            if not resumable:
+                raise
+            # The partial file might have been left over from an earlier
+            # version of the remote file; try once more from scratch.
+            log.warning(f"Checksum mismatch for resumed {path}, starting over")
+            return self._fetch(session, url, path, False, progress)
+
+    def _fetch(self, session, url, path, resume, progress=None):
+        part_path = f"{path}.part"
+        offset = (
+            os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        )
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        started = time.monotonic()
+
+        with session.get(url, headers=headers, stream=True) as res:
+            if res.status_code == 416:
+                # The partial file is at least as large as the remote file, so
+                # it can't be a prefix of it.
+                log.info(f"Can't resume {part_path}, starting over")
+                return self._fetch(session, url, path, False, progress)
+            res.raise_for_status()
+
+            resumed = res.status_code == 206
+            if resumed:
+                md5 = _file_md5(part_path)
+                log.info(f"Resuming download of {path} from byte {offset}")
+            else:
+                md5 = hashlib.md5(usedforsecurity=False)
+                offset = 0
+
+            if progress:
+                progress.start(self._response_size(res), offset)
+
+            transferred = 0
+            with open(part_path, "ab" if resumed else "wb") as f:
+                # Read the raw stream to store the file exactly as it is
+                # stored remotely, even if it has a `Content-Encoding`.
+                for chunk in res.raw.stream(CHUNK_SIZE, decode_content=False):
+                    f.write(chunk)
+                    md5.update(chunk)
+                    transferred += len(chunk)
+                    if progress:
+                        progress.update(len(chunk))
+
+            expected_md5 = _md5_from_etag(res.headers.get("ETag"))
+
+        elapsed = time.monotonic() - started
+
+        if expected_md5 and md5.hexdigest() != expected_md5:
+            os.remove(part_path)
+            raise DownloadChecksumError(path)
+
+        os.replace(part_path, path)
+
+        return {
+            "path": path,
+            "status": "resumed" if resumed else "downloaded",
+            "size": offset + transferred,
+            "throughput": round(transferred / elapsed / 1e6, 2) if elapsed else None,
+        }
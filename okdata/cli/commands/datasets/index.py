@@ -0,0 +1,229 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+from okdata.cli.io import user_cache_dir
+from okdata.cli.token_cache import cache_key
+
+log = logging.getLogger()
+
+# How long the index is used before being refreshed from the server.
+DEFAULT_TTL = timedelta(hours=1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS datasets (
+  id TEXT NOT NULL,
+  title TEXT,
+  data TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS datasets_fts USING fts5(
+  id, title, keywords, publisher, parent_id, access_rights
+);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+# Weights of each full-text search column when ranking search results, in the
+# same order as the columns of `datasets_fts`.
+_SEARCH_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 1.0, 1.0)
+
+
+def ttl():
+    """Return how long the index is considered fresh.
+
+    Can be overridden by setting `OKDATA_DATASET_INDEX_TTL` to a number of
+    seconds. Setting it to zero makes every listing fetch datasets from the
+    server.
+    """
+    try:
+        return timedelta(seconds=float(os.environ["OKDATA_DATASET_INDEX_TTL"]))
+    except (KeyError, ValueError):
+        return DEFAULT_TTL
+
+
+def index_path(config, auth):
+    """Return the path to the dataset index of the user behind `auth`.
+
+    Users may see different datasets depending on their permissions, so each
+    user gets their own index. Anonymous users get one per environment (and
+    API deployment, see `OKDATA_API_URL`) given by `config`.
+    """
+    anonymous = ":".join(
+        filter(None, [config.config["env"], config.config.get("apiUrl"), "anonymous"])
+    )
+    key = cache_key(auth) or hashlib.sha256(anonymous.encode()).hexdigest()
+    return os.path.join(user_cache_dir("datasets"), f"{key}.sqlite3")
+
+
+def _search_fields(dataset):
+    """Return the values of `dataset` to search, as the columns of `datasets_fts`."""
+    return (
+        dataset["Id"],
+        dataset.get("title"),
+        " ".join(dataset.get("keywords") or []),
+        dataset.get("publisher"),
+        dataset.get("parent_id"),
+        dataset.get("accessRights"),
+    )
+
+
+def _tokens(value):
+    return re.findall(r"\w+", str(value or "").lower())
+
+
+def _matches_word(tokens, word):
+    """Return true if the tokens of `word` appear in `tokens`.
+
+    Like a quoted FTS5 prefix query, the tokens must appear in order, and
+    only the last one may be a prefix.
+    """
+    *head, last = word
+    return any(
+        tokens[i : i + len(head)] == head and tokens[i + len(head)].startswith(last)
+        for i in range(len(tokens) - len(head))
+    )
+
+
+def search_datasets(datasets, text):
+    """Return the datasets matching the words in `text`, best matches first.
+
+    Searches like `DatasetIndex.search` without an index, for when it can't
+    be used.
+    """
+    words = [tokens for tokens in map(_tokens, text.split()) if tokens]
+    if not words:
+        return []
+    results = []
+    for dataset in datasets:
+        fields = [_tokens(value) for value in _search_fields(dataset)]
+        score = 0
+        for word in words:
+            weights = [
+                weight
+                for weight, tokens in zip(_SEARCH_WEIGHTS, fields)
+                if _matches_word(tokens, word)
+            ]
+            if not weights:
+                break
+            score += max(weights)
+        else:
+            results.append((score, dataset))
+    return [dataset for _, dataset in sorted(results, key=lambda r: -r[0])]
+
+
+def _regexp(pattern, value):
+    return value is not None and re.search(pattern, value, re.IGNORECASE) is not None
+
+
+def _search_query(text):
+    """Turn free text into an FTS5 query matching all words as prefixes.
+
+    Every word is quoted, so that characters with a special meaning in FTS5
+    queries (like `-` and `:`) are searched for literally.
+    """
+    words = text.split()
+    return " ".join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+
+class DatasetIndex:
+    """Local SQLite index of dataset metadata for fast listing and searching."""
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        try:
+            self.db.create_function("regexp", 2, _regexp, deterministic=True)
+            self.db.executescript(_SCHEMA)
+        except sqlite3.Error:
+            # E.g. when SQLite is built without FTS5.
+            self.db.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def refreshed_at(self):
+        row = self.db.execute(
+            "SELECT value FROM meta WHERE key = 'refreshed_at'"
+        ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def is_stale(self, max_age):
+        refreshed_at = self.refreshed_at()
+        return (
+            refreshed_at is None or datetime.now(timezone.utc) - refreshed_at >= max_age
+        )
+
+    def replace(self, datasets):
+        """Replace the contents of the index with `datasets`."""
+        log.info(f"Indexing {len(datasets)} datasets in {self.path}")
+        with self.db:
+            self.db.execute("DELETE FROM datasets")
+            self.db.execute("DELETE FROM datasets_fts")
+            for dataset in datasets:
+                rowid = self.db.execute(
+                    "INSERT INTO datasets (id, title, data) VALUES (?, ?, ?)",
+                    (dataset["Id"], dataset.get("title"), json.dumps(dataset)),
+                ).lastrowid
+                self.db.execute(
+                    "INSERT INTO datasets_fts (rowid, id, title, keywords, "
+                    "publisher, parent_id, access_rights) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (rowid, *_search_fields(dataset)),
+                )
+            self.db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('refreshed_at', ?)",
+                (datetime.now(timezone.utc).isoformat(),),
+            )
+
+    def invalidate(self):
+        """Mark the index as stale, so that it's refreshed on next use."""
+        with self.db:
+            self.db.execute("DELETE FROM meta WHERE key = 'refreshed_at'")
+
+    def datasets(self, pattern=None):
+        """Return the indexed datasets in the order they were indexed.
+
+        If `pattern` is given, only datasets whose ID or title matches the
+        regular expression `pattern` are returned (ignoring case), like the
+        `filter` argument of `Dataset.get_datasets`.
+        """
+        if pattern is None:
+            rows = self.db.execute("SELECT data FROM datasets ORDER BY rowid")
+        else:
+            rows = self.db.execute(
+                "SELECT data FROM datasets "
+                "WHERE id REGEXP :pattern OR title REGEXP :pattern ORDER BY rowid",
+                {"pattern": pattern},
+            )
+        return [json.loads(data) for (data,) in rows]
+
+    def search(self, text):
+        """Return datasets matching the words in `text`, best matches first.
+
+        Every word must match the beginning of a word in the dataset's ID,
+        title, keywords, publisher, parent ID, or access rights.
+        """
+        query = _search_query(text)
+        if not query:
+            return []
+        rows = self.db.execute(
+            "SELECT d.data FROM datasets_fts f "
+            "JOIN datasets d ON d.rowid = f.rowid "
+            "WHERE datasets_fts MATCH ? "
+            f"ORDER BY bm25(datasets_fts, {', '.join(map(str, _SEARCH_WEIGHTS))})",
+            (query,),
+        )
+        return [json.loads(data) for (data,) in rows]
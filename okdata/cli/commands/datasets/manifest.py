@@ -0,0 +1,310 @@
+"""Creating datasets, versions, editions, and distributions from a manifest.
+
+A manifest is a list of resources, each described by an object with a `kind`
+field and the fields to create the resource with. Resources refer to their
+parents with these fields:
+
+- dataset: `id` (the ID the dataset is expected to get)
+- version: `dataset`
+- edition: `dataset`, `version`
+- distribution: `dataset`, `version`, `edition`
+
+A distribution's `edition` is either the `edition` field of an edition in the
+manifest, or the ID of an existing edition.
+"""
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.exceptions import HTTPError, RequestException
+
+from okdata.cli.io import iter_json
+
+log = logging.getLogger()
+
+# Resource kinds in the order they must be created in.
+KINDS = ["dataset", "version", "edition", "distribution"]
+
+# Fields referring to parent resources (and the manifest ID of datasets) for
+# each kind. Every other field is sent to the API when creating the resource.
+REFERENCE_FIELDS = {
+    "dataset": ["id"],
+    "version": ["dataset"],
+    "edition": ["dataset", "version"],
+    "distribution": ["dataset", "version", "edition"],
+}
+
+CREATED = "created"
+EXISTS = "exists"
+WOULD_CREATE = "would create"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class ManifestError(Exception):
+    pass
+
+
+def _read_yaml(filename):
+    try:
+        import yaml
+    except ImportError:
+        raise ManifestError(
+            "Reading YAML manifests requires PyYAML, install it with: "
+            "pip install 'okdata-cli[yaml]'"
+        )
+    with open(os.path.expanduser(filename)) as f:
+        return yaml.safe_load(f)
+
+
+def load_manifest(filename):
+    """Return the list of resources in the manifest file `filename`.
+
+    The manifest may be a YAML file, or a file of JSON documents as read by
+    `iter_json` (a JSON array, or newline-delimited JSON). YAML and JSON
+    manifests contain either a list of resources, or an object with the list
+    in a `resources` field.
+    """
+    log.info(f"Reading manifest from: {filename}")
+    try:
+        if os.path.splitext(filename)[1].lower() in (".yaml", ".yml"):
+            resources = _read_yaml(filename)
+        else:
+            resources = list(iter_json(filename))
+            if len(resources) == 1 and isinstance(resources[0], dict):
+                # A single document is either the manifest object, or a
+                # manifest of one resource.
+                resources = resources[0].get("resources", resources)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"Couldn't read manifest {filename}: {e}")
+
+    if isinstance(resources, dict):
+        resources = resources.get("resources")
+    if not isinstance(resources, list):
+        raise ManifestError("The manifest must contain a list of resources.")
+
+    for i, resource in enumerate(resources, start=1):
+        _validate_resource(i, resource)
+
+    return resources
+
+
+def _validate_resource(i, resource):
+    """Raise `ManifestError` unless `resource` (number `i`) can be applied."""
+    if not isinstance(resource, dict) or resource.get("kind") not in KINDS:
+        raise ManifestError(
+            f"Resource {i} must be an object with a `kind` field, one of: "
+            f"{', '.join(KINDS)}."
+        )
+    kind = resource["kind"]
+    missing = [f for f in REFERENCE_FIELDS[kind] if f not in resource]
+    if missing:
+        raise ManifestError(
+            f"Resource {i} ({kind}) is missing the field(s): {', '.join(missing)}."
+        )
+    if kind == "version" and "version" not in resource:
+        raise ManifestError(f"Resource {i} (version) is missing `version`.")
+
+    # Fields identifying the resource are compared with the values on the
+    # server, which are always strings.
+    ref_fields = [*REFERENCE_FIELDS[kind]]
+    if kind == "version" or (kind == "edition" and "edition" in resource):
+        ref_fields.append(kind)
+    for field in ref_fields:
+        if not isinstance(resource[field], str) or not resource[field]:
+            raise ManifestError(
+                f"The field `{field}` of resource {i} ({kind}) must be a "
+                "non-empty string (quote it in YAML manifests)."
+            )
+
+    try:
+        json.dumps(resource)
+    except (TypeError, ValueError) as e:
+        raise ManifestError(
+            f"Resource {i} ({kind}) can't be sent to the API: {e} (quote dates "
+            "and timestamps in YAML manifests)."
+        )
+
+
+def _payload(resource):
+    ignored = ["kind", *REFERENCE_FIELDS[resource["kind"]]]
+    return {k: v for k, v in resource.items() if k not in ignored}
+
+
+def _find_matching(existing, payload):
+    """Return the first of `existing` having every field in `payload`."""
+    for candidate in existing:
+        if all(candidate.get(k) == v for k, v in payload.items()):
+            return candidate
+    return None
+
+
+def _is_not_found(e):
+    return isinstance(e, HTTPError) and e.response.status_code == 404
+
+
+class ManifestApply:
+    """Create the resources in a manifest that don't exist already.
+
+    Resources are created one kind at a time, in dependency order, with up to
+    `max_workers` resources of the same kind created at once. Resources whose
+    parent failed to be created are skipped.
+
+    With `dry_run`, nothing is created, and only what would have been done is
+    reported.
+    """
+
+    def __init__(self, sdk, max_workers=4, dry_run=False):
+        self.sdk = sdk
+        self.max_workers = max_workers
+        self.dry_run = dry_run
+        # Manifest dataset ID -> actual dataset ID.
+        self.datasets = {}
+        # (dataset, version, edition field) -> actual edition ID.
+        self.editions = {}
+        # Manifest references of resources that weren't created.
+        self.failed = set()
+        # Manifest references of resources that only would have been created.
+        self.planned = set()
+        # Every dataset on the server, fetched when first needed.
+        self._all_datasets = None
+        self._all_datasets_lock = threading.Lock()
+
+    def run(self, resources):
+        """Apply `resources`, yielding a result for each resource."""
+        for kind in KINDS:
+            level = [r for r in resources if r["kind"] == kind]
+            if not level:
+                continue
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                yield from executor.map(self._apply, level)
+
+    def _apply(self, resource):
+        kind = resource["kind"]
+        ref = self._ref(resource)
+        parents = [ref[:i] for i in range(1, len(ref))]
+        result = {"kind": kind, "id": "/".join(map(str, ref[:3])), "error": None}
+
+        failed_parent = next((p for p in parents if p in self.failed), None)
+        if failed_parent:
+            self.failed.add(ref)
+            return {
+                **result,
+                "status": SKIPPED,
+                "error": f"Depends on {KINDS[len(failed_parent) - 1]} "
+                f"{'/'.join(map(str, failed_parent))}, which wasn't created",
+            }
+
+        try:
+            # Parents that only would have been created can't have children
+            # on the server.
+            parent_planned = any(p in self.planned for p in parents)
+            existing = None if parent_planned else self._find_existing(resource)
+            if existing:
+                resource_id = existing["Id"]
+                status = EXISTS
+            elif self.dry_run:
+                self.planned.add(ref)
+                resource_id = None
+                status = WOULD_CREATE
+            else:
+                resource_id = self._create(resource)["Id"]
+                status = CREATED
+        except RequestException as e:
+            log.info(f"Failed to apply {kind} {result['id']}: {e}")
+            self.failed.add(ref)
+            return {**result, "status": FAILED, "error": str(e)}
+
+        if kind == "dataset":
+            self.datasets[resource["id"]] = resource_id or resource["id"]
+        elif kind == "edition" and resource_id:
+            self.editions[ref] = resource_id.split("/")[-1]
+
+        return {**result, "id": resource_id or result["id"], "status": status}
+
+    @staticmethod
+    def _ref(resource):
+        """Return a tuple identifying `resource` in the manifest.
+
+        The tuple starts with the references of the resource's parents, so
+        that `ref[:n]` identifies its ancestor of the `n`th kind.
+        """
+        kind = resource["kind"]
+        if kind == "dataset":
+            return (resource["id"],)
+        if kind == "version":
+            return (resource["dataset"], resource["version"])
+        if kind == "edition":
+            return (resource["dataset"], resource["version"], resource.get("edition"))
+        return (
+            resource["dataset"],
+            resource["version"],
+            resource["edition"],
+            json.dumps(_payload(resource), sort_keys=True),
+        )
+
+    def _parent_ids(self, resource):
+        """Return the actual IDs of the parents of `resource`."""
+        ids = []
+        if "dataset" in resource:
+            ids.append(self.datasets.get(resource["dataset"], resource["dataset"]))
+        if "version" in resource and resource["kind"] != "version":
+            ids.append(resource["version"])
+        if resource["kind"] == "distribution":
+            key = (resource["dataset"], resource["version"], resource["edition"])
+            ids.append(self.editions.get(key, resource["edition"]))
+        return ids
+
+    def _find_existing(self, resource):
+        """Return the existing resource on the server matching `resource`."""
+        kind = resource["kind"]
+        payload = _payload(resource)
+        parent_ids = self._parent_ids(resource)
+
+        if kind == "dataset":
+            try:
+                return self.sdk.get_dataset(resource["id"])
+            except HTTPError as e:
+                if not _is_not_found(e):
+                    raise
+            # The dataset may have been created with a different ID than
+            # expected by an earlier run, so look for a dataset with the same
+            # fields before creating another one.
+            if not payload:
+                return None
+            return _find_matching(self._datasets_on_server(), payload)
+
+        get_existing = {
+            "version": self.sdk.get_versions,
+            "edition": self.sdk.get_editions,
+            "distribution": self.sdk.get_distributions,
+        }[kind]
+        return _find_matching(get_existing(*parent_ids), payload)
+
+    def _datasets_on_server(self):
+        with self._all_datasets_lock:
+            if self._all_datasets is None:
+                self._all_datasets = self.sdk.get_datasets()
+            return self._all_datasets
+
+    def _create(self, resource):
+        kind = resource["kind"]
+        payload = _payload(resource)
+        parent_ids = self._parent_ids(resource)
+
+        if kind == "dataset":
+            created = self.sdk.create_dataset(payload)
+            if created["Id"] != resource["id"]:
+                log.warning(
+                    f"Dataset '{resource['id']}' was created with the ID "
+                    f"'{created['Id']}', consider updating the manifest to use it"
+                )
+            return created
+        if kind == "version":
+            return self.sdk.create_version(*parent_ids, payload)
+        if kind == "edition":
+            return self.sdk.create_edition(*parent_ids, payload)
+        return self.sdk.create_distribution(*parent_ids, payload)
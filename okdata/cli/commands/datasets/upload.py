@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+
+from okdata.sdk.data.upload import Upload
+from okdata.sdk.exceptions import ApiAuthenticateError
+from requests import exceptions as requests_exceptions
+from requests_toolbelt import MultipartEncoder
+
+log = logging.getLogger()
+
+
+class _SizedStream:
+    """A file-like object reading exactly `size` bytes from `stream`.
+
+    `MultipartEncoder` needs to know how much is left of every part while
+    encoding, which streams like HTTP response bodies can't tell by
+    themselves.
+
+    Every read is reported to `progress` (a `FileProgress`), if given.
+    """
+
+    def __init__(self, stream, size, progress=None):
+        self.stream = stream
+        self.len = size
+        self.progress = progress
+
+    def read(self, size=-1):
+        if size < 0 or size > self.len:
+            size = self.len
+        data = self.stream.read(size)
+        if size and not data:
+            raise IOError(f"Stream ended with {self.len} bytes left to read")
+        self.len -= len(data)
+        if self.progress:
+            self.progress.update(len(data))
+        return data
+
+
+class StreamingUpload(Upload):
+    """Upload client sending file contents as they're read.
+
+    Files are sent in chunks without first being read into memory, so that
+    files of any size can be uploaded. Any readable stream of known size can
+    also be uploaded with `upload_stream`.
+    """
+
+    def upload(self, filename, dataset_id, version, edition, retries=0, progress=None):
+        """Upload the file `filename`.
+
+        Since the upload is a single request, an upload failing because of a
+        connection error, a timeout, or a server error is retried from the
+        start of the file, up to `retries` times. Uploads rejected by the
+        server are returned right away, since they would only be rejected
+        again. The progress of the
+        upload is reported to `progress` (a `FileProgress`), if given.
+        """
+        with open(filename, "rb") as f:
+            return self.upload_fileobj(
+                f, filename, dataset_id, version, edition, retries, progress
+            )
+
+    def upload_fileobj(
+        self, f, filename, dataset_id, version, edition, retries=0, progress=None
+    ):
+        """Upload the rest of the seekable file object `f` as `filename`.
+
+        Retries like `upload` does.
+        """
+        start = f.tell()
+        size = f.seek(0, os.SEEK_END) - start
+
+        for attempt in range(retries + 1):
+            if attempt:
+                delay = 2 ** (attempt - 1)
+                log.info(f"Retrying upload of {filename} in {delay} seconds")
+                time.sleep(delay)
+            f.seek(start)
+            try:
+                result = self.upload_stream(
+                    f,
+                    filename,
+                    size,
+                    dataset_id,
+                    version,
+                    edition,
+                    retries,
+                    progress,
+                )
+            except (
+                requests_exceptions.ConnectionError,
+                requests_exceptions.Timeout,
+            ) as e:
+                if attempt == retries:
+                    raise
+                log.warning(f"Upload of {filename} failed: {e}")
+                continue
+            if result["result"]:
+                break
+            if result["status_code"] < 500 or attempt == retries:
+                log.warning(f"Upload of {filename} was rejected")
+                break
+            log.warning(f"Upload of {filename} failed: {result['status_code']}")
+        return result
+
+    def upload_stream(
+        self,
+        stream,
+        filename,
+        size,
+        dataset_id,
+        version,
+        edition,
+        retries=0,
+        progress=None,
+    ):
+        """Upload `size` bytes read from `stream` as `filename`.
+
+        The progress of the upload is reported to `progress` (a
+        `FileProgress`), if given.
+        """
+        url = self.config.get("s3BucketUrl")
+        log.info(f"Streaming {filename} to {dataset_id} on: {url}")
+
+        s3_signed_data = self.create_s3_signed_data(
+            filename, dataset_id, version, edition, retries=retries
+        )
+        if "message" in s3_signed_data:
+            raise ApiAuthenticateError(s3_signed_data["message"])
+
+        if progress:
+            progress.start(size)
+        encoder = MultipartEncoder(
+            {
+                **s3_signed_data["fields"],
+                # S3 ignores any fields after the file.
+                "file": (
+                    os.path.basename(filename),
+                    _SizedStream(stream, size, progress),
+                ),
+            }
+        )
+        # A stream can only be sent once, so the upload itself can't be
+        # retried.
+        session = self.prepared_request_with_retries(retries=0)
+        result = session.post(
+            url, data=encoder, headers={"Content-Type": encoder.content_type}
+        )
+        return {
+            "result": result.status_code == 204,
+            "status_code": result.status_code,
+            "trace_id": s3_signed_data.get("trace_id"),
+        }
@@ -0,0 +1,193 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from okdata.cli.io import user_cache_dir
+
+log = logging.getLogger()
+
+CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+  dataset_id TEXT NOT NULL,
+  version TEXT NOT NULL,
+  filename TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  edition TEXT NOT NULL,
+  uploaded_at TEXT NOT NULL,
+  PRIMARY KEY (dataset_id, version, filename)
+);
+CREATE TABLE IF NOT EXISTS journals (
+  key TEXT PRIMARY KEY,
+  dataset_id TEXT NOT NULL,
+  version TEXT NOT NULL,
+  edition TEXT NOT NULL,
+  started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal_files (
+  key TEXT NOT NULL,
+  path TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  mtime_ns INTEGER NOT NULL,
+  trace_id TEXT,
+  PRIMARY KEY (key, path)
+);
+"""
+
+
+def upload_cache_path(config):
+    """Return the path to the upload cache for the environment of `config`.
+
+    Other deployments of the APIs (see `OKDATA_API_URL`) get a cache of their
+    own.
+    """
+    key = ":".join(filter(None, [config.config["env"], config.config.get("apiUrl")]))
+    return os.path.join(
+        user_cache_dir("uploads"), f"{hashlib.sha256(key.encode()).hexdigest()}.sqlite3"
+    )
+
+
+def file_sha256(path):
+    """Return the SHA-256 checksum of the file at `path` as a hex string."""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def journal_key(target, filenames):
+    """Return a key identifying an upload of `filenames` to `target`."""
+    paths = sorted(os.path.abspath(filename) for filename in filenames)
+    return hashlib.sha256("\0".join([target, *paths]).encode()).hexdigest()
+
+
+class UploadCache:
+    """Local record of uploads.
+
+    Keeps the checksums of files uploaded to each dataset version, used for
+    skipping uploads of files that haven't changed since they were last
+    uploaded. Files are identified by their base name, like they are in an
+    edition.
+
+    Also keeps a journal of the files uploaded so far by uploads in progress,
+    so that interrupted uploads can be resumed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def is_unchanged(self, dataset_id, version, filename, sha256):
+        """Return true if `filename` was last uploaded with checksum `sha256`."""
+        row = self.db.execute(
+            "SELECT sha256 FROM uploads "
+            "WHERE dataset_id = ? AND version = ? AND filename = ?",
+            (dataset_id, version, os.path.basename(filename)),
+        ).fetchone()
+        return row is not None and row[0] == sha256
+
+    def record(self, dataset_id, version, edition, filename, sha256):
+        """Record that `filename` with checksum `sha256` was uploaded."""
+        log.info(f"Recording upload of {filename} to {dataset_id}/{version}/{edition}")
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO uploads "
+                "(dataset_id, version, filename, sha256, edition, uploaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    dataset_id,
+                    version,
+                    os.path.basename(filename),
+                    sha256,
+                    edition,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def forget(self, dataset_id, version, filename):
+        """Forget the checksum `filename` was last uploaded with.
+
+        Used when a file is uploaded without computing its checksum, since
+        the recorded one no longer matches what was uploaded last.
+        """
+        with self.db:
+            self.db.execute(
+                "DELETE FROM uploads "
+                "WHERE dataset_id = ? AND version = ? AND filename = ?",
+                (dataset_id, version, os.path.basename(filename)),
+            )
+
+    def start_journal(self, key, dataset_id, version, edition):
+        """Start a new journal for the upload `key` to the given edition."""
+        with self.db:
+            self.db.execute("DELETE FROM journal_files WHERE key = ?", (key,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO journals "
+                "(key, dataset_id, version, edition, started_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    dataset_id,
+                    version,
+                    edition,
+                    datetime.now(timezone.utc).isoformat(),
+                ),
+            )
+
+    def journal_file(self, key, path, trace_id):
+        """Record in the journal of `key` that `path` has been uploaded."""
+        stat = os.stat(path)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO journal_files "
+                "(key, path, size, mtime_ns, trace_id) VALUES (?, ?, ?, ?, ?)",
+                (key, os.path.abspath(path), stat.st_size, stat.st_mtime_ns, trace_id),
+            )
+
+    def journal(self, key):
+        """Return the edition and uploaded files in the journal of `key`.
+
+        The edition is returned as a (dataset ID, version, edition) tuple, and
+        the files as a dictionary from path to trace ID. Files that have been
+        modified after they were uploaded are left out. Return None if there's
+        no journal for `key`.
+        """
+        edition = self.db.execute(
+            "SELECT dataset_id, version, edition FROM journals WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if not edition:
+            return None
+
+        uploaded = {}
+        for path, size, mtime_ns, trace_id in self.db.execute(
+            "SELECT path, size, mtime_ns, trace_id FROM journal_files WHERE key = ?",
+            (key,),
+        ):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns):
+                uploaded[path] = trace_id
+        return edition, uploaded
+
+    def finish_journal(self, key):
+        """Forget the journal of `key`."""
+        with self.db:
+            self.db.execute("DELETE FROM journal_files WHERE key = ?", (key,))
+            self.db.execute("DELETE FROM journals WHERE key = ?", (key,))
@@ -25,9 +25,9 @@ def _pipeline_input_config(pipeline_id, dataset_id, version):
     }
 
 
-def _create_pipeline(command, env, dataset_id, pipeline):
+def _create_pipeline(command, dataset_id, pipeline):
     command.print("Creating pipeline...")
-    pipeline_client = PipelineApiClient(env=env)
+    pipeline_client = command.make_client(PipelineApiClient)
     pipeline_config = _pipeline_config(pipeline, dataset_id, "1")
     pipeline_id = pipeline_client.create_pipeline_instance(pipeline_config)
     pipeline_id = pipeline_id.strip('"')  # What's up with these?
@@ -74,7 +74,6 @@ class DatasetCreateWizard:
         return config
 
     def start(self):
-        env = self.command.opt("env")
         choices = run_questionnaire(*qs_create_dataset())
 
         confirm_to_continue(
@@ -89,14 +88,15 @@ class DatasetCreateWizard:
         )
 
         self.command.print("Creating dataset...")
-        dataset_client = Dataset(env=env)
+        dataset_client = self.command.make_client(Dataset)
         dataset_config = self.dataset_config(choices)
         dataset = dataset_client.create_dataset(dataset_config)
         dataset_id = dataset["Id"]
+        self.command.invalidate_dataset_index()
         self.command.print(f"Created dataset with ID: {dataset_id}")
 
         if choices.get("pipeline"):
-            _create_pipeline(self.command, env, dataset_id, choices["pipeline"])
+            _create_pipeline(self.command, dataset_id, choices["pipeline"])
 
         if choices["sourceType"] == "file":
             self.command.print(
@@ -119,12 +119,7 @@ class PipelineCreateWizard:
     def start(self):
         choices = run_questionnaire(*qs_create_pipeline())
         try:
-            _create_pipeline(
-                self.command,
-                self.command.opt("env"),
-                self.dataset_id,
-                choices["pipeline"],
-            )
+            _create_pipeline(self.command, self.dataset_id, choices["pipeline"])
         except HTTPError as e:
             if e.response.status_code == 409:
                 sys.exit("This dataset already has a pipeline set up.")
@@ -1,11 +1,15 @@
+import sys
 from operator import itemgetter
 
 from okdata.sdk.permission.client import PermissionClient
 from okdata.sdk.permission.user_types import Client, Team, User
 
 from okdata.cli.command import BASE_COMMAND_OPTIONS, BaseCommand
+from okdata.cli.io import iter_json
 from okdata.cli.output import create_output
 
+USER_CLASSES = {"user": User, "team": Team, "client": Client}
+
 
 class PermissionsCommand(BaseCommand):
     __doc__ = f"""Oslo :: Permissions
@@ -13,7 +17,9 @@ class PermissionsCommand(BaseCommand):
 Usage:
   okdata permissions ls [<resource_name>] [options]
   okdata permissions add <resource_name> <user> [<scope>] [--team | --client] [options]
+  okdata permissions add --file=<file> [options]
   okdata permissions rm <resource_name> <user> [<scope>] [--team | --client] [options]
+  okdata permissions rm --file=<file> [options]
 
 Examples:
   okdata permissions ls
@@ -22,14 +28,17 @@ Examples:
   okdata permissions add okdata:dataset:my-dataset janedoe okdata:dataset:read
   okdata permissions rm okdata:dataset:my-dataset janedoe
   okdata permissions rm okdata:dataset:my-dataset janedoe okdata:dataset:write
+  okdata permissions add --file=permissions.ndjson
+  generate-permissions | okdata permissions add --file=-
 
 Options:{BASE_COMMAND_OPTIONS}
+  --file=<file>             # Read permissions to change from <file> ("-" for stdin)
   --history
     """
 
     def __init__(self):
         super().__init__()
-        self.client = PermissionClient(env=self.opt("env"))
+        self.client = self.make_client(PermissionClient)
 
     def handler(self):
         resource_name = self.arg("resource_name")
@@ -39,10 +48,18 @@ Options:{BASE_COMMAND_OPTIONS}
                 self.list_permissions(resource_name)
             else:
                 self.list_my_permissions()
+        elif self.opt("file"):
+            filename = self.opt("file")
+            filename = None if filename == "-" else filename
+            if filename:
+                # Check every record before changing anything. Stdin can't be
+                # read twice, so records from it are checked as they're
+                # applied instead.
+                for _ in self._read_permissions(filename):
+                    pass
+            for permission in self._read_permissions(filename):
+                self.update_permission(*permission)
         elif self.cmd("add") or self.cmd("rm"):
-            user = self.arg("user")
-            scope = self.arg("scope")
-
             if self.opt("team"):
                 user_class = Team
             elif self.opt("client"):
@@ -50,18 +67,63 @@ Options:{BASE_COMMAND_OPTIONS}
             else:
                 user_class = User
 
-            fmt_args = [
-                f"'{scope}'" if scope else "every permission",
-                resource_name,
-                user_class.__name__.lower(),
-                user,
-            ]
-            if self.cmd("add"):
-                self.add_user(resource_name, user_class(user), scope)
-                self.print("Granted {} on '{}' to {} '{}'".format(*fmt_args))
-            else:
-                self.remove_user(resource_name, user_class(user), scope)
-                self.print("Revoked {} on '{}' from {} '{}'".format(*fmt_args))
+            self.update_permission(
+                resource_name, user_class, self.arg("user"), self.arg("scope")
+            )
+
+    @staticmethod
+    def _read_permissions(filename):
+        """Yield the permission changes listed in `filename` (or stdin).
+
+        The records are streamed one at a time, exiting at the first malformed
+        one. Yield (resource name, user class, user, scope) tuples.
+        """
+        try:
+            for i, record in enumerate(iter_json(filename), 1):
+                yield PermissionsCommand._parse_permission(i, record)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Couldn't read permissions: {e}")
+
+    @staticmethod
+    def _parse_permission(i, record):
+        """Return the permission change in `record` (number `i`) as a tuple."""
+        if not isinstance(record, dict):
+            sys.exit(f"Permission record {i} is not a JSON object.")
+        for field in ["resource_name", "user"]:
+            if not isinstance(record.get(field), str) or not record[field]:
+                sys.exit(f"Permission record {i} is missing the field '{field}'.")
+        if not isinstance(record.get("scope") or "", str):
+            sys.exit(f"The field 'scope' of permission record {i} must be a string.")
+        user_type = record.get("user_type", "user")
+        if user_type not in USER_CLASSES:
+            sys.exit(
+                f"The field 'user_type' of permission record {i} must be one "
+                f"of: {', '.join(USER_CLASSES)}."
+            )
+        return (
+            record["resource_name"],
+            USER_CLASSES[user_type],
+            record["user"],
+            record.get("scope"),
+        )
+
+    def update_permission(self, resource_name, user_class, user, scope):
+        """Grant or revoke `scope` on `resource_name` for `user`.
+
+        Whether to grant or revoke depends on the command being run.
+        """
+        fmt_args = [
+            f"'{scope}'" if scope else "every permission",
+            resource_name,
+            user_class.__name__.lower(),
+            user,
+        ]
+        if self.cmd("add"):
+            self.add_user(resource_name, user_class(user), scope)
+            self.print("Granted {} on '{}' to {} '{}'".format(*fmt_args))
+        else:
+            self.remove_user(resource_name, user_class(user), scope)
+            self.print("Revoked {} on '{}' from {} '{}'".format(*fmt_args))
 
     def list_my_permissions(self):
         """Print all permissions for the current user."""
@@ -2,6 +2,8 @@ import logging
 
 from okdata.sdk import SDK
 
+from okdata.cli.clients import api_base_url
+
 log = logging.getLogger()
 
 
@@ -9,9 +11,7 @@ class PubsClient(SDK):
     def __init__(self, config=None, auth=None, env=None):
         self.__name__ = "pubs"
         super().__init__(config, auth, env)
-        self.api_url = "https://api.data{}.oslo.systems/maskinporten".format(
-            "-dev" if self.config.config["env"] == "dev" else ""
-        )
+        self.api_url = f"{api_base_url(self.config)}/maskinporten"
 
     def create_maskinporten_client(
         self, team_id, provider, integration, scopes, org, env
@@ -116,9 +116,7 @@ class ProvidersClient(SDK):
     def __init__(self, config=None, auth=None, env=None):
         self.__name__ = "providers"
         super().__init__(config, auth, env)
-        self.api_url = "https://api.data{}.oslo.systems/maskinporten/providers".format(
-            "-dev" if self.config.config["env"] == "dev" else ""
-        )
+        self.api_url = f"{api_base_url(self.config)}/maskinporten/providers"
 
     def get_providers(self):
         log.info(f"Listing providers from: {self.api_url}")
@@ -130,9 +128,7 @@ class ScopesClient(SDK):
     def __init__(self, config=None, auth=None, env=None):
         self.__name__ = "scopes"
         super().__init__(config, auth, env)
-        self.api_url = "https://api.data{}.oslo.systems/maskinporten/scopes".format(
-            "-dev" if self.config.config["env"] == "dev" else ""
-        )
+        self.api_url = f"{api_base_url(self.config)}/maskinporten/scopes"
 
     def get_scopes(self):
         log.info(f"Listing scopes from: {self.api_url}")
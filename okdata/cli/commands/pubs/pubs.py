@@ -1,9 +1,12 @@
 import base64
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from functools import cached_property
 from operator import itemgetter
 
 from okdata.sdk.team.client import TeamClient
+from requests.exceptions import RequestException
 
 from okdata.cli import MAINTAINER
 from okdata.cli.command import BASE_COMMAND_OPTIONS, BaseCommand, confirm_to_continue
@@ -21,6 +24,9 @@ from okdata.cli.commands.pubs.wizards import (
 from okdata.cli.commands.teams.questions import NoTeamError
 from okdata.cli.output import create_output
 
+# Maximum number of clients to fetch keys for at the same time.
+KEY_LISTING_CONCURRENCY = 10
+
 
 class PubsCommand(BaseCommand):
     __doc__ = f"""Oslo :: Public services
@@ -48,10 +54,10 @@ Options:{BASE_COMMAND_OPTIONS}
 
     def __init__(self):
         super().__init__()
-        self.pubs_client = PubsClient(env=self.opt("env"))
-        self.team_client = TeamClient(env=self.opt("env"))
-        self.providers_client = ProvidersClient(env=self.opt("env"))
-        self.scopes_client = ScopesClient(env=self.opt("env"))
+        self.pubs_client = self.make_client(PubsClient)
+        self.team_client = self.make_client(TeamClient)
+        self.providers_client = self.make_client(ProvidersClient)
+        self.scopes_client = self.make_client(ScopesClient)
 
     @cached_property
     def _providers(self):
@@ -309,20 +315,71 @@ You may now go ahead and create a key for it by running:
         out.add_rows(sorted(keys, key=itemgetter("expires")))
         self.print(f"Keys for client {client_name} [{env}]:", out)
 
+    def _client_key_rows(self, client, env):
+        """Return rows for the key listing of `client`.
+
+        A failure to fetch the keys is reported as a single row with an error
+        message, instead of aborting the whole listing.
+        """
+        try:
+            keys = self.pubs_client.get_keys(env, client["id"])
+        except RequestException as e:
+            self.log.exception(f"Failed to fetch keys for client {client['id']}")
+            return [
+                {
+                    "client_name": client["name"],
+                    "kid": None,
+                    "expires": None,
+                    "error": str(e),
+                }
+            ]
+        return [{**key, "client_name": client["name"], "error": None} for key in keys]
+
+    @staticmethod
+    def _print_progress(done, total):
+        if sys.stderr.isatty():
+            end = "\n" if done == total else ""
+            print(
+                f"\rFetching keys for all clients: {done}/{total}",
+                end=end,
+                file=sys.stderr,
+                flush=True,
+            )
+
     def _list_client_keys_multiple(self, clients, env):
-        self.print("Fetching keys for all clients, this may take some time...")
-        keys = [
-            {**key, "client_name": client["name"]}
-            for client in clients
-            for key in self.pubs_client.get_keys(env, client["id"])
-        ]
         out = create_output(
             self.opt("format"),
             "pubs_multiple_client_keys_config.json",
         )
-        out.add_rows(sorted(keys, key=itemgetter("expires")))
+        # NDJSON rows are written as soon as they arrive; other formats need
+        # every row before anything can be printed.
+        streaming = self.opt("format") == "ndjson"
+        rows = []
+
+        with ThreadPoolExecutor(max_workers=KEY_LISTING_CONCURRENCY) as executor:
+            futures = [
+                executor.submit(self._client_key_rows, client, env)
+                for client in clients
+            ]
+            for done, future in enumerate(as_completed(futures), 1):
+                if streaming:
+                    out.add_rows(future.result())
+                else:
+                    rows += future.result()
+                self._print_progress(done, len(futures))
+
+        out.add_rows(
+            sorted(rows, key=lambda r: (r["error"] is not None, r["expires"] or ""))
+        )
         self.print(f"All client keys [{env}]:", out)
 
+        failed = sum(1 for r in rows if r["error"])
+        if failed:
+            self.print(
+                f"\nFailed to fetch keys for {failed} client(s), see the error "
+                "column above for details."
+            )
+
     def list_client_keys(self):
         try:
             choices = list_keys_wizard(self.pubs_client)
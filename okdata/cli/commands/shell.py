@@ -0,0 +1,173 @@
+import os
+import re
+import shlex
+import sys
+from functools import cache
+
+from prompt_toolkit import PromptSession
+from prompt_toolkit.completion import Completer, Completion
+from prompt_toolkit.history import FileHistory
+
+from okdata.cli.command import BaseCommand, BASE_COMMAND_OPTIONS
+from okdata.cli.io import user_cache_dir
+
+EXIT_COMMANDS = ("exit", "quit")
+
+
+def _dup_stdout():
+    """Return a duplicate of the stdout file descriptor, if it has one."""
+    try:
+        return os.dup(sys.stdout.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+@cache
+def _usage(command_name):
+    """Return the subcommands and options of the command `command_name`.
+
+    They're picked from the usage documentation of the command.
+    """
+    # Imported here to avoid a circular import.
+    from okdata.cli.__main__ import get_command_class
+
+    command = get_command_class(["okdata", command_name])
+    if not command:
+        return [], []
+
+    doc = command.__doc__
+    usage = doc[doc.index("Usage:") : doc.index("\n\n", doc.index("Usage:"))]
+    subcommands = []
+    for line in usage.splitlines()[1:]:
+        words = line.split()
+        if len(words) > 2 and re.fullmatch(r"[a-z][a-z-]*", words[2]):
+            subcommands.append(words[2])
+
+    options = re.findall(r"--[a-z][a-z-]*", doc)
+    return list(dict.fromkeys(subcommands)), list(dict.fromkeys(options))
+
+
+class ShellCompleter(Completer):
+    """Complete command names, subcommands, and options in the shell."""
+
+    def get_completions(self, document, complete_event):
+        words = document.text_before_cursor.split()
+        if not words or document.text_before_cursor[-1].isspace():
+            words.append("")
+        *previous, current = words
+
+        if previous[:1] == ["okdata"]:
+            previous = previous[1:]
+
+        if not previous:
+            # Imported here to avoid a circular import.
+            from okdata.cli.__main__ import COMMANDS
+
+            candidates = [*COMMANDS, "help", *EXIT_COMMANDS]
+        else:
+            subcommands, options = _usage(previous[0])
+            if current.startswith("-"):
+                candidates = options
+            elif len(previous) == 1:
+                candidates = subcommands
+            else:
+                candidates = []
+
+        for candidate in candidates:
+            if candidate.startswith(current) and candidate != "shell":
+                yield Completion(candidate, start_position=-len(current))
+
+
+class ShellCommand(BaseCommand):
+    __doc__ = f"""Oslo :: Shell
+
+Start an interactive shell for running several commands in a row. Commands
+run in the shell share one login and one set of connections to the API,
+making them a lot faster than running them one by one.
+
+Commands are written the same way as on the command line, with or without
+the leading `okdata`.
+
+Usage:
+  okdata shell [options]
+
+Examples:
+  okdata shell
+  okdata shell --env=dev
+
+Options:{BASE_COMMAND_OPTIONS}
+    """
+
+    def handler(self):
+        self.log.info("ShellCommand.handler()")
+        session = PromptSession(
+            history=FileHistory(os.path.join(user_cache_dir("shell"), "history")),
+            completer=ShellCompleter(),
+            complete_while_typing=False,
+        )
+        prompt = f"okdata [{self.sdk.config.config['env']}]> "
+
+        print(
+            "Type a command (e.g. `datasets ls`), `help` for a list of "
+            "commands, or `exit` to quit."
+        )
+
+        while True:
+            try:
+                line = session.prompt(prompt)
+            except KeyboardInterrupt:
+                continue
+            except EOFError:
+                break
+
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                print(f"Invalid command: {e}")
+                continue
+
+            if args[:1] == ["okdata"]:
+                args = args[1:]
+            if not args:
+                continue
+            if args[0] in EXIT_COMMANDS:
+                break
+            if args[0] == "help":
+                args = ["--help"]
+            if args[0] == "shell":
+                print("You're already in the shell.")
+                continue
+
+            self.run(args)
+
+    def run(self, args):
+        """Run the command given by `args` as if it was run from the terminal."""
+        # Imported here to avoid a circular import.
+        from okdata.cli.__main__ import COMMANDS, run
+
+        # Run commands in the environment the shell was started in, unless
+        # told otherwise.
+        if (
+            args[0] in COMMANDS
+            and self.opt("env")
+            and not any(a.startswith("--env") for a in args)
+        ):
+            args = [*args, f"--env={self.opt('env')}"]
+
+        argv = [sys.argv[0], *args]
+        # Commands parse their arguments from `sys.argv`.
+        saved_argv, sys.argv = sys.argv, argv
+        # A command whose output pipe breaks redirects stdout to /dev/null
+        # before exiting, which must not silence the rest of the session.
+        saved_stdout = _dup_stdout()
+        try:
+            run(argv)
+        except SystemExit as e:
+            # Commands exiting with an error message shouldn't end the shell.
+            if isinstance(e.code, str):
+                print(e.code, file=sys.stderr)
+        finally:
+            sys.argv = saved_argv
+            if saved_stdout is not None:
+                os.dup2(saved_stdout, sys.stdout.fileno())
+                os.close(saved_stdout)
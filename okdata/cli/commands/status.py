@@ -1,40 +1,85 @@
-from time import sleep
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
 
 from okdata.sdk.status import Status
+from requests.exceptions import RequestException
 
 from okdata.cli.command import BaseCommand, BASE_COMMAND_OPTIONS
-from okdata.cli.output import create_output
+from okdata.cli.io import read_lines
+from okdata.cli.output import TableOutput, create_output, load_config
+
+# Most pipelines finish within seconds, so start out polling often and back off
+# for the ones that take longer.
+POLL_INITIAL_DELAY = 1
+POLL_MAX_DELAY = 30
+POLL_BACKOFF_FACTOR = 1.5
+
+# Maximum number of traces to look up at once when given several trace IDs.
+STATUS_CONCURRENCY = 10
+
+
+def poll_delays(
+    initial=POLL_INITIAL_DELAY, maximum=POLL_MAX_DELAY, factor=POLL_BACKOFF_FACTOR
+):
+    """Yield the number of seconds to wait between each status poll.
+
+    The delays grow exponentially up to `maximum`. Each delay is randomized
+    (jittered) to keep many watchers from polling in lockstep.
+    """
+    delay = initial
+    while True:
+        yield random.uniform(delay / 2, delay)
+        delay = min(delay * factor, maximum)
 
 
 class StatusCommand(BaseCommand):
     __doc__ = f"""Oslo :: Status
 
 Usage:
-  okdata status <trace_id> [options]
+  okdata status - [options]
+  okdata status --file=<file> [options]
+  okdata status <trace_id>... [options]
 
 Examples:
   okdata status trace-id-from-system
   okdata status trace-id-from-system --watch
+  okdata status trace-id-from-system --watch --timeout=1800
   okdata status trace-id-from-system --history
   okdata status trace-id-from-system --format=json | jq ".done"
+  okdata status trace-id-1 trace-id-2 trace-id-3 --watch
+  okdata status --file=trace-ids.txt --watch
+  okdata status - --watch < trace-ids.txt
 
 Options:{BASE_COMMAND_OPTIONS}
+  --file=<file>             # Read trace IDs from <file>, one per line
   --history
-  --watch
+  --watch                   # Wait until processing has finished or failed
+  --timeout=<seconds>       # Stop watching after this many seconds [default: 600]
     """
 
     def __init__(self):
         super().__init__(Status)
 
-    def login(self):
-        self.sdk.login()
-
     def handler(self):
         self.log.info("StatusCommand.handler()")
-        if self.arg("trace_id"):
-            self.status_for_id(self.arg("trace_id"))
+        if self.cmd("-"):
+            trace_ids = read_lines()
+        elif self.opt("file"):
+            trace_ids = read_lines(self.opt("file"))
+        else:
+            trace_ids = self.arg("trace_id")
+
+        # Drop duplicates, keeping the order the trace IDs were given in.
+        trace_ids = list(dict.fromkeys(trace_ids))
+
+        if not trace_ids:
+            sys.exit("No trace IDs given.")
+        elif len(trace_ids) == 1:
+            self.status_for_id(trace_ids[0])
         else:
-            self.print("Invalid command")
+            self.status_for_ids(trace_ids)
 
     @staticmethod
     def find_latest_event(trace_events):
@@ -43,6 +88,23 @@ Options:{BASE_COMMAND_OPTIONS}
                 return trace_event
         return trace_events[-1]
 
+    @staticmethod
+    def is_finished(trace_events):
+        """Return true if the trace has reached a terminal state.
+
+        A trace is terminal when it's finished, or as soon as any of its
+        events has failed.
+        """
+        return any(
+            event["trace_status"] == "FINISHED"
+            or event["trace_event_status"] == "FAILED"
+            for event in trace_events
+        )
+
+    @staticmethod
+    def has_failed(trace_events):
+        return any(event["trace_event_status"] == "FAILED" for event in trace_events)
+
     @staticmethod
     def get_error_messages(trace_events):
         for event in trace_events:
@@ -55,7 +117,8 @@ Options:{BASE_COMMAND_OPTIONS}
             event["errors"] = error_messages
         return trace_events
 
-    def latest_event_for_status(self, trace_id, trace_events):
+    @staticmethod
+    def status_row(trace_id, trace_events):
         # Collect errors from all events
         errors = []
         for event in trace_events:
@@ -64,17 +127,18 @@ Options:{BASE_COMMAND_OPTIONS}
         latest_event = StatusCommand.find_latest_event(trace_events)
         trace_status = latest_event["trace_status"]
 
+        return {
+            "done": trace_status == "FINISHED",
+            "trace_id": trace_id,
+            "trace_status": trace_status,
+            "trace_event_status": latest_event["trace_event_status"],
+            "errors": errors,
+        }
+
+    def latest_event_for_status(self, trace_id, trace_events):
         out = create_output(self.opt("format"), "status_config.json")
         out.output_singular_object = True
-        out.add_row(
-            {
-                "done": trace_status == "FINISHED",
-                "trace_id": trace_id,
-                "trace_status": trace_status,
-                "trace_event_status": latest_event["trace_event_status"],
-                "errors": errors,
-            }
-        )
+        out.add_row(StatusCommand.status_row(trace_id, trace_events))
         self.print(f"Status for: {trace_id}", out)
 
     def full_history_for_status(self, trace_id, trace_events):
@@ -93,41 +157,218 @@ Options:{BASE_COMMAND_OPTIONS}
         trace_events = self.sdk.get_status(trace_id)
         return StatusCommand.get_error_messages(trace_events)
 
-    def wait_until_done(self, trace_id):
-        """Wait until status for `trace_id` is ready, then return the trace."""
-        trace_events = self.get_trace_events(trace_id)
-        trace_status = StatusCommand.find_latest_event(trace_events)["trace_status"]
-
-        if trace_status != "FINISHED":
-            print("Waiting for processing to finish", end="", flush=True)
-
-        attempts = 0
-        max_attempts = 100
-        while trace_status != "FINISHED" and attempts < max_attempts:
-            print(".", end="", flush=True)
-            sleep(2)
-            attempts += 1
-            trace_events = self.get_trace_events(trace_id)
-            trace_status = StatusCommand.find_latest_event(trace_events)["trace_status"]
-        print()
-
-        if attempts == max_attempts:
-            print(
-                "\nWe've waited for a good while now, and processing hasn't "
-                "yet finished.\nSomething else is most likely wrong, maybe a "
-                "pipeline hasn't been configured for the dataset?\n"
-            )
+    def _timeout(self):
+        try:
+            timeout = float(self.opt("timeout"))
+        except (TypeError, ValueError):
+            timeout = 0
+        if timeout <= 0:
+            sys.exit("The --timeout option must be a positive number.")
+        return timeout
+
+    def wait_until_done(self, trace_id, timeout):
+        """Wait until status for `trace_id` is ready, then return the trace.
+
+        Give up and return the latest trace after `timeout` seconds. Errors
+        looking up the trace are retried on the next poll, keeping the latest
+        trace successfully looked up.
+        """
+        deadline = monotonic() + timeout
+        trace_events, _ = self._lookup(trace_id)
+
+        if StatusCommand.is_finished(trace_events):
+            return trace_events
+
+        # Progress goes to stderr to keep stdout clean for structured output.
+        print("Waiting for processing to finish", end="", file=sys.stderr, flush=True)
+
+        for delay in poll_delays():
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                print(
+                    f"\n\nProcessing hasn't finished after {timeout:g} seconds.\n"
+                    "Something else might be wrong, maybe a pipeline hasn't been "
+                    "configured for the dataset? Otherwise try waiting longer "
+                    "using --timeout.\n",
+                    file=sys.stderr,
+                )
+                break
+
+            print(".", end="", file=sys.stderr, flush=True)
+            sleep(min(delay, remaining))
+            latest_events, error = self._lookup(trace_id)
+            if not error:
+                trace_events = latest_events
+
+            if StatusCommand.is_finished(trace_events):
+                print(file=sys.stderr)
+                break
 
         return trace_events
 
     def status_for_id(self, trace_id):
+        """Print the status of a single trace.
+
+        Exit with a non-zero exit code if processing failed, or if it didn't
+        finish in time when watching.
+        """
         trace_events = (
-            self.wait_until_done(trace_id)
+            self.wait_until_done(trace_id, self._timeout())
             if self.opt("watch")
             else self.get_trace_events(trace_id)
         )
 
+        if not trace_events:
+            sys.exit(f"Couldn't look up status for: {trace_id}")
+
         if self.opt("history"):
             self.full_history_for_status(trace_id, trace_events)
         else:
             self.latest_event_for_status(trace_id, trace_events)
+
+        if StatusCommand.has_failed(trace_events) or (
+            self.opt("watch") and not StatusCommand.is_finished(trace_events)
+        ):
+            sys.exit(1)
+
+    def _lookup(self, trace_id):
+        """Return the trace events for `trace_id` and any error looking it up."""
+        try:
+            return self.get_trace_events(trace_id), None
+        except RequestException as e:
+            self.log.info(f"Couldn't look up status for {trace_id}: {e}")
+            return [], f"Couldn't look up status: {e}"
+
+    def status_for_ids(self, trace_ids):
+        """Print the status of several traces at once.
+
+        The traces are looked up concurrently, and are watched until all of
+        them are done if `--watch` is given. Traces that can't be looked up
+        are tried again on the next poll. Exit with a non-zero exit code if
+        processing of any of the traces failed, or if any of them couldn't be
+        looked up or didn't finish in time.
+        """
+        traces = TraceSet(trace_ids)
+        timeout = self._timeout() if self.opt("watch") else None
+        live = LiveStatusTable() if timeout and sys.stderr.isatty() else None
+
+        with ThreadPoolExecutor(max_workers=STATUS_CONCURRENCY) as executor:
+            deadline = monotonic() + timeout if timeout else None
+            delays = poll_delays()
+
+            while True:
+                pending = traces.pending()
+                for trace_id, (trace_events, error) in zip(
+                    pending, executor.map(self._lookup, pending)
+                ):
+                    traces.update(trace_id, trace_events, error)
+
+                if live:
+                    live.update(traces)
+                if not timeout or not traces.pending():
+                    break
+
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    print(
+                        f"Processing hasn't finished after {timeout:g} seconds "
+                        f"for {len(traces.pending())} of the traces.",
+                        file=sys.stderr,
+                    )
+                    break
+                sleep(min(next(delays), remaining))
+
+        if live:
+            live.clear()
+
+        if self.opt("history"):
+            for trace_id in trace_ids:
+                if traces.events[trace_id]:
+                    self.full_history_for_status(trace_id, traces.events[trace_id])
+        else:
+            out = create_output(self.opt("format"), "status_config.json")
+            out.add_rows(traces.rows())
+            self.print(f"Status for {traces.summary()}:", out)
+
+        if traces.failed() or traces.errors or (timeout and traces.pending()):
+            sys.exit(1)
+
+
+class TraceSet:
+    """The latest known status of a set of traces."""
+
+    def __init__(self, trace_ids):
+        self.trace_ids = trace_ids
+        self.events = {trace_id: [] for trace_id in trace_ids}
+        self.errors = {}
+
+    def update(self, trace_id, trace_events, error=None):
+        """Update the status of `trace_id`.
+
+        A trace that couldn't be looked up (`error`) is still pending, keeping
+        the events it was last looked up with.
+        """
+        if error:
+            self.errors[trace_id] = error
+        else:
+            self.events[trace_id] = trace_events
+            self.errors.pop(trace_id, None)
+
+    def is_failed(self, trace_id):
+        return StatusCommand.has_failed(self.events[trace_id])
+
+    def is_done(self, trace_id):
+        return self.is_failed(trace_id) or StatusCommand.is_finished(
+            self.events[trace_id]
+        )
+
+    def pending(self):
+        return [t for t in self.trace_ids if not self.is_done(t)]
+
+    def failed(self):
+        return [t for t in self.trace_ids if self.is_failed(t)]
+
+    def row(self, trace_id):
+        if not self.events[trace_id]:
+            return {
+                "done": False,
+                "trace_id": trace_id,
+                "trace_status": "N/A",
+                "trace_event_status": "N/A",
+                "errors": [self.errors.get(trace_id, "No trace events found")],
+            }
+        return StatusCommand.status_row(trace_id, self.events[trace_id])
+
+    def rows(self):
+        return [self.row(trace_id) for trace_id in self.trace_ids]
+
+    def summary(self):
+        total = len(self.trace_ids)
+        pending = len(self.pending())
+        failed = len(self.failed())
+        return (
+            f"{total} traces ({total - pending - failed} finished, "
+            f"{failed} failed, {pending} in progress)"
+        )
+
+
+class LiveStatusTable:
+    """A status table on stderr that is redrawn in place on every update."""
+
+    def __init__(self):
+        self.lines = 0
+
+    def update(self, traces):
+        out = TableOutput(load_config("status_config.json"))
+        out.add_rows(traces.rows())
+        text = f"{out}\n{traces.summary()}"
+        self.clear()
+        print(text, file=sys.stderr, flush=True)
+        self.lines = text.count("\n") + 1
+
+    def clear(self):
+        if self.lines:
+            # Move the cursor to the start of the table and clear everything
+            # below it.
+            print(f"\x1b[{self.lines}F\x1b[J", end="", file=sys.stderr, flush=True)
+            self.lines = 0
@@ -41,7 +41,7 @@ Options:{BASE_COMMAND_OPTIONS}
 
     def __init__(self):
         super().__init__()
-        self.client = TeamClient(env=self.opt("env"))
+        self.client = self.make_client(TeamClient)
 
     def handler(self):
         if self.cmd("ls"):
@@ -20,6 +20,133 @@ def read_json(filename=None):
     return json.loads(sys.stdin.read())
 
 
+class _JsonStream:
+    """Reader of JSON values from a text stream, reading it in chunks."""
+
+    WHITESPACE = " \t\r\n"
+
+    def __init__(self, f, chunk_size=64 * 1024):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, grow=False):
+        """Read the next chunk of the input into the buffer.
+
+        With `grow`, the buffer is at least quadrupled, so that a large value
+        is only parsed a logarithmic number of times while it's being read.
+        """
+        size = max(self.chunk_size, 3 * (len(self.buf) - self.pos)) if grow else None
+        chunk = self.f.read(size or self.chunk_size)
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos : self.pos + 1]
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            found = repr(self.peek()) if self.peek() else "end of input"
+            raise ValueError(f"Expected '{char}' in JSON input, found {found}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill(grow=True)
+                continue
+            # A value ending right at the end of the buffer might continue in
+            # the next chunk (like a number split in two).
+            if end < len(self.buf) or self.eof:
+                self.pos = end
+                return value
+            self._fill(grow=True)
+
+
+def _iter_json_stream(f, chunk_size=64 * 1024):
+    stream = _JsonStream(f, chunk_size)
+
+    if stream.peek() != "[":
+        while stream.peek():
+            yield stream.value()
+        return
+
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.expect("]")
+    else:
+        while True:
+            yield stream.value()
+            if stream.peek() == ",":
+                stream.expect(",")
+            else:
+                stream.expect("]")
+                break
+
+    if stream.peek():
+        raise ValueError("Unexpected data after JSON array")
+
+
+def iter_json(filename=None):
+    """Yield JSON documents from a file named `filename` one at a time.
+
+    The input may be a JSON array, in which case its elements are yielded, or
+    one or more JSON documents (such as newline-delimited JSON). The input is
+    read in chunks, so large inputs are never loaded into memory at once.
+
+    If no filename is given, the data is read from stdin instead.
+    """
+    if filename:
+        log.info(f"Reading JSON documents from file: {filename}")
+        with open(os.path.expanduser(filename)) as f:
+            yield from _iter_json_stream(f)
+    else:
+        log.info("Reading JSON documents from stdin")
+        yield from _iter_json_stream(sys.stdin)
+
+
+def read_lines(filename=None):
+    """Return the non-blank lines of a file named `filename`, stripped.
+
+    If no filename is given, the lines are read from stdin instead.
+    """
+    if filename:
+        log.info(f"Reading lines from file: {filename}")
+        with open(os.path.expanduser(filename)) as f:
+            return [line.strip() for line in f if line.strip()]
+
+    log.info("Reading lines from stdin")
+    return [line.strip() for line in sys.stdin if line.strip()]
+
+
+def user_cache_dir(*parts):
+    """Return the path to a directory in the user's okdata cache.
+
+    The cache is located in `$XDG_CACHE_HOME/okdata`, falling back to
+    `~/.cache/okdata`. `parts` are joined onto the path, and any missing
+    directories are created readable by the current user only.
+    """
+    base = os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    path = os.path.join(base, "okdata", *parts)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+
 def resolve_output_filepath(target):
     path_components = target.split("/")
     if path_components[0] == ".":
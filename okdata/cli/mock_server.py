@@ -0,0 +1,1056 @@
+"""An in-memory stand-in for the Origo APIs.
+
+Implements the endpoints used by the SDK clients (`Dataset`, `Upload`,
+`Download`, `Status`, `PermissionClient`, and `TeamClient`), the pubs clients,
+and a Keycloak token endpoint, keeping all state in memory. It's meant for
+offline development, integration tests, and load tests, and does no access
+control whatsoever.
+
+Start it with `okdata-mock-server`, and point the CLI at it by setting
+`OKDATA_API_URL` to the URL it prints. Run `okdata-mock-server --help` for
+the available options.
+
+For tests, `MockServer` runs the server in a background thread:
+
+    with MockServer(MockApi(datasets=1000)) as server:
+        os.environ["OKDATA_API_URL"] = server.url
+        ...
+"""
+
+import argparse
+import base64
+import email.parser
+import email.policy
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DATASET_SCOPES = [
+    "okdata:dataset:admin",
+    "okdata:dataset:read",
+    "okdata:dataset:update",
+    "okdata:dataset:write",
+]
+
+SEEDED_EDITION = "2026-01-01T12:00:00+00:00"
+
+TOKEN_LIFETIME = 300
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _not_found(what):
+    return HTTPError(404, f"{what} not found")
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _slug(title):
+    return re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "dataset"
+
+
+def _token(user_type, identity):
+    return f"mock.{user_type}.{identity}"
+
+
+class Request:
+    """An incoming request, as seen by the handlers of `MockApi`."""
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def param(self, name, default=None):
+        return self.query.get(name, [default])[0]
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "Invalid JSON in request body")
+
+    def form(self):
+        """Return the fields of a form in the body, decoded or not."""
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {k: v[0] for k, v in parse_qs(self.body.decode()).items()}
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + self.body
+        )
+        return {
+            part.get_param("name", header="content-disposition"): part.get_payload(
+                decode=True
+            )
+            for part in message.iter_parts()
+        }
+
+    def principal(self):
+        """Return the user type and ID of the caller, from their token."""
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        parts = token.split(".", 2)
+        if len(parts) == 3 and parts[0] == "mock":
+            return parts[1], parts[2]
+        return "user", "anonymous"
+
+
+class MockApi:
+    """In-memory state and request handlers of the mock server.
+
+    The constructor seeds the state with synthetic data: `datasets` datasets,
+    each with one version and edition (the first dataset's edition having
+    `files` files of `file_size` bytes), `clients` Maskinporten clients with
+    `keys_per_client` keys each, and `teams` teams. Dataset descriptions are
+    `description_size` characters long.
+
+    Every response is delayed by `latency` seconds, and status traces finish
+    after being looked up `trace_polls` times.
+    """
+
+    def __init__(
+        self,
+        datasets=0,
+        description_size=200,
+        files=0,
+        file_size=1_000_000,
+        clients=0,
+        keys_per_client=2,
+        teams=0,
+        trace_polls=3,
+        latency=0.0,
+    ):
+        self.latency = latency
+        self.trace_polls = trace_polls
+
+        self._lock = threading.RLock()
+        self.datasets = {}
+        self.versions = {}
+        self.editions = {}
+        self.distributions = {}
+        self.files = {}
+        self.traces = {}
+        self.clients = {}
+        self.keys = {}
+        self.audit_log = {}
+        self.permissions = {}
+        self.teams = {}
+        self.members = {}
+        self._datasets_body = None
+
+        self.seed_datasets(datasets, description_size, files, file_size)
+        self.seed_clients(clients, keys_per_client)
+        self.seed_teams(teams)
+
+        self.routes = [
+            # Keycloak and the token service
+            (
+                "POST",
+                r"/auth/realms/([^/]+)/protocol/openid-connect/token",
+                self.keycloak_token,
+            ),
+            ("POST", r"/token-service/token", self.token_service_token),
+            # Metadata API
+            ("GET", r"/metadata/datasets", self.get_datasets),
+            ("POST", r"/metadata/datasets", self.create_dataset),
+            ("GET", r"/metadata/datasets/([^/]+)", self.get_dataset),
+            ("PUT", r"/metadata/datasets/([^/]+)", self.update_dataset),
+            ("PATCH", r"/metadata/datasets/([^/]+)", self.update_dataset),
+            ("GET", r"/metadata/datasets/([^/]+)/versions", self.get_versions),
+            ("POST", r"/metadata/datasets/([^/]+)/versions", self.create_version),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/latest",
+                self.get_latest_version,
+            ),
+            (
+                "PUT",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)",
+                self.update_version,
+            ),
+            (
+                "DELETE",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)",
+                self.delete_version,
+            ),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions",
+                self.get_editions,
+            ),
+            (
+                "POST",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions",
+                self.create_edition,
+            ),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/latest",
+                self.get_latest_edition,
+            ),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)",
+                self.get_edition,
+            ),
+            (
+                "PUT",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)",
+                self.update_edition,
+            ),
+            (
+                "DELETE",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)",
+                self.delete_edition,
+            ),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)"
+                r"/distributions",
+                self.get_distributions,
+            ),
+            (
+                "POST",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)"
+                r"/distributions",
+                self.create_distribution,
+            ),
+            (
+                "GET",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)"
+                r"/distributions/([^/]+)",
+                self.get_distribution,
+            ),
+            (
+                "PUT",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)"
+                r"/distributions/([^/]+)",
+                self.update_distribution,
+            ),
+            (
+                "DELETE",
+                r"/metadata/datasets/([^/]+)/versions/([^/]+)/editions/([^/]+)"
+                r"/distributions/([^/]+)",
+                self.delete_distribution,
+            ),
+            # Upload and download
+            ("POST", r"/data-uploader", self.create_signed_upload),
+            ("POST", r"/s3-upload", self.upload),
+            (
+                "GET",
+                r"/data-exporter/(?:public/)?([^/]+)/([^/]+)/([^/]+)",
+                self.get_files,
+            ),
+            ("GET", r"/s3-download/(.+)", self.download),
+            # Status API
+            ("GET", r"/status-api/status/([^/]+)", self.get_status),
+            ("POST", r"/status-api/status/([^/]+)", self.update_status),
+            # Pubs API
+            ("GET", r"/maskinporten/providers", self.get_providers),
+            ("GET", r"/maskinporten/scopes", self.get_scopes),
+            ("POST", r"/maskinporten/clients", self.create_client),
+            ("GET", r"/maskinporten/clients/([^/]+)", self.get_clients),
+            (
+                "POST",
+                r"/maskinporten/clients/([^/]+)/([^/]+)/delete",
+                self.delete_client,
+            ),
+            ("GET", r"/maskinporten/clients/([^/]+)/([^/]+)/keys", self.get_keys),
+            ("POST", r"/maskinporten/clients/([^/]+)/([^/]+)/keys", self.create_key),
+            (
+                "DELETE",
+                r"/maskinporten/clients/([^/]+)/([^/]+)/keys/([^/]+)",
+                self.delete_key,
+            ),
+            ("GET", r"/maskinporten/audit/([^/]+)/([^/]+)/log", self.get_audit_log),
+            # Permission API
+            ("GET", r"/okdata-permission-api/my_permissions", self.get_my_permissions),
+            (
+                "GET",
+                r"/okdata-permission-api/permissions/([^/]+)",
+                self.get_permissions,
+            ),
+            (
+                "PUT",
+                r"/okdata-permission-api/permissions/([^/]+)",
+                self.update_permission,
+            ),
+            # Team API
+            ("GET", r"/okdata-permission-api/teams", self.get_teams),
+            (
+                "GET",
+                r"/okdata-permission-api/teams/users/([^/]+)",
+                self.get_user,
+            ),
+            (
+                "GET",
+                r"/okdata-permission-api/teams/name/([^/]+)",
+                self.get_team_by_name,
+            ),
+            ("GET", r"/okdata-permission-api/teams/([^/]+)", self.get_team),
+            ("PATCH", r"/okdata-permission-api/teams/([^/]+)", self.update_team),
+            (
+                "GET",
+                r"/okdata-permission-api/teams/([^/]+)/members",
+                self.get_team_members,
+            ),
+            (
+                "PUT",
+                r"/okdata-permission-api/teams/([^/]+)/members",
+                self.update_team_members,
+            ),
+        ]
+        self.routes = [
+            (method, re.compile(pattern), handler)
+            for method, pattern, handler in self.routes
+        ]
+
+    # Seeding
+
+    def seed_datasets(self, count, description_size=200, files=0, file_size=0):
+        description = ("Synthetic dataset. " * description_size)[:description_size]
+        file_body = b"x" * file_size
+        with self._lock:
+            start = len(self.datasets)
+            for i in range(start, start + count):
+                dataset_id = f"dataset-{i}"
+                self.datasets[dataset_id] = {
+                    "Id": dataset_id,
+                    "Type": "Dataset",
+                    "title": f"Dataset number {i}",
+                    "description": description,
+                    "keywords": ["synthetic", f"group-{i % 100}"],
+                    "accessRights": "public",
+                    "objective": "Testing",
+                    "publisher": "Origo",
+                    "contactPoint": {"name": "Origo", "email": "origo@example.org"},
+                    "source": {"type": "file"},
+                    "parent_id": f"dataset-{i - 1}" if i % 10 else None,
+                }
+                self.versions[dataset_id] = {
+                    "1": {"Id": f"{dataset_id}/1", "version": "1"}
+                }
+                edition_id = f"{dataset_id}/1/{SEEDED_EDITION}"
+                self.editions[(dataset_id, "1")] = {
+                    SEEDED_EDITION: {
+                        "Id": edition_id,
+                        "edition": SEEDED_EDITION,
+                        "description": f"Edition of {dataset_id}",
+                    }
+                }
+                if i == 0:
+                    # Every file shares the same contents to save memory.
+                    self.files[edition_id] = {
+                        f"file-{n}.csv": file_body for n in range(files)
+                    }
+            self._datasets_body = None
+
+    def seed_clients(self, count, keys_per_client=2):
+        with self._lock:
+            start = len(self.clients)
+            for i in range(start, start + count):
+                client_id = f"client-{i}"
+                self.clients[client_id] = {
+                    "client_id": client_id,
+                    "client_name": f"mock-client-{i}",
+                    "scopes": ["okdata:example"],
+                    "created": "2026-01-01T12:00:00+00:00",
+                    "env": "test",
+                }
+                self.keys[client_id] = [
+                    {
+                        "kid": f"{client_id}-key-{n}",
+                        "expires": f"2027-01-{n % 28 + 1:02}T12:00:00+00:00",
+                    }
+                    for n in range(keys_per_client)
+                ]
+
+    def seed_teams(self, count):
+        with self._lock:
+            start = len(self.teams)
+            for i in range(start, start + count):
+                team_id = f"team-{i}"
+                self.teams[team_id] = {
+                    "id": team_id,
+                    "name": f"Team {i}",
+                    "attributes": {"email": [], "slack-url": []},
+                }
+                self.members[team_id] = [f"user-{i}", "janedoe"]
+
+    # Routing
+
+    def handle(self, request):
+        """Return the status, body, and headers of the response to `request`."""
+        if self.latency:
+            time.sleep(self.latency)
+
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if method == request.method and match:
+                break
+        else:
+            return 404, {"message": "Not found"}, {}
+
+        try:
+            result = handler(request, *map(unquote, match.groups()))
+        except HTTPError as e:
+            return e.status, {"message": str(e)}, {}
+
+        if isinstance(result, tuple):
+            return result
+        return 200, result, {}
+
+    # Authentication
+
+    def _tokens(self, user_type, identity):
+        token = _token(user_type, identity)
+        return {
+            "access_token": token,
+            "expires_in": TOKEN_LIFETIME,
+            "refresh_token": token,
+            "refresh_expires_in": TOKEN_LIFETIME * 6,
+            "token_type": "Bearer",
+        }
+
+    def keycloak_token(self, request, realm):
+        form = request.form()
+        if form.get("grant_type") == "refresh_token":
+            return self._tokens(*form["refresh_token"].split(".", 2)[1:])
+        client_id = form.get("client_id")
+        if not client_id:
+            raise HTTPError(401, "Missing client ID")
+        return self._tokens("client", client_id)
+
+    def token_service_token(self, request):
+        username = request.json().get("username")
+        if not username:
+            raise HTTPError(401, "Missing username")
+        return self._tokens("user", username)
+
+    # Metadata API
+
+    def _dataset(self, dataset_id):
+        if dataset_id not in self.datasets:
+            raise _not_found(f"Dataset {dataset_id}")
+        return self.datasets[dataset_id]
+
+    def _versions(self, dataset_id):
+        self._dataset(dataset_id)
+        return self.versions.setdefault(dataset_id, {})
+
+    def _editions(self, dataset_id, version):
+        if version not in self._versions(dataset_id):
+            raise _not_found(f"Version {dataset_id}/{version}")
+        return self.editions.setdefault((dataset_id, version), {})
+
+    def _distributions(self, dataset_id, version, edition):
+        if edition not in self._editions(dataset_id, version):
+            raise _not_found(f"Edition {dataset_id}/{version}/{edition}")
+        return self.distributions.setdefault((dataset_id, version, edition), {})
+
+    def get_datasets(self, request):
+        # Listing every dataset is by far the largest response; only encode it
+        # once for as long as the datasets stay the same.
+        with self._lock:
+            if self._datasets_body is None:
+                self._datasets_body = json.dumps(list(self.datasets.values()))
+            return self._datasets_body.encode()
+
+    def create_dataset(self, request):
+        data = request.json()
+        if not isinstance(data, dict) or not data.get("title"):
+            raise HTTPError(400, "A dataset must have a title")
+        with self._lock:
+            dataset_id = base_id = _slug(data["title"])
+            while dataset_id in self.datasets:
+                dataset_id = f"{base_id}-{uuid.uuid4().hex[:5]}"
+            dataset = {**data, "Id": dataset_id, "Type": "Dataset"}
+            self.datasets[dataset_id] = dataset
+            self._datasets_body = None
+            # The creator gets every permission on their new dataset.
+            user_type, identity = request.principal()
+            for scope in DATASET_SCOPES:
+                self._grant(f"okdata:dataset:{dataset_id}", scope, user_type, identity)
+        return dataset
+
+    def get_dataset(self, request, dataset_id):
+        with self._lock:
+            return self._dataset(dataset_id)
+
+    def update_dataset(self, request, dataset_id):
+        with self._lock:
+            dataset = self._dataset(dataset_id)
+            data = request.json()
+            if request.method == "PUT":
+                dataset = {**data, "Id": dataset_id, "Type": "Dataset"}
+            else:
+                dataset = {**dataset, **data, "Id": dataset_id}
+            self.datasets[dataset_id] = dataset
+            self._datasets_body = None
+        return dataset
+
+    def get_versions(self, request, dataset_id):
+        with self._lock:
+            return list(self._versions(dataset_id).values())
+
+    def create_version(self, request, dataset_id):
+        data = request.json()
+        version = str(data.get("version", ""))
+        with self._lock:
+            versions = self._versions(dataset_id)
+            if not version or version in versions:
+                raise HTTPError(409, f"Version '{version}' already exists")
+            versions[version] = {**data, "Id": f"{dataset_id}/{version}"}
+            return versions[version]
+
+    def get_latest_version(self, request, dataset_id):
+        with self._lock:
+            versions = self._versions(dataset_id)
+            if not versions:
+                raise _not_found(f"Versions of {dataset_id}")
+            return list(versions.values())[-1]
+
+    def update_version(self, request, dataset_id, version):
+        with self._lock:
+            versions = self._versions(dataset_id)
+            if version not in versions:
+                raise _not_found(f"Version {dataset_id}/{version}")
+            versions[version] = {
+                **request.json(),
+                "Id": f"{dataset_id}/{version}",
+                "version": version,
+            }
+            return versions[version]
+
+    def delete_version(self, request, dataset_id, version):
+        with self._lock:
+            if self._editions(dataset_id, version) and not request.param("cascade"):
+                raise HTTPError(409, "The version has editions")
+            del self.versions[dataset_id][version]
+            self.editions.pop((dataset_id, version), None)
+        return {}
+
+    def get_editions(self, request, dataset_id, version):
+        with self._lock:
+            return list(reversed(self._editions(dataset_id, version).values()))
+
+    def create_edition(self, request, dataset_id, version):
+        data = request.json()
+        edition = str(data.get("edition", ""))
+        with self._lock:
+            editions = self._editions(dataset_id, version)
+            if not edition or edition in editions:
+                raise HTTPError(409, f"Edition '{edition}' already exists")
+            editions[edition] = {**data, "Id": f"{dataset_id}/{version}/{edition}"}
+            return editions[edition]
+
+    def get_latest_edition(self, request, dataset_id, version):
+        with self._lock:
+            editions = self._editions(dataset_id, version)
+            if not editions:
+                raise _not_found(f"Editions of {dataset_id}/{version}")
+            return list(editions.values())[-1]
+
+    def get_edition(self, request, dataset_id, version, edition):
+        with self._lock:
+            editions = self._editions(dataset_id, version)
+            if edition not in editions:
+                raise _not_found(f"Edition {dataset_id}/{version}/{edition}")
+            return editions[edition]
+
+    def update_edition(self, request, dataset_id, version, edition):
+        with self._lock:
+            self.get_edition(request, dataset_id, version, edition)
+            self.editions[(dataset_id, version)][edition] = {
+                **request.json(),
+                "Id": f"{dataset_id}/{version}/{edition}",
+                "edition": edition,
+            }
+            return self.editions[(dataset_id, version)][edition]
+
+    def delete_edition(self, request, dataset_id, version, edition):
+        with self._lock:
+            self.get_edition(request, dataset_id, version, edition)
+            del self.editions[(dataset_id, version)][edition]
+            self.distributions.pop((dataset_id, version, edition), None)
+            self.files.pop(f"{dataset_id}/{version}/{edition}", None)
+        return {}
+
+    def get_distributions(self, request, dataset_id, version, edition):
+        with self._lock:
+            return list(self._distributions(dataset_id, version, edition).values())
+
+    def create_distribution(self, request, dataset_id, version, edition):
+        data = request.json()
+        distribution_id = str(uuid.uuid4())
+        with self._lock:
+            distributions = self._distributions(dataset_id, version, edition)
+            distributions[distribution_id] = {
+                **data,
+                "Id": f"{dataset_id}/{version}/{edition}/{distribution_id}",
+            }
+            return distributions[distribution_id]
+
+    def get_distribution(self, request, dataset_id, version, edition, dist):
+        with self._lock:
+            distributions = self._distributions(dataset_id, version, edition)
+            if dist not in distributions:
+                raise _not_found(f"Distribution {dist}")
+            return distributions[dist]
+
+    def update_distribution(self, request, dataset_id, version, edition, dist):
+        with self._lock:
+            self.get_distribution(request, dataset_id, version, edition, dist)
+            self.distributions[(dataset_id, version, edition)][dist] = {
+                **request.json(),
+                "Id": f"{dataset_id}/{version}/{edition}/{dist}",
+            }
+            return self.distributions[(dataset_id, version, edition)][dist]
+
+    def delete_distribution(self, request, dataset_id, version, edition, dist):
+        with self._lock:
+            self.get_distribution(request, dataset_id, version, edition, dist)
+            del self.distributions[(dataset_id, version, edition)][dist]
+        return {}
+
+    # Upload and download
+
+    def create_signed_upload(self, request):
+        data = request.json()
+        dataset_id, version, edition = data["editionId"].split("/", 2)
+        trace_id = str(uuid.uuid4())
+        with self._lock:
+            self._distributions(dataset_id, version, edition)
+            self.traces[trace_id] = {"polls": 0, "domain_id": f"{dataset_id}/{version}"}
+        return {
+            "url": "",
+            "fields": {
+                "key": f"{data['editionId']}/{data['filename']}",
+                "trace_id": trace_id,
+            },
+            "trace_id": trace_id,
+        }
+
+    def upload(self, request):
+        form = request.form()
+        edition_id, filename = form["key"].decode().rsplit("/", 1)
+        with self._lock:
+            self.files.setdefault(edition_id, {})[filename] = form["file"]
+        return 204, b"", {}
+
+    def get_files(self, request, dataset_id, version, edition):
+        base_url = f"http://{request.headers['Host']}/s3-download"
+        edition_id = f"{dataset_id}/{version}/{edition}"
+        with self._lock:
+            self._distributions(dataset_id, version, edition)
+            names = list(self.files.get(edition_id, {}))
+        return [
+            {"key": f"{edition_id}/{name}", "url": f"{base_url}/{edition_id}/{name}"}
+            for name in names
+        ]
+
+    def download(self, request, key):
+        edition_id, filename = key.rsplit("/", 1)
+        with self._lock:
+            body = self.files.get(edition_id, {}).get(filename)
+        if body is None:
+            raise _not_found(f"File {key}")
+
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "ETag": '"{}"'.format(hashlib.md5(body, usedforsecurity=False).hexdigest()),
+        }
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", request.headers.get("Range", ""))
+        if not match:
+            return 200, body, headers
+
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(body) - 1), len(body) - 1)
+        if start >= len(body):
+            return 416, b"", {"Content-Range": f"bytes */{len(body)}"}
+        return (
+            206,
+            body[start : end + 1],
+            {**headers, "Content-Range": f"bytes {start}-{end}/{len(body)}"},
+        )
+
+    # Status API
+
+    def get_status(self, request, trace_id):
+        """Return the events of a trace.
+
+        Traces finish after being looked up `trace_polls` times. Unknown trace
+        IDs are treated as traces that just started, so that any trace ID can
+        be watched.
+        """
+        with self._lock:
+            trace = self.traces.setdefault(trace_id, {"polls": 0, "domain_id": None})
+            trace["polls"] += 1
+            finished = trace["polls"] >= self.trace_polls
+            extra_events = trace.get("events", [])
+
+        event = {
+            "trace_id": trace_id,
+            "trace_event_id": f"{trace_id}-1",
+            "start_time": "2026-01-01T12:00:00+00:00",
+            "end_time": "2026-01-01T12:00:01+00:00",
+            "domain": "dataset",
+            "domain_id": trace["domain_id"],
+            "component": "data-uploader",
+            "operation": "upload",
+            "trace_status": "STARTED",
+            "trace_event_status": "OK",
+            "errors": [],
+        }
+        events = [event, *extra_events]
+        if finished:
+            events.append(
+                {
+                    **event,
+                    "trace_event_id": f"{trace_id}-2",
+                    "component": "pipeline",
+                    "trace_status": "FINISHED",
+                }
+            )
+        return events
+
+    def update_status(self, request, trace_id):
+        with self._lock:
+            trace = self.traces.setdefault(trace_id, {"polls": 0, "domain_id": None})
+            trace.setdefault("events", []).append(
+                {"trace_id": trace_id, "errors": [], **request.json()}
+            )
+        return {"trace_id": trace_id}
+
+    # Pubs API
+
+    def get_providers(self, request):
+        return [{"provider_id": "example", "name": "Example provider"}]
+
+    def get_scopes(self, request):
+        return [{"provider_id": "example", "scope": "okdata:example"}]
+
+    def create_client(self, request):
+        data = request.json()
+        client_id = str(uuid.uuid4())
+        client = {
+            "client_id": client_id,
+            "client_name": f"{data.get('team_id')}-{data.get('integration')}",
+            "scopes": data.get("scopes", []),
+            "created": _now(),
+            "env": data.get("env"),
+        }
+        with self._lock:
+            self.clients[client_id] = client
+            self.keys[client_id] = []
+        return client
+
+    def _client(self, client_id):
+        if client_id not in self.clients:
+            raise _not_found(f"Client {client_id}")
+        return self.clients[client_id]
+
+    def _log(self, client_id, action, request, **extra):
+        self.audit_log.setdefault(client_id, []).append(
+            {
+                "timestamp": _now(),
+                "action": action,
+                "user": request.principal()[1],
+                "scopes": self.clients[client_id]["scopes"],
+                **extra,
+            }
+        )
+
+    def get_clients(self, request, env):
+        with self._lock:
+            return list(self.clients.values())
+
+    def delete_client(self, request, env, client_id):
+        with self._lock:
+            self._client(client_id)
+            del self.clients[client_id]
+            self.keys.pop(client_id, None)
+        return {"client_id": client_id, "deleted_ssm_params": []}
+
+    def get_keys(self, request, env, client_id):
+        with self._lock:
+            self._client(client_id)
+            return self.keys[client_id]
+
+    def create_key(self, request, env, client_id):
+        key_id = str(uuid.uuid4())
+        expires = datetime.now(timezone.utc) + timedelta(days=365)
+        with self._lock:
+            self._client(client_id)
+            self.keys[client_id].append({"kid": key_id, "expires": expires.isoformat()})
+            self._log(client_id, "add_key", request, key_id=key_id)
+        return {
+            "kid": key_id,
+            "expires": expires.isoformat(),
+            "keystore": base64.b64encode(b"mock keystore").decode(),
+            "key_alias": "mock",
+            "key_password": "mock-password",
+        }
+
+    def delete_key(self, request, env, client_id, key_id):
+        with self._lock:
+            self._client(client_id)
+            self.keys[client_id] = [
+                k for k in self.keys[client_id] if k["kid"] != key_id
+            ]
+            self._log(client_id, "remove_key", request, key_id=key_id)
+        return 200, b"", {}
+
+    def get_audit_log(self, request, env, client_id):
+        with self._lock:
+            self._client(client_id)
+            return self.audit_log.get(client_id, [])
+
+    # Permission API
+
+    def _grant(self, resource_name, scope, user_type, user_id):
+        principals = self.permissions.setdefault(resource_name, {}).setdefault(
+            scope, {"users": [], "teams": [], "clients": []}
+        )
+        if user_id not in principals[f"{user_type}s"]:
+            principals[f"{user_type}s"].append(user_id)
+
+    def _revoke(self, resource_name, scope, user_type, user_id):
+        principals = self.permissions.get(resource_name, {}).get(scope)
+        if principals and user_id in principals[f"{user_type}s"]:
+            principals[f"{user_type}s"].remove(user_id)
+
+    def _resource_permissions(self, resource_name):
+        return [
+            {
+                "resource_name": resource_name,
+                "description": "",
+                "scope": scope,
+                **principals,
+            }
+            for scope, principals in self.permissions.get(resource_name, {}).items()
+        ]
+
+    def get_my_permissions(self, request):
+        user_type, identity = request.principal()
+        with self._lock:
+            teams = [t for t, members in self.members.items() if identity in members]
+            permissions = {}
+            for resource_name, scopes in self.permissions.items():
+                for scope, principals in scopes.items():
+                    if identity in principals[f"{user_type}s"] or any(
+                        t in principals["teams"] for t in teams
+                    ):
+                        permissions.setdefault(resource_name, {"scopes": []})
+                        permissions[resource_name]["scopes"].append(scope)
+        return permissions
+
+    def get_permissions(self, request, resource_name):
+        with self._lock:
+            return self._resource_permissions(resource_name)
+
+    def update_permission(self, request, resource_name):
+        data = request.json()
+        scopes = DATASET_SCOPES if data["scope"] == "__all__" else [data["scope"]]
+        with self._lock:
+            for scope in scopes:
+                for user in data.get("add_users", []):
+                    self._grant(
+                        resource_name, scope, user["user_type"], user["user_id"]
+                    )
+                for user in data.get("remove_users", []):
+                    self._revoke(
+                        resource_name, scope, user["user_type"], user["user_id"]
+                    )
+            return self._resource_permissions(resource_name)
+
+    # Team API
+
+    def _team(self, team_id, identity):
+        if team_id not in self.teams:
+            raise _not_found(f"Team {team_id}")
+        return {**self.teams[team_id], "is_member": identity in self.members[team_id]}
+
+    def get_teams(self, request):
+        identity = request.principal()[1]
+        with self._lock:
+            teams = [self._team(team_id, identity) for team_id in self.teams]
+        if request.param("include") != "all":
+            teams = [t for t in teams if t["is_member"]]
+        return teams
+
+    def get_team(self, request, team_id):
+        with self._lock:
+            return self._team(team_id, request.principal()[1])
+
+    def get_team_by_name(self, request, name):
+        with self._lock:
+            for team_id, team in self.teams.items():
+                if team["name"] == name:
+                    return self._team(team_id, request.principal()[1])
+        raise _not_found(f"Team {name}")
+
+    def update_team(self, request, team_id):
+        data = request.json()
+        with self._lock:
+            self._team(team_id, None)
+            team = self.teams[team_id]
+            if "name" in data:
+                team["name"] = data["name"]
+            team["attributes"] = {**team["attributes"], **data.get("attributes", {})}
+            return self._team(team_id, request.principal()[1])
+
+    def _user(self, username):
+        return {"username": username, "name": None, "email": f"{username}@example.org"}
+
+    def get_user(self, request, username):
+        return self._user(username)
+
+    def get_team_members(self, request, team_id):
+        with self._lock:
+            self._team(team_id, None)
+            return [self._user(m) for m in self.members[team_id]]
+
+    def update_team_members(self, request, team_id):
+        usernames = request.json()
+        with self._lock:
+            self._team(team_id, None)
+            self.members[team_id] = list(usernames)
+            return [self._user(m) for m in self.members[team_id]]
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections alive like the real APIs do.
+        protocol_version = "HTTP/1.1"
+
+        def handle_request(self):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            request = Request(
+                self.command,
+                url.path,
+                parse_qs(url.query),
+                self.headers,
+                self.rfile.read(length),
+            )
+            status, body, headers = api.handle(request)
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+
+            self.send_response(status)
+            if "Content-Type" not in headers:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_request
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class MockServer:
+    """Serve `api` over HTTP from a background thread."""
+
+    def __init__(self, api=None, host="127.0.0.1", port=0):
+        self.api = api or MockApi()
+        self.server = ThreadingHTTPServer((host, port), make_handler(self.api))
+        self.server.daemon_threads = True
+        host, port = self.server.server_address[:2]
+        self.url = f"http://{host}:{port}"
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080, help="0 picks a free port")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds to delay each response"
+    )
+    parser.add_argument("--datasets", type=int, default=100, help="datasets to seed")
+    parser.add_argument("--description-size", type=int, default=200)
+    parser.add_argument(
+        "--files", type=int, default=5, help="files in the first dataset's edition"
+    )
+    parser.add_argument("--file-size", type=int, default=1_000_000, help="bytes")
+    parser.add_argument("--clients", type=int, default=10, help="clients to seed")
+    parser.add_argument("--keys-per-client", type=int, default=2)
+    parser.add_argument("--teams", type=int, default=5, help="teams to seed")
+    parser.add_argument(
+        "--trace-polls",
+        type=int,
+        default=3,
+        help="status lookups before a trace is finished",
+    )
+    args = parser.parse_args()
+
+    api = MockApi(
+        datasets=args.datasets,
+        description_size=args.description_size,
+        files=args.files,
+        file_size=args.file_size,
+        clients=args.clients,
+        keys_per_client=args.keys_per_client,
+        teams=args.teams,
+        trace_polls=args.trace_polls,
+        latency=args.latency,
+    )
+    server = MockServer(api, args.host, args.port)
+    # The URL goes alone on stdout so that scripts can pick it up.
+    print(server.url, flush=True)
+    print(
+        "Point okdata at this server by running:\n\n"
+        f"  export OKDATA_API_URL={server.url}\n",
+        file=sys.stderr,
+        flush=True,
+    )
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import json
 import logging
 import os
 from datetime import datetime
+from functools import cache
 from textwrap import wrap, fill
 
 from prettytable import PrettyTable
@@ -15,6 +16,20 @@ def _get_script_path():
     return os.path.dirname(__file__)
 
 
+@cache
+def load_config(config_file):
+    """Return the parsed output format config in `config_file`.
+
+    Configs are only read from disk the first time they're asked for, and
+    are shared between outputs afterwards; don't modify them.
+    """
+    filename = f"{_get_script_path()}/data/output-format/{config_file}"
+    log.info(f"Loading output format config from: {filename}")
+
+    with open(filename) as f:
+        return json.load(f)
+
+
 def create_output(fmt, config_file):
     """Create and return an output printer.
 
@@ -22,91 +37,86 @@ def create_output(fmt, config_file):
     directory. Each command defines which fields from the API response should
     be printed, and what the human-readable name should be.
     """
-    datadir = f"{_get_script_path()}/data/output-format"
-    filename = f"{datadir}/{config_file}"
-    log.info(f"Creating output format: {fmt}, from: {filename}")
+    log.info(f"Creating output format: {fmt}, from: {config_file}")
 
-    with open(filename) as f:
-        config = json.load(f)
+    output_class = {
+        "json": JsonOutput,
+        "ndjson": NdjsonOutput,
+        "csv": CSVOutput,
+    }.get(fmt, TableOutput)
 
-    return {
-        "json": JsonOutput(config),
-        "csv": CSVOutput(config),
-    }.get(fmt, TableOutput(config))
+    return output_class(load_config(config_file))
 
 
 class TableOutput(PrettyTable):
+    """Output printing rows as a human-readable table.
+
+    How to format each column is decided once from the output format config,
+    so that adding a row only has to format its values.
+    """
+
     def __init__(self, config):
         self.config = config
         self.output_singular_object = False
-        column_headers = []
-        for key in self.config:
-            name = self.config[key]["name"]
-            column_headers.append(name)
-        super().__init__(column_headers)
-
-    def field_values(self, row, row_key, key):
-        values = []
-        for field in self.config[key]["fields"]:
-            if field in row[row_key]:
-                values.append(str(row[row_key][field]))
-        return "\n".join(values)
-
-    def get_row_value(self, row, key):
-        row_key = self.config[key]["key"]
-        if row_key in row:
-            if "fields" in self.config[key]:
-                return self.field_values(row, row_key, key)
-            if row[row_key] is not None:
-                return row[row_key]
-        return "N/A"
+        self.formatters = [_column_formatter(column) for column in config.values()]
+        super().__init__([column["name"] for column in config.values()])
+        self.align = "l"
 
     def add_row(self, row):
-        row_data = []
-        for key in self.config:
-            value = self.get_row_value(row, key)
-            max_width = self.config[key].get("wrap")
-            value = TableOutput.format_cell_value(value, max_width)
-            row_data.append(value)
-        super().add_row(row_data)
-        self.align_rows()
+        super().add_row([format_value(row) for format_value in self.formatters])
 
     def add_rows(self, rows):
         for row in rows:
             self.add_row(row)
-        self.align_rows()
 
-    def align_rows(self):
-        for key in self.config:
-            name = self.config[key]["name"]
-            self.align[name] = "l"
-
-    @staticmethod
-    def format_cell_value(value, max_width):
-        try:
-            dt = datetime.fromisoformat(value)
-            if dt.tzinfo:
-                return dt.astimezone().isoformat(timespec="seconds")
-        except (TypeError, ValueError):
-            pass
-
-        if isinstance(value, list) and len(value) == 1:
-            value = str(value[0])
-
-        if isinstance(value, list):
-            value = [str(v) for v in value]
-            if max_width:
-                value = [
-                    "\n  ".join(wrap(v, width=max_width)) if len(v) > max_width else v
-                    for v in value
-                ]
-            value = ["- " + v for v in value]
-            value = "  \n".join(value)
-        elif isinstance(value, bool):
-            value = "Yes" if value else "No"
-        elif max_width and len(value) > max_width:
-            value = fill(value, width=max_width)
+
+def _column_formatter(column):
+    """Return a function formatting the value of `column` in a table row."""
+    row_key = column["key"]
+    fields = column.get("fields")
+    max_width = column.get("wrap")
+    is_datetime = column.get("type") == "datetime"
+
+    def format_value(row):
+        value = row.get(row_key)
+        if value is None:
+            return "N/A"
+        if fields:
+            value = "\n".join(str(value[f]) for f in fields if f in value)
+        elif is_datetime:
+            value = _format_datetime(value)
+        return _format_cell_value(value, max_width)
+
+    return format_value
+
+
+def _format_datetime(value):
+    """Return `value` in local time if it's a timezone-aware timestamp."""
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
         return value
+    return dt.astimezone().isoformat(timespec="seconds") if dt.tzinfo else value
+
+
+def _format_cell_value(value, max_width):
+    if isinstance(value, list) and len(value) == 1:
+        value = str(value[0])
+
+    if isinstance(value, list):
+        value = [str(v) for v in value]
+        if max_width:
+            value = [
+                "\n  ".join(wrap(v, width=max_width)) if len(v) > max_width else v
+                for v in value
+            ]
+        value = ["- " + v for v in value]
+        value = "  \n".join(value)
+    elif isinstance(value, bool):
+        value = "Yes" if value else "No"
+    elif max_width and len(value) > max_width:
+        value = fill(value, width=max_width)
+    return value
 
 
 class StructuredDataOutput:
@@ -133,13 +143,16 @@ class StructuredDataOutput:
                 value = row[row_key]
         return value
 
-    def add_row(self, row):
+    def format_row(self, row):
         row_data = {}
         for key in self.config:
             value = self.get_row_value(row, key)
             row_key = self.config[key]["key"]
             row_data[row_key] = value
-        self.out.append(row_data)
+        return row_data
+
+    def add_row(self, row):
+        self.out.append(self.format_row(row))
 
     def add_rows(self, rows):
         for row in rows:
@@ -182,3 +195,19 @@ class JsonOutput(StructuredDataOutput):
         if len(self.out) == 1 and self.output_singular_object is True:
             return json.dumps(self.out[0])
         return json.dumps(self.out)
+
+
+class NdjsonOutput(StructuredDataOutput):
+    """Output writing rows as newline-delimited JSON.
+
+    Rows are written to stdout as soon as they are added instead of being
+    collected until the output is printed, so output starts right away and
+    memory use doesn't grow with the number of rows. This makes the output
+    suitable for piping to tools like `jq` and `head`.
+    """
+
+    def add_row(self, row):
+        print(json.dumps(self.format_row(row)), flush=True)
+
+    def __str__(self):
+        return ""
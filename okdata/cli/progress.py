@@ -0,0 +1,289 @@
+"""Progress reporting for file transfers.
+
+Transfers register every file they're about to transfer with a
+`TransferProgress`, and update the returned `FileProgress` as bytes are
+transferred. While the transfer is running (inside a `with` block), the
+progress is reported on stderr in the background, keeping stdout clean for
+the output of the command.
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+PENDING = "pending"
+ACTIVE = "active"
+
+
+def create_progress(fmt):
+    """Return a progress reporter suited for the output format `fmt`.
+
+    Structured output formats get progress events as NDJSON, while a
+    live-updating display is used when stderr is a terminal. Otherwise
+    progress isn't reported.
+    """
+    if fmt in ("json", "ndjson"):
+        return EventProgress()
+    if fmt in (None, "table") and sys.stderr.isatty():
+        return LiveProgress()
+    return TransferProgress()
+
+
+def _megabytes(size):
+    return f"{size / 1e6:.1f}"
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02}m"
+    if minutes:
+        return f"{minutes}m{seconds:02}s"
+    return f"{seconds}s"
+
+
+class FileProgress:
+    """The progress of transferring a single file."""
+
+    def __init__(self, name, size=None, owner=None):
+        self.name = name
+        self.size = size
+        self.done = 0
+        # The byte the transfer (re)started at, e.g. when resuming a download.
+        self.start_offset = 0
+        self.status = PENDING
+        self.started = None
+        self.owner = owner
+
+    def start(self, size=None, done=0):
+        """Mark the transfer as started (or restarted) at byte `done`.
+
+        `size` is the total size of the file, if known.
+        """
+        self.size = size if size is not None else self.size
+        self.done = done
+        self.start_offset = done
+        self.started = time.monotonic()
+        self.status = ACTIVE
+        self._notify()
+
+    def update(self, transferred):
+        """Add `transferred` bytes to the progress."""
+        self.done += transferred
+
+    def finish(self, status):
+        """Mark the transfer as finished with the final `status`."""
+        self.status = status
+        self._notify()
+
+    def transferred(self):
+        """Return the number of bytes transferred since the transfer started."""
+        return self.done - self.start_offset
+
+    def throughput(self):
+        """Return the transfer rate so far in MB/s, or None if unknown.
+
+        Bytes already there when the transfer was resumed don't count.
+        """
+        elapsed = time.monotonic() - self.started if self.started else 0
+        return self.transferred() / elapsed / 1e6 if elapsed > 0 else None
+
+    def eta(self):
+        """Return the estimated seconds left of the transfer, if known."""
+        throughput = self.throughput()
+        if self.size is None or not throughput:
+            return None
+        return max(self.size - self.done, 0) / throughput / 1e6
+
+    def as_dict(self):
+        throughput = self.throughput()
+        eta = self.eta()
+        return {
+            "file": self.name,
+            "status": self.status,
+            "bytes": self.done,
+            "size": self.size,
+            "throughput": round(throughput, 2) if throughput is not None else None,
+            "eta": round(eta) if eta is not None else None,
+        }
+
+    def _notify(self):
+        if self.owner:
+            self.owner.changed(self)
+
+
+class TransferProgress:
+    """Keeps track of file transfers without reporting anything.
+
+    Subclasses report the progress every `interval` seconds in `report`, and
+    whenever a file is started or finished in `changed`.
+    """
+
+    interval = None
+
+    def __init__(self):
+        self.files = []
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.interval:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            self.close()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                self.report()
+
+    def file(self, name, size=None):
+        """Register a file to be transferred and return its progress."""
+        progress = FileProgress(name, size, self)
+        with self._lock:
+            self.files.append(progress)
+        return progress
+
+    def changed(self, file):
+        pass
+
+    def report(self):
+        pass
+
+    def close(self):
+        pass
+
+    def totals(self):
+        """Return a dictionary summarizing the progress of every file."""
+        done = sum(file.done for file in self.files)
+        sizes = [file.size for file in self.files]
+        size = sum(sizes) if None not in sizes else None
+        elapsed = time.monotonic() - self.started
+        transferred = sum(file.transferred() for file in self.files)
+        throughput = transferred / elapsed / 1e6 if elapsed > 0 else None
+        eta = (
+            max(size - done, 0) / throughput / 1e6
+            if size is not None and throughput
+            else None
+        )
+        return {
+            "files": len(self.files),
+            "finished": sum(
+                file.status not in (PENDING, ACTIVE) for file in self.files
+            ),
+            "bytes": done,
+            "size": size,
+            "throughput": round(throughput, 2) if throughput is not None else None,
+            "eta": round(eta) if eta is not None else None,
+        }
+
+
+class LiveProgress(TransferProgress):
+    """Progress shown on a terminal, redrawn in place.
+
+    Shows a line for every file being transferred, followed by a summary of
+    the whole transfer.
+    """
+
+    interval = 0.5
+
+    def __init__(self):
+        super().__init__()
+        self.lines = 0
+
+    def report(self):
+        lines = [self._file_line(file) for file in self.files if file.status == ACTIVE]
+        lines.append(self._summary_line())
+        self._clear()
+        print("\n".join(lines), file=sys.stderr, flush=True)
+        self.lines = len(lines)
+
+    def close(self):
+        self._clear()
+
+    def _clear(self):
+        if self.lines:
+            print(f"\x1b[{self.lines}F\x1b[J", end="", file=sys.stderr, flush=True)
+            self.lines = 0
+
+    @staticmethod
+    def _file_line(file):
+        parts = [f"  {file.name}", f"{_megabytes(file.done)}"]
+        if file.size:
+            parts[-1] += f"/{_megabytes(file.size)} MB"
+            parts.append(f"{100 * file.done // file.size}%")
+        else:
+            parts[-1] += " MB"
+        if file.size is not None and file.done >= file.size:
+            # Everything is sent, waiting for the other end to finish up.
+            parts.append("finishing")
+        elif (throughput := file.throughput()) is not None:
+            parts.append(f"{throughput:.1f} MB/s")
+            if (eta := file.eta()) is not None:
+                parts.append(f"ETA {_duration(eta)}")
+        return "  ".join(parts)
+
+    def _summary_line(self):
+        totals = self.totals()
+        line = (
+            f"{totals['finished']}/{totals['files']} files, "
+            f"{_megabytes(totals['bytes'])}"
+        )
+        if totals["size"] is not None:
+            line += f"/{_megabytes(totals['size'])}"
+        line += " MB"
+        if totals["throughput"] is not None:
+            line += f", {totals['throughput']:.1f} MB/s"
+        if totals["eta"] is not None:
+            line += f", ETA {_duration(totals['eta'])}"
+        return line
+
+
+class EventProgress(TransferProgress):
+    """Progress reported as NDJSON events, for tools watching transfers.
+
+    A `file` event is written whenever a file is started or finished, and a
+    `progress` event for every active file followed by a `total` event is
+    written periodically while the transfer is running.
+    """
+
+    interval = 5
+
+    def changed(self, file):
+        with self._lock:
+            self._emit("file", file.as_dict())
+
+    def report(self):
+        for file in self.files:
+            if file.status == ACTIVE:
+                self._emit("progress", file.as_dict())
+        self._emit("total", self.totals())
+
+    def close(self):
+        self._emit("total", self.totals())
+
+    @staticmethod
+    def _emit(event, data):
+        print(
+            json.dumps(
+                {
+                    "event": event,
+                    "time": datetime.now(timezone.utc).isoformat(),
+                    **data,
+                }
+            ),
+            file=sys.stderr,
+            flush=True,
+        )
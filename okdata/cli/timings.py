@@ -0,0 +1,170 @@
+"""Timing of the phases of a command run, and the HTTP requests it makes.
+
+Enabled with the `--timings` option, helping to tell whether a slow command
+spends its time starting up, logging in, waiting for the API, or rendering
+output.
+"""
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# As close to the start of the process as we can get, given that this module
+# is imported first by `okdata.cli.__main__`.
+PROCESS_START = time.perf_counter()
+
+_lock = threading.Lock()
+_timings = None
+# The phases currently being timed in each thread, innermost last, along with
+# the time spent in the phases nested within them.
+_active = threading.local()
+
+
+class Timings:
+    """Durations of the phases of a command run and the requests it made."""
+
+    def __init__(self, started):
+        self.started = started
+        # Phase name -> total number of seconds spent in it, in the order the
+        # phases were first entered.
+        self.phases = {}
+        self.requests = []
+
+    def record(self, name, seconds):
+        with _lock:
+            self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def record_request(self, method, url, status, seconds, size):
+        with _lock:
+            self.requests.append(
+                {
+                    "method": method,
+                    "url": url,
+                    "status": status,
+                    "seconds": seconds,
+                    "size": size,
+                }
+            )
+
+
+def start(started=None):
+    """Start collecting timings for a command run that started at `started`.
+
+    `started` is a `time.perf_counter()` value, defaulting to now.
+    """
+    global _timings
+    _timings = Timings(time.perf_counter() if started is None else started)
+
+
+def stop():
+    """Stop collecting timings, returning the ones collected."""
+    global _timings
+    timings, _timings = _timings, None
+    return timings
+
+
+def enabled():
+    return _timings is not None
+
+
+def elapsed():
+    """Return the number of seconds since the timed run started."""
+    return time.perf_counter() - _timings.started
+
+
+def record(name, seconds):
+    """Add `seconds` to the phase `name`, if timings are being collected."""
+    if _timings:
+        _timings.record(name, seconds)
+
+
+@contextmanager
+def phase(name):
+    """Time the code in the `with` block as (part of) the phase `name`.
+
+    Time spent in phases nested within the block is only counted for the
+    innermost phase, so that every second is counted once.
+    """
+    if not _timings:
+        yield
+        return
+    stack = _active.__dict__.setdefault("stack", [])
+    frame = {"nested": 0}
+    stack.append(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        stack.pop()
+        record(name, seconds - frame["nested"])
+        if stack:
+            stack[-1]["nested"] += seconds
+
+
+def record_response(response, *args, **kwargs):
+    """Record the timing of `response`.
+
+    Meant to be used as a `requests` response hook. The latency is the time
+    until the response headers arrived, and the size is taken from the
+    `Content-Length` header since the body may not have been read yet.
+    """
+    if not _timings:
+        return
+    size = response.headers.get("Content-Length")
+    # Presigned URLs carry credentials in the query string; leave it out.
+    url = urlsplit(response.request.url)._replace(query="", fragment="").geturl()
+    _timings.record_request(
+        response.request.method,
+        url,
+        response.status_code,
+        response.elapsed.total_seconds(),
+        int(size) if size and size.isdigit() else None,
+    )
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.0f} ms"
+
+
+def _size(size):
+    if size is None:
+        return "-"
+    for unit in ["B", "kB", "MB"]:
+        if size < 1000:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} GB"
+
+
+def report(timings, file=None):
+    """Print a breakdown of `timings` to `file` (stderr by default)."""
+    file = file or sys.stderr
+    total = time.perf_counter() - timings.started
+    width = max(len(name) for name in [*timings.phases, "total"])
+
+    print("\nTimings:", file=file)
+    for name, seconds in timings.phases.items():
+        print(f"  {name:<{width}}  {_ms(seconds):>10}", file=file)
+    print(f"  {'total':<{width}}  {_ms(total):>10}", file=file)
+
+    if timings.requests:
+        request_time = sum(r["seconds"] for r in timings.requests)
+        print(
+            f"\nHTTP requests ({len(timings.requests)}, {_ms(request_time)} in "
+            "total):",
+            file=file,
+        )
+        for r in timings.requests:
+            print(
+                "  {:<6} {} {:>10} {:>10}  {}".format(
+                    r["method"],
+                    r["status"],
+                    _ms(r["seconds"]),
+                    _size(r["size"]),
+                    r["url"],
+                ),
+                file=file,
+            )
@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+
+from okdata.cli.io import user_cache_dir
+
+log = logging.getLogger()
+
+# Access tokens expiring sooner than this are refreshed right away instead of
+# being reused, so that they don't run out in the middle of a command.
+MIN_TOKEN_LIFETIME = timedelta(seconds=60)
+
+_TOKEN_FIELDS = ["_access_token", "_refresh_token"]
+_TIMESTAMP_FIELDS = ["_expires_at", "_refresh_expires_at"]
+
+
+def enabled():
+    """Return true unless the token cache is disabled by the user."""
+    return os.getenv("OKDATA_TOKEN_CACHE", "").lower() not in (
+        "0",
+        "false",
+        "no",
+        "off",
+    )
+
+
+def cache_key(auth):
+    """Return a key identifying the environment and user behind `auth`.
+
+    Return None if `auth` has no credentials to identify a user by.
+    """
+    provider = auth.token_provider
+    if not provider:
+        return None
+
+    identity = getattr(provider, "client_id", None) or getattr(
+        provider, "username", None
+    )
+    if not identity:
+        return None
+
+    parts = [provider.config.config["env"], provider.__class__.__name__, identity]
+    # Keep tokens for other deployments of the APIs (see `OKDATA_API_URL`)
+    # apart from the real ones.
+    if api_url := provider.config.config.get("apiUrl"):
+        parts.append(api_url)
+    key = ":".join(parts)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _optional(default):
+    """Make the decorated cache operation return `default` if it fails.
+
+    The token cache only saves logins, so a cache directory that can't be
+    created or written to (like in a read-only home directory) shouldn't stop
+    commands from working.
+    """
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                return f(*args, **kwargs)
+            except OSError as e:
+                log.debug(f"Not using the token cache: {e}")
+                return default
+
+        return wrapper
+
+    return decorator
+
+
+def _cache_file(auth):
+    key = cache_key(auth)
+    if key is None or not enabled():
+        return None
+    return os.path.join(user_cache_dir("tokens"), f"{key}.json")
+
+
+def _set_expiry(auth, tokens):
+    now = datetime.now(timezone.utc)
+    if expires_in := tokens.get("expires_in"):
+        auth._expires_at = now + timedelta(seconds=expires_in)
+    if refresh_expires_in := tokens.get("refresh_expires_in"):
+        auth._refresh_expires_at = now + timedelta(seconds=refresh_expires_in)
+    if refresh_token := tokens.get("refresh_token"):
+        auth._refresh_token = refresh_token
+
+
+def track_token_expiry(auth):
+    """Keep the expiry times of `auth` up to date when its tokens are refreshed.
+
+    `Authenticate` only sets them when logging in from scratch, so after a
+    refresh it would still consider the new access token expired and refresh
+    it again before every request.
+    """
+    provider = auth.token_provider
+    if not provider or getattr(provider, "_tracks_token_expiry", False):
+        return
+
+    refresh_token = provider.refresh_token
+
+    def refresh_and_track_expiry(token):
+        tokens = refresh_token(token)
+        if tokens:
+            _set_expiry(auth, tokens)
+        return tokens
+
+    provider.refresh_token = refresh_and_track_expiry
+    provider._tracks_token_expiry = True
+
+
+def restore_tokens(auth):
+    """Load previously cached tokens for `auth` into it.
+
+    Return true if any tokens were restored.
+    """
+    track_token_expiry(auth)
+    return _restore_tokens(auth)
+
+
+@_optional(default=False)
+def _restore_tokens(auth):
+    filename = _cache_file(auth)
+    if not filename or not os.path.exists(filename):
+        return False
+
+    if os.stat(filename).st_mode & 0o077:
+        log.warning(
+            f"Ignoring token cache {filename} since it's accessible by other "
+            "users than you"
+        )
+        return False
+
+    try:
+        with open(filename) as f:
+            cached = json.load(f)
+        if not isinstance(cached, dict):
+            raise ValueError("not a JSON object")
+        tokens = {field: cached.get(field) for field in _TOKEN_FIELDS}
+        timestamps = {
+            field: datetime.fromisoformat(cached[field]) if cached.get(field) else None
+            for field in _TIMESTAMP_FIELDS
+        }
+    except (OSError, ValueError, TypeError) as e:
+        log.debug(f"Ignoring unreadable token cache {filename}: {e}")
+        return False
+
+    expires_at = timestamps["_expires_at"]
+    if expires_at and expires_at - datetime.now(timezone.utc) < MIN_TOKEN_LIFETIME:
+        log.info("Cached access token is about to expire, will refresh it")
+        tokens["_access_token"] = None
+
+    # `Authenticate` keeps its tokens in private attributes; it exposes no
+    # public way of seeding it with existing tokens.
+    for field, value in {**tokens, **timestamps}.items():
+        setattr(auth, field, value)
+
+    log.info(f"Restored cached tokens from {filename}")
+    return True
+
+
+@_optional(default=None)
+def store_tokens(auth):
+    """Write the current tokens of `auth` to the token cache."""
+    filename = _cache_file(auth)
+    if not filename or not auth._access_token:
+        return
+
+    data = {field: getattr(auth, field) for field in _TOKEN_FIELDS}
+    for field in _TIMESTAMP_FIELDS:
+        timestamp = getattr(auth, field)
+        data[field] = timestamp.isoformat() if timestamp else None
+
+    # Write to a temporary file first and move it into place, so that
+    # concurrent invocations never see a half-written cache file.
+    tmp_filename = f"{filename}.{os.getpid()}.tmp"
+    fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_filename, filename)
+    except OSError:
+        os.remove(tmp_filename)
+        raise
+    log.info(f"Stored tokens in {filename}")
+
+
+@_optional(default=None)
+def clear_tokens(auth):
+    """Remove any cached tokens for `auth`."""
+    filename = _cache_file(auth)
+    if filename and os.path.exists(filename):
+        os.remove(filename)
+        log.info(f"Removed token cache {filename}")
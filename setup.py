@@ -28,13 +28,24 @@ setuptools.setup(
         "PrettyTable",
         # TODO: Upgrade to questionary 2.x.
         "questionary>=1.10.0,<2.0.0",
-        # Not a direct dependency, but a dependency for questionary. However
+        # Used by `okdata shell`, and a dependency for questionary. However
         # questionary breaks with prompt-toolkit 3.0.52 (and possibly later
         # versions as well), so let's pin it sub 3.0.52 for now.
         "prompt-toolkit<3.0.52",
         "requests",
+        # For streaming uploads.
+        "requests-toolbelt",
     ],
-    entry_points={"console_scripts": ["okdata=okdata.cli.__main__:main"]},
+    extras_require={
+        # For `okdata datasets apply` with YAML manifests.
+        "yaml": ["PyYAML"],
+    },
+    entry_points={
+        "console_scripts": [
+            "okdata=okdata.cli.__main__:main",
+            "okdata-mock-server=okdata.cli.mock_server:main",
+        ]
+    },
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Programming Language :: Python :: 3.10",
@@ -1,4 +1,6 @@
 import json
+import pstats
+import subprocess
 import sys
 
 import pytest
@@ -26,6 +28,50 @@ def test_get_command_class():
     cmd = get_command_class(["okdata", "datasets", "create", "--file=foo"])
     assert cmd is DatasetsCommand
 
+    assert get_command_class(["okdata", "nonexistent"]) is False
+
+
+def test_get_command_class_imports_only_selected_command():
+    code = (
+        "import sys\n"
+        "from okdata.cli.__main__ import get_command_class\n"
+        "get_command_class(['okdata', 'datasets'])\n"
+        "print(sorted({m.split('.')[0] for m in sys.modules} & {'questionary'}"
+        " | {m.split('.')[3] for m in sys.modules"
+        " if m.startswith('okdata.cli.commands.')}))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout.strip() == str(["datasets"])
+
+
+@pytest.mark.parametrize("option", ["-h", "--help", "-e", "-v", "--version"])
+def test_cheap_options_dont_load_sdk(option):
+    code = (
+        "import sys\n"
+        "from okdata.cli.__main__ import main\n"
+        f"sys.argv = ['okdata', '{option}']\n"
+        "main()\n"
+        "print('okdata.sdk' in sys.modules, file=sys.stderr)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, check=True, text=True
+    )
+    assert result.stdout
+    assert result.stderr.strip() == "False"
+
+
+def test_main_environment(monkeypatch, capsys):
+    monkeypatch.setenv("OKDATA_ENVIRONMENT", "dev")
+    monkeypatch.setattr(sys, "argv", ["okdata", "-e"])
+    main()
+    assert capsys.readouterr().out == "dev\n"
+
+    monkeypatch.setenv("OKDATA_ENVIRONMENT", "nonexistent")
+    main()
+    assert capsys.readouterr().out == "prod\n"
+
 
 def test_main_http_error(raise_http_error, capsys):
     sys.argv = ["okdata", "datasets", "create", "--file=foo"]
@@ -43,6 +89,23 @@ def test_main_auth_error(auth_failed, capsys):
     assert "An error occurred (ApiAuthenticateError)" in captured
 
 
+def test_main_timings(raise_http_error, capsys):
+    sys.argv = ["okdata", "datasets", "create", "--file=foo", "--timings"]
+    main()
+    err = capsys.readouterr().err
+    for phase in ["startup", "login", "command", "total"]:
+        assert f"\n  {phase} " in err
+
+
+def test_main_profile(raise_http_error, tmp_path, capsys):
+    profile = tmp_path / "okdata.prof"
+    sys.argv = ["okdata", "datasets", "create", "--file=foo", "--profile", str(profile)]
+    main()
+    assert f"Profile written to {profile}" in capsys.readouterr().err
+    stats = pstats.Stats(str(profile))
+    assert any(func[2] == "handle" for func in stats.stats)
+
+
 @pytest.fixture()
 def raise_http_error(monkeypatch):
     def bad_request(self):
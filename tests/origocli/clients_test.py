@@ -0,0 +1,37 @@
+from okdata.sdk.data.dataset import Dataset
+from okdata.sdk.data.upload import Upload
+from okdata.sdk.status import Status
+
+from okdata.cli.clients import POOL_MAXSIZE, get_client, session
+
+
+def test_clients_share_config_and_auth():
+    dataset = get_client(Dataset, "dev")
+    upload = get_client(Upload, "dev")
+
+    assert dataset.config is upload.config
+    assert dataset.auth is upload.auth
+
+
+def test_clients_for_different_environments():
+    dev = get_client(Status, "dev")
+    prod = get_client(Status, "prod")
+
+    assert dev.config is not prod.config
+    assert dev.auth is not prod.auth
+
+
+def test_clients_share_sessions():
+    dataset = get_client(Dataset, "dev")
+    upload = get_client(Upload, "dev")
+
+    assert dataset.prepared_request_with_retries(3) is session(3)
+    assert upload.prepared_request_with_retries(retries=3) is session(3)
+    assert session(0) is not session(3)
+
+
+def test_session_retries_and_pool_size():
+    adapter = session(3).get_adapter("https://example.org")
+
+    assert adapter.max_retries.status == 3
+    assert adapter._pool_maxsize == POOL_MAXSIZE
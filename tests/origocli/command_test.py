@@ -1,9 +1,12 @@
 import io
 
 import pytest
+from docopt import docopt as docopt_
 
 from conftest import set_argv
 from okdata.cli.command import BaseCommand, _format_error_message
+from okdata.cli.commands.permissions import PermissionsCommand
+from okdata.cli.commands.teams.teams import TeamsCommand
 from okdata.cli.output import TableOutput
 
 
@@ -33,6 +36,45 @@ def test_cmd_with_handler():
     assert cmd.handle() is True
 
 
+def test_cmd_parses_arguments_once(mocker):
+    set_argv("datasets", "--debug", "--format", "yaml")
+    docopt = mocker.patch("okdata.cli.command.docopt", wraps=docopt_)
+    cmd = BaseCommand()
+    cmd.handler = lambda: True
+    cmd.handle()
+    docopt.assert_called_once()
+
+
+def test_sdk_created_on_first_use(mocker):
+    set_argv("datasets")
+    get_client = mocker.patch("okdata.cli.clients.get_client")
+    sdk_class = mocker.Mock()
+
+    cmd = BaseCommand(sdk_class)
+    get_client.assert_not_called()
+
+    assert cmd.sdk is get_client.return_value
+    assert cmd.sdk is get_client.return_value
+    get_client.assert_called_once_with(sdk_class, None)
+
+
+@pytest.mark.parametrize(
+    "command, argv",
+    [
+        (PermissionsCommand, ["permissions", "ls"]),
+        (TeamsCommand, ["teams", "ls"]),
+    ],
+)
+def test_make_client_not_shadowed(mocker, command, argv):
+    # These commands keep the client they use in a `client` attribute.
+    get_client = mocker.patch("okdata.cli.clients.get_client")
+    set_argv(*argv)
+    cmd = command()
+    client_class = mocker.Mock()
+    assert cmd.make_client(client_class) is get_client.return_value
+    get_client.assert_called_with(client_class, None)
+
+
 def test_cmd_with_sub_command():
     set_argv("datasets", "--debug", "--format", "yaml")
     cmd = BaseCommand()
@@ -0,0 +1,98 @@
+import io
+
+import pytest
+
+from okdata.cli.commands.datasets.copy import EditionCopy
+from okdata.cli.commands.datasets.upload import _SizedStream
+from okdata.cli.progress import TransferProgress
+
+CONTENT = b"hello, world\n" * 1000
+SOURCE = ("foo", "1", "20260101T120000")
+TARGET = ("bar", "1", "20260102T120000")
+FILE = {"key": f"{'/'.join(SOURCE)}/file.csv", "url": "https://s3/file.csv"}
+
+
+class FakeResponse:
+    def __init__(self, body, headers):
+        self.raw = io.BytesIO(body)
+        self.headers = headers
+
+    def raise_for_status(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeUpload:
+    def __init__(self, accept=True):
+        self.accept = accept
+        self.uploads = {}
+
+    def upload_stream(self, stream, filename, size, *edition, retries=0, progress=None):
+        self.uploads[filename] = _SizedStream(stream, size, progress).read()
+        return {"result": self.accept, "trace_id": "trace-1"}
+
+
+def edition_copy(mocker, headers, upload, progress=None):
+    download = mocker.Mock()
+    download.prepared_request_with_retries.return_value.get.return_value = FakeResponse(
+        CONTENT, headers
+    )
+    return EditionCopy(download, upload, progress=progress)
+
+
+def test_sized_stream():
+    stream = _SizedStream(io.BytesIO(CONTENT), 10)
+    assert stream.len == 10
+    assert stream.read(4) == CONTENT[:4]
+    assert stream.len == 6
+    assert stream.read() == CONTENT[4:10]
+    assert stream.len == 0
+    assert stream.read() == b""
+
+
+def test_sized_stream_truncated():
+    stream = _SizedStream(io.BytesIO(b"abc"), 10)
+    stream.read()
+    with pytest.raises(IOError):
+        stream.read()
+
+
+def test_copy(mocker):
+    upload = FakeUpload()
+    copy = edition_copy(mocker, {"Content-Length": str(len(CONTENT))}, upload)
+    [row] = copy.copy(SOURCE, [FILE], TARGET)
+    assert row["status"] == "copied"
+    assert row["source"] == "ds:foo/1/20260101T120000/file.csv"
+    assert row["target"] == "ds:bar/1/20260102T120000/file.csv"
+    assert row["size"] == len(CONTENT)
+    assert row["trace_id"] == "trace-1"
+    assert upload.uploads["file.csv"] == CONTENT
+
+
+def test_copy_unknown_size(mocker):
+    upload = FakeUpload()
+    [row] = edition_copy(mocker, {}, upload).copy(SOURCE, [FILE], TARGET)
+    assert row["status"] == "failed"
+    assert row["error"]
+    assert not upload.uploads
+
+
+def test_copy_rejected(mocker):
+    upload = FakeUpload(accept=False)
+    copy = edition_copy(mocker, {"Content-Length": str(len(CONTENT))}, upload)
+    [row] = copy.copy(SOURCE, [FILE], TARGET)
+    assert row["status"] == "failed"
+    assert row["error"] == "The upload was rejected"
+
+
+def test_copy_progress(mocker):
+    progress = TransferProgress()
+    headers = {"Content-Length": str(len(CONTENT))}
+    edition_copy(mocker, headers, FakeUpload(), progress).copy(SOURCE, [FILE], TARGET)
+    [file] = progress.files
+    assert (file.name, file.done, file.status) == ("file.csv", len(CONTENT), "copied")
@@ -1,7 +1,11 @@
+import io
+import os
+import sqlite3
 from datetime import datetime
 
 import pytest
 from okdata.sdk.data.dataset import Dataset
+from requests.exceptions import HTTPError
 
 from conftest import set_argv
 from okdata.cli.commands.datasets import DatasetsCommand
@@ -51,6 +55,8 @@ def create_cmd(mocker, *args):
     mocker.patch.object(cmd, "sdk")
     mocker.patch.object(cmd, "log")
 
+    cmd.sdk.config.config = {"env": "dev"}
+    cmd.sdk.auth.token_provider = None
     cmd.sdk.get_datasets.return_value = [dataset, dataset]
     cmd.sdk.get_dataset.return_value = dataset
     cmd.sdk.get_latest_version.return_value = version
@@ -74,13 +80,75 @@ class TestDatasetsLs:
         assert output_with_argument(output, [dataset, dataset])
         mock_print.assert_called_once()
 
+    def test_datasets_cached(self, mock_print, mocker, output):
+        create_cmd(mocker, "ls").handler()
+        cmd = create_cmd(mocker, "ls", "--filter=AUTORISASJON")
+        cmd.handler()
+        cmd.sdk.get_datasets.assert_not_called()
+        assert output_with_argument(output, [dataset, dataset])
+
+    def test_datasets_refresh(self, mock_print, mocker, output):
+        create_cmd(mocker, "ls").handler()
+        cmd = create_cmd(mocker, "ls", "--refresh")
+        cmd.sdk.get_datasets.return_value = []
+        cmd.handler()
+        cmd.sdk.get_datasets.assert_called_once()
+        assert output_with_argument(output, [])
+
+    def test_datasets_invalid_filter(self, mock_print, mocker):
+        cmd = create_cmd(mocker, "ls", "--filter=(")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+
+    def test_search(self, mock_print, mocker, output):
+        cmd = create_cmd(mocker, "search", "autorisasjon", "test")
+        cmd.handler()
+        assert output_with_argument(output, [dataset, dataset])
+
+        cmd = create_cmd(mocker, "search", "nothing")
+        cmd.handler()
+        assert output_with_argument(output, [])
+
+    @pytest.mark.parametrize(
+        "error", [OSError("Read-only file system"), sqlite3.OperationalError("fts5")]
+    )
+    def test_without_index(self, mock_print, mocker, output, tmp_path, error):
+        mocker.patch(f"{DatasetsCommand.__module__}.DatasetIndex", side_effect=error)
+        cmd = create_cmd(mocker, "ls", "--filter=autorisasjon")
+        cmd.handler()
+        cmd.sdk.get_datasets.assert_called_once_with(filter="autorisasjon")
+        assert output_with_argument(output, [dataset, dataset])
+
+        cmd = create_cmd(mocker, "search", "autorisasjon", "test")
+        cmd.handler()
+        assert output_with_argument(output, [dataset, dataset])
+
+        dataset_file = tmp_path / "dataset.json"
+        dataset_file.write_text('{"title": "New dataset"}')
+        cmd = create_cmd(mocker, "create", f"--file={dataset_file}")
+        cmd.sdk.create_dataset.return_value = dataset
+        cmd.handler()
+        cmd.sdk.create_dataset.assert_called_once()
+
+    def test_create_invalidates_index(self, mock_print, mocker, tmp_path):
+        create_cmd(mocker, "ls").handler()
+        dataset_file = tmp_path / "dataset.json"
+        dataset_file.write_text('{"title": "New dataset"}')
+        cmd = create_cmd(mocker, "create", f"--file={dataset_file}")
+        cmd.sdk.create_dataset.return_value = dataset
+        cmd.handler()
+
+        cmd = create_cmd(mocker, "ls")
+        cmd.handler()
+        cmd.sdk.get_datasets.assert_called_once()
+
     def test_dataset(self, mock_print, mocker, output):
         cmd = create_cmd(mocker, "ls", dataset["Id"])
         cmd.handler()
 
         assert output_with_argument(output, [dataset])
         mock_print.assert_called()
-        assert cmd.sdk.get_dataset.called
+        cmd.sdk.get_dataset.assert_called_once_with(dataset["Id"])
         assert cmd.sdk.get_versions.called
         assert cmd.sdk.get_latest_version.called
         assert not cmd.log.exception.called
@@ -107,6 +175,7 @@ class TestDatasetsLs:
         )
         cmd.handler()
         assert output_with_argument(output, [edition])
+        assert output_with_argument(output, cmd.sdk.get_distributions.return_value)
 
     def test_invalid_uri(self, mocker, output):
         cmd = create_cmd(mocker, "ls", "a/b/c/d/e")
@@ -114,38 +183,395 @@ class TestDatasetsLs:
             cmd.handler()
 
 
+class TestDatasetsCreateDistribution:
+    def test_create_distributions(self, mocker, mock_print, tmp_path):
+        payloads = tmp_path / "distributions.ndjson"
+        payloads.write_text(
+            '{"filenames": ["a.csv"]}\n{"filenames": ["b.csv"]}\n',
+        )
+        cmd = create_cmd(
+            mocker, "create-distribution", dataset["Id"], f"--file={payloads}"
+        )
+        cmd.handler()
+        cmd.sdk.auto_create_edition.assert_called_once()
+        assert [c.args[3] for c in cmd.sdk.create_distribution.call_args_list] == [
+            {"filenames": ["a.csv"]},
+            {"filenames": ["b.csv"]},
+        ]
+
+    @pytest.mark.parametrize("content", [None, "", '{"filenames": '])
+    def test_create_distributions_bad_input(self, mocker, tmp_path, content):
+        payloads = tmp_path / "distributions.ndjson"
+        if content is not None:
+            payloads.write_text(content)
+        cmd = create_cmd(
+            mocker, "create-distribution", dataset["Id"], f"--file={payloads}"
+        )
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert not cmd.sdk.auto_create_edition.called
+        assert not cmd.sdk.create_distribution.called
+
+
+class TestDatasetsApply:
+    def test_apply(self, mocker, mock_print, tmp_path):
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text(
+            '[{"kind": "dataset", "id": "autorisasjon-test-jd", "title": "Test"}]'
+        )
+        cmd = create_cmd(mocker, "apply", str(manifest))
+        add_row = mocker.spy(TableOutput, "add_row")
+        cmd.handler()
+        cmd.sdk.create_dataset.assert_not_called()
+        assert add_row.call_args.args[1]["status"] == "exists"
+
+    def test_apply_failure(self, mocker, mock_print, tmp_path):
+        manifest = tmp_path / "manifest.json"
+        manifest.write_text('[{"kind": "version", "dataset": "foo", "version": "2"}]')
+        cmd = create_cmd(mocker, "apply", str(manifest))
+        cmd.sdk.create_version.side_effect = HTTPError("500 Server Error")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+
+    def test_apply_invalid_manifest(self, mocker, tmp_path):
+        cmd = create_cmd(mocker, "apply", str(tmp_path / "missing.json"))
+        with pytest.raises(SystemExit):
+            cmd.handler()
+
+
 class TestDatasetsCp:
     def test_copy_local_files(self, mocker):
         cmd = create_cmd(mocker, "cp", "foo", "bar")
-        mocker.patch.object(cmd, "upload_file")
+        mocker.patch.object(cmd, "upload_files")
         mocker.patch.object(cmd, "download_files")
         cmd.handler()
-        assert not cmd.upload_file.called
+        assert not cmd.upload_files.called
         assert not cmd.download_files.called
 
     def test_copy_upload(self, mocker):
         cmd = create_cmd(mocker, "cp", "foo", "ds:bar")
-        mocker.patch.object(cmd, "upload_file")
+        mocker.patch.object(cmd, "upload_files")
         mocker.patch.object(cmd, "download_files")
         cmd.handler()
-        cmd.upload_file.assert_called_once_with("foo", "bar")
+        cmd.upload_files.assert_called_once_with(["foo"], "bar")
         assert not cmd.download_files.called
 
     def test_copy_download(self, mocker):
         cmd = create_cmd(mocker, "cp", "ds:foo", "bar")
-        mocker.patch.object(cmd, "upload_file")
+        mocker.patch.object(cmd, "upload_files")
         mocker.patch.object(cmd, "download_files")
         cmd.handler()
-        assert not cmd.upload_file.called
+        assert not cmd.upload_files.called
         cmd.download_files.assert_called_once_with("foo", "bar")
 
+    def test_copy_upload_stdin(self, mocker):
+        cmd = create_cmd(mocker, "cp", "-", "ds:bar", "--filename=foo.csv")
+        mocker.patch.object(cmd, "upload_files")
+        mocker.patch.object(cmd, "upload_stdin")
+        cmd.handler()
+        assert not cmd.upload_files.called
+        cmd.upload_stdin.assert_called_once_with("bar")
+
+    def test_copy_upload_stdin_with_files(self, mocker):
+        cmd = create_cmd(mocker, "cp", "-", "foo", "ds:bar")
+        mocker.patch.object(cmd, "upload_stdin")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert not cmd.upload_stdin.called
+
+    def test_copy_download_stdout(self, mocker):
+        cmd = create_cmd(mocker, "cp", "ds:foo", "-")
+        mocker.patch.object(cmd, "download_files")
+        mocker.patch.object(cmd, "stream_files")
+        cmd.handler()
+        assert not cmd.download_files.called
+        cmd.stream_files.assert_called_once_with("foo")
+
+    def test_copy_upload_multiple(self, mocker):
+        cmd = create_cmd(mocker, "cp", "foo", "bar", "ds:baz")
+        mocker.patch.object(cmd, "upload_files")
+        cmd.handler()
+        cmd.upload_files.assert_called_once_with(["foo", "bar"], "baz")
+
+    def test_copy_download_multiple(self, mocker):
+        cmd = create_cmd(mocker, "cp", "ds:foo", "ds:bar", "baz")
+        mocker.patch.object(cmd, "download_files")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert not cmd.download_files.called
+
     def test_copy_between_datasets(self, mocker):
         cmd = create_cmd(mocker, "cp", "ds:foo", "ds:bar")
-        mocker.patch.object(cmd, "upload_file")
+        mocker.patch.object(cmd, "upload_files")
         mocker.patch.object(cmd, "download_files")
+        mocker.patch.object(cmd, "copy_between_datasets")
         cmd.handler()
-        assert not cmd.upload_file.called
+        assert not cmd.upload_files.called
         assert not cmd.download_files.called
+        cmd.copy_between_datasets.assert_called_once_with("foo", "bar")
+
+    def test_copy_between_several_datasets(self, mocker):
+        cmd = create_cmd(mocker, "cp", "ds:foo", "ds:bar", "ds:baz")
+        mocker.patch.object(cmd, "copy_between_datasets")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert not cmd.copy_between_datasets.called
+
+
+@pytest.fixture()
+def upload_dir(tmp_path):
+    path = tmp_path / "upload"
+    (path / "sub").mkdir(parents=True)
+    for name in ["a.csv", "b.parquet", "sub/c.csv", "sub/d.parquet"]:
+        (path / name).write_text(name)
+    return path
+
+
+class TestDatasetsUpload:
+    def test_resolve_upload_sources(self, upload_dir):
+        resolve = DatasetsCommand._resolve_upload_sources
+        assert resolve([str(upload_dir / "a.csv")]) == [str(upload_dir / "a.csv")]
+        assert resolve([str(upload_dir / "**" / "*.parquet")]) == [
+            str(upload_dir / "b.parquet"),
+            str(upload_dir / "sub" / "d.parquet"),
+        ]
+        assert resolve([str(upload_dir / "sub"), str(upload_dir / "sub/c.csv")]) == [
+            str(upload_dir / "sub" / "c.csv"),
+            str(upload_dir / "sub" / "d.parquet"),
+        ]
+
+    def test_resolve_upload_sources_literal_brackets(self, upload_dir):
+        (upload_dir / "report[1].csv").write_text("report")
+        (upload_dir / "report1.csv").write_text("report")
+        resolve = DatasetsCommand._resolve_upload_sources
+        assert resolve([str(upload_dir / "report[1].csv")]) == [
+            str(upload_dir / "report[1].csv")
+        ]
+        assert resolve([str(upload_dir / "report[0-9].csv")]) == [
+            str(upload_dir / "report1.csv")
+        ]
+
+    def test_resolve_upload_sources_missing(self, upload_dir):
+        with pytest.raises(SystemExit):
+            DatasetsCommand._resolve_upload_sources([str(upload_dir / "nope.csv")])
+
+    def test_resolve_upload_sources_duplicate_names(self, upload_dir):
+        (upload_dir / "sub" / "a.csv").write_text("a.csv")
+        with pytest.raises(SystemExit):
+            DatasetsCommand._resolve_upload_sources([str(upload_dir)])
+
+    def test_upload_files(self, mocker, mock_print, upload_dir):
+        cmd = create_cmd(mocker, "cp", str(upload_dir), "ds:foo", "--parallel=2")
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload.side_effect = lambda f, *args, **kwargs: {
+            "result": True,
+            "trace_id": f"trace-{os.path.basename(f)}",
+        }
+        add_rows = mocker.spy(TableOutput, "add_rows")
+
+        cmd.handler()
+
+        cmd.sdk.get_dataset.assert_called_once()
+        cmd.sdk.auto_create_edition.assert_called_once()
+        assert upload.return_value.upload.call_count == 4
+        upload.return_value.upload.assert_any_call(
+            str(upload_dir / "a.csv"),
+            "foo",
+            version["version"],
+            "new-edition",
+            3,
+            progress=mocker.ANY,
+        )
+        rows = add_rows.call_args.args[1]
+        assert [row["file"] for row in rows] == [
+            str(upload_dir / name)
+            for name in ["a.csv", "b.parquet", "sub/c.csv", "sub/d.parquet"]
+        ]
+        assert all(row["uploaded"] for row in rows)
+        assert rows[0]["trace_id"] == "trace-a.csv"
+
+    def test_upload_files_failure(self, mocker, mock_print, upload_dir):
+        cmd = create_cmd(mocker, "cp", str(upload_dir / "a.csv"), "ds:foo")
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload.side_effect = ConnectionError("Oops")
+
+        with pytest.raises(SystemExit):
+            cmd.handler()
+
+    def test_upload_files_skip_unchanged(self, mocker, mock_print, upload_dir):
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload.return_value = {"result": True, "trace_id": "t"}
+        add_rows = mocker.spy(TableOutput, "add_rows")
+
+        def cp():
+            cmd = create_cmd(
+                mocker, "cp", str(upload_dir), "ds:foo", "--skip-unchanged"
+            )
+            cmd.handler()
+            return cmd, {
+                os.path.basename(row["file"]): row["status"]
+                for row in add_rows.call_args.args[1]
+            }
+
+        cmd, statuses = cp()
+        assert set(statuses.values()) == {"uploaded"}
+        assert upload.return_value.upload.call_count == 4
+
+        # Nothing has changed; no edition should be created.
+        upload.reset_mock()
+        cmd, statuses = cp()
+        assert set(statuses.values()) == {"skipped"}
+        assert not upload.return_value.upload.called
+        assert not cmd.sdk.auto_create_edition.called
+
+        # Only one file has changed, but the new edition needs all of them.
+        (upload_dir / "a.csv").write_text("changed")
+        upload.reset_mock()
+        cmd, statuses = cp()
+        assert set(statuses.values()) == {"uploaded"}
+        assert upload.return_value.upload.call_count == 4
+        cmd.sdk.auto_create_edition.assert_called_once()
+        upload.return_value.upload.assert_any_call(
+            str(upload_dir / "a.csv"),
+            "foo",
+            version["version"],
+            "new-edition",
+            3,
+            progress=mocker.ANY,
+        )
+
+        upload.reset_mock()
+        cmd, statuses = cp()
+        assert set(statuses.values()) == {"skipped"}
+        assert not upload.return_value.upload.called
+
+    def test_upload_files_without_skip_unchanged(self, mocker, mock_print, tmp_path):
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload.return_value = {"result": True, "trace_id": "t"}
+        data_file = tmp_path / "data.csv"
+
+        def cp(content, *args):
+            data_file.write_text(content)
+            create_cmd(mocker, "cp", str(data_file), "ds:foo", *args).handler()
+
+        cp("v1", "--skip-unchanged")
+        cp("v2")
+        # The server has v2 now, so uploading v1 again isn't skipped.
+        upload.reset_mock()
+        cp("v1", "--skip-unchanged")
+        upload.return_value.upload.assert_called_once()
+
+    def test_upload_files_skip_unchanged_failed(self, mocker, mock_print, upload_dir):
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload.return_value = {"result": False, "trace_id": None}
+        args = ["cp", str(upload_dir / "a.csv"), "ds:foo", "--skip-unchanged"]
+
+        # Failed uploads aren't recorded, so they're tried again.
+        for _ in range(2):
+            with pytest.raises(SystemExit):
+                create_cmd(mocker, *args).handler()
+        assert upload.return_value.upload.call_count == 2
+
+    def test_upload_files_resume(self, mocker, mock_print, upload_dir):
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        failing = {str(upload_dir / "sub" / "c.csv")}
+
+        def upload_file(filename, *args, **kwargs):
+            if filename in failing:
+                raise ConnectionError("Oops")
+            return {"result": True, "trace_id": f"trace-{os.path.basename(filename)}"}
+
+        upload.return_value.upload.side_effect = upload_file
+        add_rows = mocker.spy(TableOutput, "add_rows")
+
+        cmd = create_cmd(mocker, "cp", str(upload_dir), "ds:foo")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert upload.return_value.upload.call_count == 4
+        cmd.sdk.auto_create_edition.assert_called_once()
+
+        failing.clear()
+        upload.reset_mock()
+        cmd = create_cmd(mocker, "cp", str(upload_dir), "ds:foo", "--resume")
+        cmd.handler()
+        upload.return_value.upload.assert_called_once_with(
+            str(upload_dir / "sub" / "c.csv"),
+            "foo",
+            version["version"],
+            "new-edition",
+            3,
+            progress=mocker.ANY,
+        )
+        assert not cmd.sdk.auto_create_edition.called
+        rows = add_rows.call_args.args[1]
+        assert [row["status"] for row in rows] == ["uploaded"] * 4
+        assert rows[0]["trace_id"] == "trace-a.csv"
+
+        # The journal is gone once everything has been uploaded.
+        upload.reset_mock()
+        cmd = create_cmd(mocker, "cp", str(upload_dir), "ds:foo", "--resume")
+        cmd.handler()
+        assert upload.return_value.upload.call_count == 4
+        cmd.sdk.auto_create_edition.assert_called_once()
+
+    def test_upload_stdin(self, mocker, mock_print):
+        cmd = create_cmd(mocker, "cp", "-", "ds:foo", "--filename=foo.csv")
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        uploaded = []
+
+        def upload_fileobj(f, filename, *args):
+            uploaded.append((filename, f.read()))
+            return {"result": True, "trace_id": "trace"}
+
+        upload.return_value.upload_fileobj.side_effect = upload_fileobj
+        mocker.patch("sys.stdin", io.TextIOWrapper(io.BytesIO(b"a,b\n1,2\n")))
+        add_rows = mocker.spy(TableOutput, "add_rows")
+
+        cmd.handler()
+
+        assert uploaded == [("foo.csv", b"a,b\n1,2\n")]
+        cmd.sdk.auto_create_edition.assert_called_once()
+        [row] = add_rows.call_args.args[1]
+        assert (row["file"], row["status"]) == ("foo.csv", "uploaded")
+
+    def test_upload_stdin_failed(self, mocker, mock_print):
+        cmd = create_cmd(mocker, "cp", "-", "ds:foo", "--filename=foo.csv")
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        upload.return_value.upload_fileobj.side_effect = ConnectionError("Oops")
+        mocker.patch("sys.stdin", io.TextIOWrapper(io.BytesIO(b"a,b\n1,2\n")))
+        with pytest.raises(SystemExit):
+            cmd.handler()
+
+    def test_upload_stdin_without_filename(self, mocker):
+        cmd = create_cmd(mocker, "cp", "-", "ds:foo")
+        upload = mocker.patch(f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.StreamingUpload")
+        with pytest.raises(SystemExit):
+            cmd.handler()
+        assert not upload.return_value.upload_fileobj.called
+
+
+class TestDatasetsDownload:
+    def test_download_files(self, mocker, mock_print):
+        cmd = create_cmd(mocker, "cp", "ds:foo/1/latest", "out", "--parallel=3")
+        download = mocker.patch(
+            f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.ParallelDownload"
+        )
+        download.return_value.download_edition.return_value = [
+            {"path": "out/a.csv", "status": "skipped", "size": 3, "throughput": None},
+            {"path": "out/b.csv", "status": "downloaded", "size": 3, "throughput": 1.0},
+        ]
+        add_rows = mocker.spy(TableOutput, "add_rows")
+
+        cmd.handler()
+
+        download.return_value.download_edition.assert_called_once_with(
+            "foo", "1", edition["edition"], "out", max_workers=3, progress=mocker.ANY
+        )
+        rows = add_rows.call_args.args[1]
+        assert [(r["target"], r["status"]) for r in rows] == [
+            ("out/a.csv", "skipped"),
+            ("out/b.csv", "downloaded"),
+        ]
 
 
 class TestUtils:
@@ -227,3 +653,17 @@ class TestUtils:
         assert dataset_id == dataset["Id"]
         assert _version == version["version"]
         assert _edition == edition["edition"]
+
+    def test_stream_files(self, mocker, mock_print):
+        cmd = create_cmd(mocker, "cp", "ds:foo/1/latest", "-")
+        download = mocker.patch(
+            f"{DATASETS_CMD_QUAL.rsplit('.', 1)[0]}.ParallelDownload"
+        )
+        stdout = mocker.patch("sys.stdout")
+
+        cmd.handler()
+
+        download.return_value.stream_edition.assert_called_once_with(
+            "foo", "1", edition["edition"], stdout.buffer, progress=mocker.ANY
+        )
+        assert not mock_print.called
@@ -0,0 +1,201 @@
+import hashlib
+import io
+
+import pytest
+from okdata.sdk.data.download import DownloadURLAssertionError
+
+from okdata.cli.commands.datasets.download import (
+    DownloadChecksumError,
+    ParallelDownload,
+)
+from okdata.cli.progress import TransferProgress
+
+BASE_URL = "https://ok-origo-dataplatform-dev.s3.amazonaws.com"
+CONTENT = b"hello, world\n" * 1000
+
+
+class FakeRaw(io.BytesIO):
+    def stream(self, amt, decode_content=None):
+        while chunk := self.read(amt):
+            yield chunk
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.raw = FakeRaw(body)
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(self.status_code)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class FakeSession:
+    """Serve `content` like S3 does, honoring `Range` headers."""
+
+    def __init__(self, content, etag=None):
+        self.content = content
+        self.etag = etag or hashlib.md5(content).hexdigest()
+        self.requests = []
+
+    def get(self, url, headers={}, stream=False):
+        self.requests.append(headers.get("Range"))
+        headers_out = {"ETag": f'"{self.etag}"'}
+
+        if "Range" not in headers:
+            headers_out["Content-Length"] = str(len(self.content))
+            return FakeResponse(200, self.content, headers_out)
+
+        start, end = headers["Range"][len("bytes=") :].split("-")
+        start = int(start)
+        end = int(end) if end else len(self.content) - 1
+        if start >= len(self.content):
+            return FakeResponse(416)
+        headers_out["Content-Range"] = f"bytes {start}-{end}/{len(self.content)}"
+        return FakeResponse(206, self.content[start : end + 1], headers_out)
+
+
+@pytest.fixture
+def download(mocker):
+    download = ParallelDownload(env="dev")
+    session = FakeSession(CONTENT)
+    mocker.patch.object(download, "prepared_request_with_retries", lambda r: session)
+    download.session = session
+    return download
+
+
+def test_download_file(download, tmp_path):
+    path = str(tmp_path / "file.txt")
+    result = download.download_file(f"{BASE_URL}/file.txt", path)
+    assert result["status"] == "downloaded"
+    assert result["size"] == len(CONTENT)
+    assert open(path, "rb").read() == CONTENT
+    assert download.session.requests == [None]
+
+
+def test_resume_partial_download(download, tmp_path):
+    path = tmp_path / "file.txt"
+    (tmp_path / "file.txt.part").write_bytes(CONTENT[:100])
+    result = download.download_file(f"{BASE_URL}/file.txt", str(path))
+    assert result["status"] == "resumed"
+    assert path.read_bytes() == CONTENT
+    assert not (tmp_path / "file.txt.part").exists()
+    assert download.session.requests == ["bytes=100-"]
+
+
+def test_download_progress(download, tmp_path):
+    progress = TransferProgress()
+    (tmp_path / "file.txt.part").write_bytes(CONTENT[:100])
+    file = progress.file("file.txt")
+    download.download_file(f"{BASE_URL}/file.txt", str(tmp_path / "file.txt"), 0, file)
+    assert file.size == len(CONTENT)
+    assert file.done == len(CONTENT)
+    assert file.status == "resumed"
+
+
+def test_download_progress_failed(download, tmp_path):
+    download.session.etag = "0" * 32
+    file = TransferProgress().file("file.txt")
+    with pytest.raises(DownloadChecksumError):
+        download.download_file(
+            f"{BASE_URL}/file.txt", str(tmp_path / "file.txt"), 0, file
+        )
+    assert file.status == "failed"
+
+
+def test_restart_corrupt_partial_download(download, tmp_path):
+    path = tmp_path / "file.txt"
+    (tmp_path / "file.txt.part").write_bytes(b"garbage")
+    result = download.download_file(f"{BASE_URL}/file.txt", str(path))
+    assert result["status"] == "downloaded"
+    assert path.read_bytes() == CONTENT
+    assert download.session.requests == ["bytes=7-", None]
+
+
+def test_skip_identical_file(download, tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(CONTENT)
+    result = download.download_file(f"{BASE_URL}/file.txt", str(path))
+    assert result["status"] == "skipped"
+    assert download.session.requests == ["bytes=0-0"]
+
+
+def test_replace_changed_file(download, tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(CONTENT.upper())
+    result = download.download_file(f"{BASE_URL}/file.txt", str(path))
+    assert result["status"] == "downloaded"
+    assert path.read_bytes() == CONTENT
+
+
+def test_checksum_mismatch(download, tmp_path):
+    download.session.etag = "0" * 32
+    with pytest.raises(DownloadChecksumError):
+        download.download_file(f"{BASE_URL}/file.txt", str(tmp_path / "file.txt"))
+    assert not list(tmp_path.iterdir())
+
+
+def test_download_edition(download, mocker, tmp_path):
+    mocker.patch.object(
+        download,
+        "get_files",
+        return_value=[
+            {"key": f"raw/green/ds/{name}", "url": f"{BASE_URL}/{name}"}
+            for name in ["a.csv", "b.csv", "c.csv"]
+        ],
+    )
+    progress = TransferProgress()
+    results = download.download_edition(
+        "ds", "1", "e", str(tmp_path / "out"), 0, 2, progress
+    )
+    assert [r["path"] for r in results] == [
+        str(tmp_path / "out" / name) for name in ["a.csv", "b.csv", "c.csv"]
+    ]
+    assert progress.totals()["finished"] == 3
+    assert progress.totals()["bytes"] == 3 * len(CONTENT)
+
+
+def test_download_edition_unexpected_url(download, mocker, tmp_path):
+    mocker.patch.object(
+        download,
+        "get_files",
+        return_value=[{"key": "a.csv", "url": "https://example.org/a.csv"}],
+    )
+    with pytest.raises(DownloadURLAssertionError):
+        download.download_edition("ds", "1", "e", str(tmp_path))
+
+
+def test_stream_edition(download, mocker):
+    mocker.patch.object(
+        download,
+        "get_files",
+        return_value=[
+            {"key": f"raw/green/ds/{name}", "url": f"{BASE_URL}/{name}"}
+            for name in ["a.csv", "b.csv"]
+        ],
+    )
+    out = io.BytesIO()
+    progress = TransferProgress()
+    results = download.stream_edition("ds", "1", "e", out, progress=progress)
+    assert out.getvalue() == CONTENT * 2
+    assert [(r["path"], r["status"]) for r in results] == [
+        ("a.csv", "streamed"),
+        ("b.csv", "streamed"),
+    ]
+    assert progress.totals()["finished"] == 2
+    assert progress.totals()["size"] == 2 * len(CONTENT)
+
+
+def test_stream_file_checksum_mismatch(download):
+    download.session.etag = "0" * 32
+    file = TransferProgress().file("file.txt")
+    with pytest.raises(DownloadChecksumError):
+        download.stream_file(f"{BASE_URL}/file.txt", "file.txt", io.BytesIO(), 0, file)
+    assert file.status == "failed"
@@ -0,0 +1,110 @@
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from okdata.cli.commands.datasets.index import (
+    DatasetIndex,
+    index_path,
+    search_datasets,
+    ttl,
+)
+
+datasets = [
+    {
+        "Id": "befolkningsframskrivninger",
+        "title": "Befolkningsframskrivninger",
+        "keywords": ["befolkning", "prognose"],
+        "publisher": "Oslo kommune",
+        "accessRights": "public",
+    },
+    {
+        "Id": "bydelsfakta-befolkning",
+        "title": "Bydelsfakta: Befolkning",
+        "keywords": ["bydel"],
+        "publisher": "Bydel Gamle Oslo",
+        "parent_id": "bydelsfakta",
+        "accessRights": "restricted",
+    },
+    {
+        "Id": "sykkelparkering",
+        "title": "Sykkelparkering",
+        "publisher": "Bymiljøetaten",
+        "accessRights": "public",
+    },
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    with DatasetIndex(str(tmp_path / "index.sqlite3")) as index:
+        index.replace(datasets)
+        yield index
+
+
+def ids(datasets):
+    return [d["Id"] for d in datasets]
+
+
+def test_datasets(index):
+    assert index.datasets() == datasets
+
+
+def test_datasets_filter(index):
+    assert ids(index.datasets("befolkning")) == [
+        "befolkningsframskrivninger",
+        "bydelsfakta-befolkning",
+    ]
+    assert ids(index.datasets("^SYKKEL")) == ["sykkelparkering"]
+    assert ids(index.datasets(": Bef")) == ["bydelsfakta-befolkning"]
+    assert index.datasets("oslo") == []
+
+
+@pytest.fixture(params=["index", "in-memory"])
+def search(request, index):
+    if request.param == "index":
+        return index.search
+    return lambda text: search_datasets(datasets, text)
+
+
+def test_search(search):
+    assert ids(search("befolkning")) == [
+        "befolkningsframskrivninger",
+        "bydelsfakta-befolkning",
+    ]
+    assert ids(search("bydel befolkning")) == ["bydelsfakta-befolkning"]
+    assert ids(search("gamle oslo")) == ["bydelsfakta-befolkning"]
+    assert ids(search("bydelsfakta-bef")) == ["bydelsfakta-befolkning"]
+    assert ids(search("restricted")) == ["bydelsfakta-befolkning"]
+    assert ids(search('"sykkel" OR')) == []
+    assert search("  ") == []
+
+
+def test_replace(index):
+    index.replace(datasets[:1])
+    assert index.datasets() == datasets[:1]
+    assert ids(index.search("sykkel")) == []
+
+
+def test_staleness(index):
+    assert not index.is_stale(timedelta(hours=1))
+    assert index.is_stale(timedelta(0))
+
+    index.invalidate()
+    assert index.is_stale(timedelta(hours=1))
+
+
+def test_ttl(monkeypatch):
+    assert ttl() == timedelta(hours=1)
+    monkeypatch.setenv("OKDATA_DATASET_INDEX_TTL", "0")
+    assert ttl() == timedelta(0)
+
+
+def test_index_path(cache_dir):
+    anonymous = SimpleNamespace(token_provider=None)
+    dev = SimpleNamespace(config={"env": "dev"})
+    prod = SimpleNamespace(config={"env": "prod"})
+    mock = SimpleNamespace(config={"env": "dev", "apiUrl": "http://localhost:8080"})
+    assert index_path(dev, anonymous).startswith(str(cache_dir / "okdata"))
+    assert index_path(dev, anonymous) != index_path(prod, anonymous)
+    assert index_path(dev, anonymous) != index_path(mock, anonymous)
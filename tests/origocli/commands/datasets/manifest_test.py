@@ -0,0 +1,165 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from requests.exceptions import HTTPError
+
+from okdata.cli.commands.datasets.manifest import (
+    ManifestApply,
+    ManifestError,
+    load_manifest,
+)
+
+resources = [
+    {"kind": "distribution", "dataset": "my-dataset", "version": "1",
+     "edition": "2024-01-01T00:00:00+01:00", "filenames": ["data.csv"]},
+    {"kind": "edition", "dataset": "my-dataset", "version": "1",
+     "edition": "2024-01-01T00:00:00+01:00", "description": "First edition"},
+    {"kind": "version", "dataset": "my-dataset", "version": "1"},
+    {"kind": "dataset", "id": "my-dataset", "title": "My dataset"},
+    {"kind": "version", "dataset": "existing-dataset", "version": "2"},
+]  # fmt: skip
+
+
+def not_found():
+    response = MagicMock(status_code=404)
+    return HTTPError("404 Not Found", response=response)
+
+
+@pytest.fixture
+def sdk():
+    sdk = MagicMock()
+    sdk.get_dataset.side_effect = not_found()
+    sdk.get_datasets.return_value = [{"Id": "other-dataset", "title": "Other"}]
+    sdk.get_versions.return_value = [
+        {"Id": "existing-dataset/2", "version": "2"},
+    ]
+    sdk.create_dataset.return_value = {"Id": "my-dataset"}
+    sdk.create_version.return_value = {"Id": "my-dataset/1"}
+    sdk.create_edition.return_value = {"Id": "my-dataset/1/20240101T000000"}
+    sdk.create_distribution.return_value = {"Id": "my-dataset/1/20240101T000000/abc"}
+    return sdk
+
+
+def statuses(results):
+    return [(r["kind"], r["id"], r["status"]) for r in results]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".ndjson", ".yaml"])
+def test_load_manifest(tmp_path, suffix):
+    manifest = tmp_path / f"manifest{suffix}"
+    if suffix == ".ndjson":
+        manifest.write_text("\n".join(json.dumps(r) for r in resources) + "\n\n")
+    else:
+        # JSON is valid YAML as well.
+        manifest.write_text(json.dumps({"resources": resources}))
+    assert load_manifest(str(manifest)) == resources
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "{",
+        '{"datasets": []}',
+        '[{"kind": "catalog"}]',
+        '[{"kind": "version", "version": "1"}]',
+        '[{"kind": "version", "dataset": "my-dataset", "version": 1}]',
+        '[{"kind": "edition", "dataset": ["my-dataset"], "version": "1"}]',
+    ],
+)
+def test_load_invalid_manifest(tmp_path, content):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(content)
+    with pytest.raises(ManifestError):
+        load_manifest(str(manifest))
+
+
+def test_load_manifest_unserializable_value(tmp_path):
+    pytest.importorskip("yaml")
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text(
+        "- kind: edition\n"
+        "  dataset: my-dataset\n"
+        '  version: "1"\n'
+        "  description: First edition\n"
+        "  startTime: 2024-01-01\n"
+    )
+    with pytest.raises(ManifestError, match="quote dates"):
+        load_manifest(str(manifest))
+
+
+def test_apply(sdk):
+    results = list(ManifestApply(sdk).run(resources))
+
+    assert statuses(results) == [
+        ("dataset", "my-dataset", "created"),
+        ("version", "my-dataset/1", "created"),
+        ("version", "existing-dataset/2", "exists"),
+        ("edition", "my-dataset/1/20240101T000000", "created"),
+        ("distribution", "my-dataset/1/20240101T000000/abc", "created"),
+    ]
+    sdk.create_dataset.assert_called_once_with({"title": "My dataset"})
+    sdk.create_version.assert_called_once_with("my-dataset", {"version": "1"})
+    sdk.create_edition.assert_called_once_with(
+        "my-dataset",
+        "1",
+        {"edition": "2024-01-01T00:00:00+01:00", "description": "First edition"},
+    )
+    sdk.create_distribution.assert_called_once_with(
+        "my-dataset", "1", "20240101T000000", {"filenames": ["data.csv"]}
+    )
+
+
+def test_apply_uses_actual_dataset_id(sdk):
+    sdk.create_dataset.return_value = {"Id": "my-dataset-abcde"}
+    list(ManifestApply(sdk).run(resources))
+    sdk.create_version.assert_called_once_with("my-dataset-abcde", {"version": "1"})
+
+
+def test_apply_rerun_finds_dataset_with_other_id(sdk):
+    sdk.create_dataset.return_value = {"Id": "my-dataset-abcde"}
+    list(ManifestApply(sdk).run(resources))
+
+    # The dataset now exists with another ID than the one in the manifest.
+    sdk.reset_mock()
+    sdk.get_datasets.return_value = [
+        {"Id": "my-dataset-abcde", "title": "My dataset"},
+    ]
+    results = list(ManifestApply(sdk).run(resources))
+
+    assert results[0]["id"] == "my-dataset-abcde"
+    assert results[0]["status"] == "exists"
+    sdk.create_dataset.assert_not_called()
+    sdk.get_versions.assert_any_call("my-dataset-abcde")
+
+
+def test_apply_dry_run(sdk):
+    results = list(ManifestApply(sdk, dry_run=True).run(resources))
+
+    assert [r["status"] for r in results] == [
+        "would create",
+        "would create",
+        "exists",
+        "would create",
+        "would create",
+    ]
+    # Nothing below a dataset that doesn't exist yet is looked up.
+    sdk.get_versions.assert_called_once_with("existing-dataset")
+    sdk.get_editions.assert_not_called()
+    sdk.create_dataset.assert_not_called()
+    sdk.create_version.assert_not_called()
+
+
+def test_apply_skips_children_of_failed(sdk):
+    sdk.create_version.side_effect = HTTPError("500 Server Error")
+    results = list(ManifestApply(sdk).run(resources))
+
+    assert statuses(results) == [
+        ("dataset", "my-dataset", "created"),
+        ("version", "my-dataset/1", "failed"),
+        ("version", "existing-dataset/2", "exists"),
+        ("edition", "my-dataset/1/2024-01-01T00:00:00+01:00", "skipped"),
+        ("distribution", "my-dataset/1/2024-01-01T00:00:00+01:00", "skipped"),
+    ]
+    sdk.create_edition.assert_not_called()
+    sdk.create_distribution.assert_not_called()
@@ -0,0 +1,79 @@
+import hashlib
+from types import SimpleNamespace
+
+from okdata.cli.commands.datasets.upload_cache import (
+    UploadCache,
+    file_sha256,
+    journal_key,
+    upload_cache_path,
+)
+
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "file.csv"
+    path.write_bytes(b"a,b\n" * 1_000_000)
+    assert file_sha256(path) == hashlib.sha256(b"a,b\n" * 1_000_000).hexdigest()
+
+
+def test_upload_cache_path():
+    dev = SimpleNamespace(config={"env": "dev"})
+    prod = SimpleNamespace(config={"env": "prod"})
+    mock = SimpleNamespace(config={"env": "dev", "apiUrl": "http://localhost"})
+    assert len({upload_cache_path(c) for c in [dev, prod, mock]}) == 3
+    assert upload_cache_path(dev).endswith(".sqlite3")
+
+
+def test_upload_cache(tmp_path):
+    with UploadCache(tmp_path / "uploads.sqlite3") as cache:
+        assert not cache.is_unchanged("foo", "1", "/tmp/a.csv", "abc")
+
+        cache.record("foo", "1", "2026-01-01", "/tmp/a.csv", "abc")
+        assert cache.is_unchanged("foo", "1", "/tmp/a.csv", "abc")
+        # Files are identified by their base name.
+        assert cache.is_unchanged("foo", "1", "/other/a.csv", "abc")
+        assert not cache.is_unchanged("foo", "1", "/tmp/a.csv", "def")
+        assert not cache.is_unchanged("foo", "2", "/tmp/a.csv", "abc")
+        assert not cache.is_unchanged("bar", "1", "/tmp/a.csv", "abc")
+
+        cache.record("foo", "1", "2026-01-02", "/tmp/a.csv", "def")
+        assert cache.is_unchanged("foo", "1", "/tmp/a.csv", "def")
+        assert not cache.is_unchanged("foo", "1", "/tmp/a.csv", "abc")
+
+        cache.forget("foo", "1", "/other/a.csv")
+        assert not cache.is_unchanged("foo", "1", "/tmp/a.csv", "def")
+
+
+def test_journal_key():
+    assert journal_key("foo", ["a.csv", "b.csv"]) == journal_key(
+        "foo", ["b.csv", "a.csv"]
+    )
+    assert journal_key("foo", ["a.csv"]) != journal_key("bar", ["a.csv"])
+    assert journal_key("foo", ["a.csv"]) != journal_key("foo", ["a.csv", "b.csv"])
+
+
+def test_journal(tmp_path):
+    a = tmp_path / "a.csv"
+    b = tmp_path / "b.csv"
+    a.write_text("a")
+    b.write_text("b")
+
+    with UploadCache(tmp_path / "uploads.sqlite3") as cache:
+        assert cache.journal("key") is None
+
+        cache.start_journal("key", "foo", "1", "2026-01-01")
+        cache.journal_file("key", a, "trace-a")
+        cache.journal_file("key", b, "trace-b")
+        assert cache.journal("key") == (
+            ("foo", "1", "2026-01-01"),
+            {str(a): "trace-a", str(b): "trace-b"},
+        )
+
+        # Files modified after being uploaded must be uploaded again.
+        b.write_text("changed")
+        assert cache.journal("key")[1] == {str(a): "trace-a"}
+
+        cache.start_journal("key", "foo", "1", "2026-01-02")
+        assert cache.journal("key") == (("foo", "1", "2026-01-02"), {})
+
+        cache.finish_journal("key")
+        assert cache.journal("key") is None
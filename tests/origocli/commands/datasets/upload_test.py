@@ -0,0 +1,114 @@
+import io
+
+import pytest
+from requests.exceptions import ConnectionError
+
+from okdata.cli.commands.datasets.upload import StreamingUpload
+from okdata.cli.progress import TransferProgress
+
+CONTENT = b"hello, world\n" * 1000
+
+
+@pytest.fixture
+def upload(mocker):
+    mocker.patch("okdata.cli.commands.datasets.upload.time.sleep")
+    return StreamingUpload(env="dev")
+
+
+@pytest.fixture
+def upload_file(tmp_path):
+    path = tmp_path / "file.csv"
+    path.write_bytes(CONTENT)
+    return str(path)
+
+
+def test_upload_streams_file(upload, upload_file, mocker):
+    sent = []
+
+    def upload_stream(stream, filename, size, *args):
+        sent.append((filename, size, stream.read()))
+        return {"result": True, "trace_id": "trace"}
+
+    mocker.patch.object(upload, "upload_stream", side_effect=upload_stream)
+    assert upload.upload(upload_file, "foo", "1", "edition", 3) == {
+        "result": True,
+        "trace_id": "trace",
+    }
+    assert sent == [(upload_file, len(CONTENT), CONTENT)]
+
+
+def test_upload_retries_from_start(upload, upload_file, mocker):
+    attempts = []
+
+    def upload_stream(stream, *args):
+        attempts.append(stream.read())
+        if len(attempts) < 3:
+            raise ConnectionError("Connection reset")
+        return {"result": True, "trace_id": "trace"}
+
+    mocker.patch.object(upload, "upload_stream", side_effect=upload_stream)
+    assert upload.upload(upload_file, "foo", "1", "edition", 3)["result"]
+    assert attempts == [CONTENT] * 3
+
+
+def test_upload_fileobj_retries_from_position(upload, mocker):
+    attempts = []
+
+    def upload_stream(stream, filename, size, *args):
+        attempts.append((size, stream.read()))
+        if len(attempts) < 2:
+            raise ConnectionError("Connection reset")
+        return {"result": True, "trace_id": "trace"}
+
+    mocker.patch.object(upload, "upload_stream", side_effect=upload_stream)
+    f = io.BytesIO(CONTENT)
+    f.seek(100)
+    assert upload.upload_fileobj(f, "file.csv", "foo", "1", "edition", 3)["result"]
+    assert attempts == [(len(CONTENT) - 100, CONTENT[100:])] * 2
+
+
+def test_upload_gives_up(upload, upload_file, mocker):
+    mocker.patch.object(upload, "upload_stream", side_effect=ConnectionError)
+    with pytest.raises(ConnectionError):
+        upload.upload(upload_file, "foo", "1", "edition", 2)
+    assert upload.upload_stream.call_count == 3
+
+
+def test_upload_rejected(upload, upload_file, mocker):
+    mocker.patch.object(
+        upload,
+        "upload_stream",
+        return_value={"result": False, "status_code": 403, "trace_id": "trace"},
+    )
+    assert not upload.upload(upload_file, "foo", "1", "edition", 3)["result"]
+    assert upload.upload_stream.call_count == 1
+
+
+def test_upload_retries_server_errors(upload, upload_file, mocker):
+    mocker.patch.object(
+        upload,
+        "upload_stream",
+        side_effect=[
+            {"result": False, "status_code": 503, "trace_id": "trace-1"},
+            {"result": True, "status_code": 204, "trace_id": "trace-2"},
+        ],
+    )
+    assert upload.upload(upload_file, "foo", "1", "edition", 3)["trace_id"] == (
+        "trace-2"
+    )
+    assert upload.upload_stream.call_count == 2
+
+
+def test_upload_stream_progress(upload, mocker):
+    mocker.patch.object(
+        upload, "create_s3_signed_data", return_value={"fields": {}, "trace_id": "t"}
+    )
+    session = mocker.patch.object(upload, "prepared_request_with_retries")
+    session.return_value.post.side_effect = lambda url, data, headers: mocker.Mock(
+        status_code=204 if data.read() else 400
+    )
+    file = TransferProgress().file("file.csv")
+    upload.upload_stream(
+        io.BytesIO(CONTENT), "file.csv", len(CONTENT), "foo", "1", "e", progress=file
+    )
+    assert (file.size, file.done) == (len(CONTENT), len(CONTENT))
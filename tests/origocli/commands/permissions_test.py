@@ -1,7 +1,11 @@
+import io
 import re
 from unittest.mock import ANY
 
+import pytest
+
 from conftest import set_argv
+from okdata.cli.commands import permissions as permissions_module
 from okdata.cli.commands.permissions import PermissionsCommand
 
 DATASETS_CMD_QUAL = f"{PermissionsCommand.__module__}.{PermissionsCommand.__name__}"
@@ -150,3 +154,114 @@ def test_remove_team(mocker):
     user = cmd.client.update_permission.mock_calls[0][2]["remove_users"][0]
     assert user.user_id == "baz"
     assert user.user_type == "team"
+
+
+def test_add_from_file(mocker, tmp_path):
+    permissions_file = tmp_path / "permissions.json"
+    permissions_file.write_text("""[
+          {"resource_name": "okdata:dataset:a", "user": "foo"},
+          {
+            "resource_name": "okdata:dataset:b",
+            "user": "baz",
+            "scope": "okdata:dataset:read",
+            "user_type": "team"
+          }
+        ]""")
+    cmd = make_cmd(mocker, "add", f"--file={permissions_file}")
+    cmd.handler()
+    calls = cmd.client.update_permission.mock_calls
+    assert [c.args for c in calls] == [
+        ("okdata:dataset:a", "__all__"),
+        ("okdata:dataset:b", "okdata:dataset:read"),
+    ]
+    users = [c.kwargs["add_users"][0] for c in calls]
+    assert [(u.user_id, u.user_type) for u in users] == [
+        ("foo", "user"),
+        ("baz", "team"),
+    ]
+
+
+def test_remove_from_stdin(mocker, monkeypatch):
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO(
+            '{"resource_name": "okdata:dataset:a", "user": "bar", '
+            '"user_type": "client"}\n'
+        ),
+    )
+    cmd = make_cmd(mocker, "rm", "--file=-")
+    cmd.handler()
+    cmd.client.update_permission.assert_called_once_with(
+        "okdata:dataset:a", "__all__", remove_users=[ANY]
+    )
+    user = cmd.client.update_permission.mock_calls[0].kwargs["remove_users"][0]
+    assert user.user_id == "bar"
+    assert user.user_type == "client"
+
+
+@pytest.mark.parametrize(
+    "record, message",
+    [
+        ('"foo"', "Permission record 2 is not a JSON object."),
+        (
+            '{"user": "bar"}',
+            "Permission record 2 is missing the field 'resource_name'.",
+        ),
+        (
+            '{"resource_name": "okdata:dataset:b"}',
+            "Permission record 2 is missing the field 'user'.",
+        ),
+        (
+            '{"resource_name": "okdata:dataset:b", "user": "bar", "user_type": "x"}',
+            "The field 'user_type' of permission record 2 must be one of: "
+            "user, team, client.",
+        ),
+        (
+            '{"resource_name": "okdata:dataset:b", "user": "bar", "scope": 1}',
+            "The field 'scope' of permission record 2 must be a string.",
+        ),
+    ],
+)
+def test_add_from_file_invalid(mocker, tmp_path, record, message):
+    permissions = tmp_path / "permissions.ndjson"
+    permissions.write_text(
+        f'{{"resource_name": "okdata:dataset:a", "user": "foo"}}\n{record}\n'
+    )
+    cmd = make_cmd(mocker, "add", f"--file={permissions}")
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == message
+    assert not cmd.client.update_permission.called
+
+
+def test_add_from_stdin_invalid(mocker, monkeypatch):
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO(
+            '{"resource_name": "okdata:dataset:a", "user": "foo"}\n'
+            '{"resource_name": "okdata:dataset:b"}\n'
+            '{"resource_name": "okdata:dataset:c", "user": "foo"}\n'
+        ),
+    )
+    cmd = make_cmd(mocker, "add", "--file=-")
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == "Permission record 2 is missing the field 'user'."
+    # Stdin is streamed, so only the records before the malformed one apply.
+    cmd.client.update_permission.assert_called_once_with(
+        "okdata:dataset:a", "__all__", add_users=[ANY]
+    )
+
+
+def test_add_from_file_is_streamed(mocker, tmp_path):
+    permissions = tmp_path / "permissions.ndjson"
+    permissions.write_text(
+        '{"resource_name": "okdata:dataset:a", "user": "foo"}\n'
+        '{"resource_name": "okdata:dataset:b", "user": "bar"}\n'
+    )
+    cmd = make_cmd(mocker, "add", f"--file={permissions}")
+    iter_json = mocker.spy(permissions_module, "iter_json")
+    cmd.handler()
+    assert cmd.client.update_permission.call_count == 2
+    # One pass for checking the records, and one for applying them.
+    assert iter_json.call_count == 2
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from requests.exceptions import HTTPError
+
+from conftest import set_argv
+from okdata.cli.commands.pubs import pubs
+
+clients = [
+    {"id": "client-1", "name": "Client 1"},
+    {"id": "client-2", "name": "Client 2"},
+    {"id": "client-3", "name": "Client 3"},
+]
+
+keys = {
+    "client-1": [{"kid": "key-1", "expires": "2030-01-02T00:00:00+00:00"}],
+    "client-2": [
+        {"kid": "key-2", "expires": "2030-01-03T00:00:00+00:00"},
+        {"kid": "key-3", "expires": "2030-01-01T00:00:00+00:00"},
+    ],
+}
+
+
+def get_keys(env, client_id):
+    if client_id not in keys:
+        raise HTTPError("500 Server Error")
+    return keys[client_id]
+
+
+def make_cmd(mocker, *args):
+    set_argv("pubs", *args)
+    cmd = pubs.PubsCommand()
+    mocker.patch.object(cmd, "pubs_client")
+    mocker.patch.object(pubs, "list_keys_wizard")
+    pubs.list_keys_wizard.return_value = {
+        "org": "dig",
+        "env": "test",
+        "clients": clients,
+    }
+    cmd.pubs_client.get_keys.side_effect = get_keys
+    return cmd
+
+
+def test_list_keys_all_clients(mocker, mock_print):
+    cmd = make_cmd(mocker, "list-keys", "--format=json")
+    cmd.handler()
+
+    assert cmd.pubs_client.get_keys.call_count == 3
+    rows = mock_print.mock_calls[0][1][1].out
+    assert [(r["client_name"], r["kid"]) for r in rows] == [
+        ("Client 2", "key-3"),
+        ("Client 1", "key-1"),
+        ("Client 2", "key-2"),
+        ("Client 3", None),
+    ]
+    assert rows[-1]["error"] == "500 Server Error"
+    assert all(r["error"] is None for r in rows[:-1])
+
+
+def test_list_keys_all_clients_ndjson(mocker, capsys):
+    cmd = make_cmd(mocker, "list-keys", "--format=ndjson")
+    cmd.handler()
+
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted((r["client_name"], r["kid"] or "") for r in rows) == [
+        ("Client 1", "key-1"),
+        ("Client 2", "key-2"),
+        ("Client 2", "key-3"),
+        ("Client 3", ""),
+    ]
+
+
+@pytest.mark.parametrize("fmt", ["table", "json"])
+def test_list_keys_single_client(mocker, mock_print, fmt):
+    cmd = make_cmd(mocker, "list-keys", f"--format={fmt}")
+    pubs.list_keys_wizard.return_value = {
+        "org": "dig",
+        "env": "test",
+        "client_id": "client-2",
+        "client_name": "Client 2",
+    }
+    cmd.handler()
+
+    cmd.pubs_client.get_keys.assert_called_once_with("test", "client-2")
@@ -0,0 +1,95 @@
+import os
+import sys
+
+import pytest
+from prompt_toolkit.document import Document
+
+from conftest import set_argv
+from okdata.cli.commands.shell import ShellCommand, ShellCompleter
+
+
+def completions(text):
+    document = Document(text)
+    return [c.text for c in ShellCompleter().get_completions(document, None)]
+
+
+def test_complete_commands():
+    assert completions("") == [
+        "datasets",
+        "permissions",
+        "pubs",
+        "status",
+        "teams",
+        "help",
+        "exit",
+        "quit",
+    ]
+    assert completions("okdata p") == ["permissions", "pubs"]
+
+
+def test_complete_subcommands():
+    assert completions("datasets create-") == [
+        "create-version",
+        "create-edition",
+        "create-distribution",
+        "create-pipeline",
+    ]
+    assert completions("datasets ls ") == []
+
+
+def test_complete_options():
+    assert completions("status foo --w") == ["--watch"]
+    assert completions("nonsense --") == []
+
+
+@pytest.fixture
+def shell(mocker):
+    def start(*lines, env=None, error=None):
+        set_argv("shell", *([f"--env={env}"] if env else []))
+        cmd = ShellCommand()
+        session = mocker.patch("okdata.cli.commands.shell.PromptSession")
+        session.return_value.prompt.side_effect = [*lines, EOFError]
+        run = mocker.patch("okdata.cli.__main__.run", side_effect=error)
+        cmd.handler()
+        return run
+
+    return start
+
+
+def test_shell_runs_commands(shell):
+    run = shell("datasets ls", "", "okdata status 'my trace'", "help", "exit", "pubs")
+    assert [call.args[0][1:] for call in run.call_args_list] == [
+        ["datasets", "ls"],
+        ["status", "my trace"],
+        ["--help"],
+    ]
+
+
+def test_shell_uses_env(shell):
+    run = shell("datasets ls", "datasets ls --env=prod", env="dev")
+    assert [call.args[0][1:] for call in run.call_args_list] == [
+        ["datasets", "ls", "--env=dev"],
+        ["datasets", "ls", "--env=prod"],
+    ]
+
+
+def test_shell_survives_exit(shell, capsys):
+    run = shell("status", "status", error=SystemExit("Oops"))
+    assert run.call_count == 2
+    assert capsys.readouterr().err == "Oops\nOops\n"
+
+
+def test_shell_restores_stdout(shell, mocker, tmp_path):
+    out = open(tmp_path / "out.txt", "w")
+    mocker.patch.object(sys, "stdout", out)
+
+    def broken_pipe(argv):
+        # Like the handling of `BrokenPipeError` when running a command.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+
+    shell("datasets ls", error=broken_pipe)
+    print("still here", file=out, flush=True)
+    out.close()
+    assert (tmp_path / "out.txt").read_text().endswith("still here\n")
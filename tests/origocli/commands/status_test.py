@@ -1,8 +1,9 @@
 import pytest
+from requests.exceptions import HTTPError
 from unittest.mock import ANY
 from conftest import set_argv
 
-from okdata.cli.commands.status import StatusCommand
+from okdata.cli.commands.status import StatusCommand, poll_delays
 from okdata.cli.output import TableOutput
 
 successful_trace_id = "my-dataset-be0a4c02-9733-4ff8-af1b-cd14985e9e06"
@@ -192,7 +193,9 @@ def test_get_status_failed(mocker, mock_failed_trace):
     mocker.spy(cmd, "latest_event_for_status")
     mocker.spy(StatusCommand, "find_latest_event")
     mocker.spy(TableOutput, "add_row")
-    cmd.handler()
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
     cmd.sdk.get_status.assert_called_once_with(failed_trace_id)
     cmd.latest_event_for_status.assert_called_once_with(failed_trace_id, trace)
     StatusCommand.find_latest_event.assert_called_once_with(trace)
@@ -231,8 +234,218 @@ def test_get_status_failed_with_history(mocker, mock_failed_trace):
     cmd.sdk.get_status.return_value = trace
     mocker.spy(cmd, "full_history_for_status")
     mocker.spy(TableOutput, "add_rows")
-    cmd.handler()
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
     cmd.sdk.get_status.assert_called_once_with(failed_trace_id)
     cmd.full_history_for_status.assert_called_once()
     assert trace[-1]["errors"] == ["Invalid value."]
     TableOutput.add_rows.assert_called_once_with(ANY, trace)
+
+
+def test_poll_delays():
+    delays = poll_delays(initial=1, maximum=4, factor=2)
+    bounds = [(0.5, 1), (1, 2), (2, 4), (2, 4), (2, 4)]
+    for (low, high), delay in zip(bounds, delays):
+        assert low <= delay <= high
+
+
+def test_watch_until_finished(mocker, mock_in_progress_trace, mock_successful_trace):
+    set_argv("status", successful_trace_id, "--watch")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    sleep = mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = [
+        mock_in_progress_trace,
+        mock_in_progress_trace,
+        mock_successful_trace,
+    ]
+    mocker.spy(cmd, "latest_event_for_status")
+    cmd.handler()
+    assert cmd.sdk.get_status.call_count == 3
+    assert sleep.call_count == 2
+    cmd.latest_event_for_status.assert_called_once_with(
+        successful_trace_id, mock_successful_trace
+    )
+
+
+def test_watch_stops_on_failed_event(mocker, mock_in_progress_trace):
+    failed_trace = [
+        *mock_in_progress_trace,
+        {**mock_in_progress_trace[-1], "trace_event_status": "FAILED"},
+    ]
+    set_argv("status", in_progress_trace_id, "--watch")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = [mock_in_progress_trace, failed_trace]
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
+    assert cmd.sdk.get_status.call_count == 2
+
+
+def test_watch_retries_lookup_errors(
+    mocker, mock_in_progress_trace, mock_successful_trace
+):
+    set_argv("status", successful_trace_id, "--watch")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = [
+        mock_in_progress_trace,
+        HTTPError("503 Server Error: Service Unavailable"),
+        mock_successful_trace,
+    ]
+    mocker.spy(cmd, "latest_event_for_status")
+    cmd.handler()
+    assert cmd.sdk.get_status.call_count == 3
+    cmd.latest_event_for_status.assert_called_once_with(
+        successful_trace_id, mock_successful_trace
+    )
+
+
+def test_watch_timeout(mocker, capsys, mock_in_progress_trace):
+    set_argv("status", in_progress_trace_id, "--watch", "--timeout=10")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    clock = iter(range(0, 100, 4))
+    mocker.patch("okdata.cli.commands.status.monotonic", lambda: next(clock))
+    sleep = mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.return_value = mock_in_progress_trace
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
+    assert all(call.args[0] <= 10 for call in sleep.call_args_list)
+    assert cmd.sdk.get_status.call_count == 3
+    assert "hasn't finished after 10 seconds" in capsys.readouterr().err
+
+
+def test_watch_invalid_timeout(mocker):
+    set_argv("status", in_progress_trace_id, "--watch", "--timeout=soon")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    with pytest.raises(SystemExit):
+        cmd.handler()
+    cmd.sdk.get_status.assert_not_called()
+
+
+def test_get_status_multiple(mocker, mock_successful_trace, mock_in_progress_trace):
+    traces = {
+        successful_trace_id: mock_successful_trace,
+        in_progress_trace_id: mock_in_progress_trace,
+    }
+    set_argv("status", successful_trace_id, in_progress_trace_id)
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    cmd.sdk.get_status.side_effect = traces.get
+    add_rows = mocker.spy(TableOutput, "add_rows")
+    cmd.handler()
+    rows = add_rows.call_args.args[1]
+    assert [(r["trace_id"], r["done"]) for r in rows] == [
+        (successful_trace_id, True),
+        (in_progress_trace_id, False),
+    ]
+
+
+def test_get_status_multiple_failed(mocker, mock_successful_trace, mock_failed_trace):
+    traces = {
+        successful_trace_id: mock_successful_trace,
+        failed_trace_id: mock_failed_trace,
+    }
+    set_argv("status", successful_trace_id, failed_trace_id)
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    cmd.sdk.get_status.side_effect = traces.get
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
+
+
+def test_get_status_multiple_lookup_error(mocker, mock_successful_trace):
+    def get_status(trace_id):
+        if trace_id == "missing":
+            raise HTTPError("404 Client Error: Not Found")
+        return mock_successful_trace
+
+    set_argv("status", successful_trace_id, "missing", "--format=json")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    cmd.sdk.get_status.side_effect = get_status
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
+
+
+def test_watch_multiple_from_file(
+    mocker, tmp_path, mock_in_progress_trace, mock_successful_trace
+):
+    trace_file = tmp_path / "trace-ids.txt"
+    trace_file.write_text(f"{successful_trace_id}\n\n{in_progress_trace_id}\n")
+    polls = {
+        successful_trace_id: iter([mock_successful_trace]),
+        in_progress_trace_id: iter([mock_in_progress_trace, mock_successful_trace]),
+    }
+    set_argv("status", f"--file={trace_file}", "--watch")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    sleep = mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = lambda trace_id: next(polls[trace_id])
+    add_rows = mocker.spy(TableOutput, "add_rows")
+    cmd.handler()
+    assert sleep.call_count == 1
+    assert cmd.sdk.get_status.call_count == 3
+    assert all(row["done"] for row in add_rows.call_args.args[1])
+
+
+def test_watch_multiple_retries_lookup_errors(
+    mocker, mock_in_progress_trace, mock_successful_trace
+):
+    polls = {
+        successful_trace_id: iter([mock_successful_trace]),
+        in_progress_trace_id: iter(
+            [
+                mock_in_progress_trace,
+                HTTPError("503 Server Error: Service Unavailable"),
+                mock_successful_trace,
+            ]
+        ),
+    }
+
+    def get_status(trace_id):
+        result = next(polls[trace_id])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    set_argv("status", successful_trace_id, in_progress_trace_id, "--watch")
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = get_status
+    add_rows = mocker.spy(TableOutput, "add_rows")
+    cmd.handler()
+    assert cmd.sdk.get_status.call_count == 4
+    assert all(row["done"] for row in add_rows.call_args.args[1])
+
+
+def test_watch_multiple_timeout(
+    mocker, capsys, mock_in_progress_trace, mock_successful_trace
+):
+    traces = {
+        successful_trace_id: mock_successful_trace,
+        in_progress_trace_id: mock_in_progress_trace,
+    }
+    set_argv(
+        "status", successful_trace_id, in_progress_trace_id, "--watch", "--timeout=10"
+    )
+    cmd = StatusCommand()
+    mocker.patch.object(cmd, "sdk")
+    clock = iter(range(0, 100, 4))
+    mocker.patch("okdata.cli.commands.status.monotonic", lambda: next(clock))
+    mocker.patch("okdata.cli.commands.status.sleep")
+    cmd.sdk.get_status.side_effect = traces.get
+    with pytest.raises(SystemExit) as e:
+        cmd.handler()
+    assert e.value.code == 1
+    assert "for 1 of the traces" in capsys.readouterr().err
@@ -1,9 +1,12 @@
 import io
+import json
 import os
 import pathlib
 import tempfile
 
-from okdata.cli.io import read_json
+import pytest
+
+from okdata.cli.io import _iter_json_stream, iter_json, read_json
 
 
 def test_read_json_from_file():
@@ -28,3 +31,50 @@ def test_read_json_from_stdin(monkeypatch):
     monkeypatch.setattr("sys.stdin", io.StringIO('{"foo": "bar"}'))
 
     assert read_json() == {"foo": "bar"}
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '[{"a": 1}, {"a": 22}, {"a": 333}]',
+        '{"a": 1}\n{"a": 22}\n\n{"a": 333}\n',
+        '[\n  {\n    "a": 1\n  },\n  {"a": 22},\n  {"a": 333}\n]\n',
+    ],
+)
+def test_iter_json(content):
+    # A tiny chunk size makes values span several chunks.
+    stream = _iter_json_stream(io.StringIO(content), chunk_size=3)
+    assert list(stream) == [{"a": 1}, {"a": 22}, {"a": 333}]
+
+
+def test_iter_json_single_document(tmp_path):
+    path = tmp_path / "payload.json"
+    path.write_text('{\n  "foo": "bar"\n}\n')
+    assert list(iter_json(str(path))) == [{"foo": "bar"}]
+
+
+def test_iter_json_from_stdin(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("[]"))
+    assert list(iter_json()) == []
+
+
+@pytest.mark.parametrize(
+    "content", ['[{"a": 1} {"a": 2}]', '[{"a": 1},', "[1] 2", '{"a": 1} {"a"']
+)
+def test_iter_json_invalid(content):
+    with pytest.raises(ValueError):
+        list(_iter_json_stream(io.StringIO(content), chunk_size=3))
+
+
+def test_iter_json_large_document():
+    document = {"rows": [{"id": i, "name": f"row {i}"} for i in range(200_000)]}
+    content = io.StringIO(json.dumps(document))
+    reads = []
+    read = content.read
+    content.read = lambda size: reads.append(size) or read(size)
+
+    assert list(_iter_json_stream(content, chunk_size=64 * 1024)) == [document]
+    # The document is read in growing chunks rather than being parsed over
+    # again for every fixed-size chunk.
+    assert len(content.getvalue()) > 4_000_000
+    assert len(reads) < 15
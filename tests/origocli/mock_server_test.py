@@ -0,0 +1,128 @@
+import io
+import json
+import sys
+
+import pytest
+import requests
+
+from okdata.cli import clients
+from okdata.cli.__main__ import run
+from okdata.cli.clients import api_base_url
+from okdata.cli.commands.pubs.clients import PubsClient
+from okdata.cli.mock_server import SEEDED_EDITION, MockApi, MockServer
+
+
+@pytest.fixture(scope="module")
+def server():
+    api = MockApi(datasets=3, files=2, file_size=1000, clients=2, teams=1)
+    with MockServer(api) as server:
+        yield server
+
+
+@pytest.fixture
+def okdata(server, tmp_path, monkeypatch, capsys):
+    """Return a function running `okdata` against `server`.
+
+    The function returns the JSON output of the command, or None if it
+    printed nothing.
+    """
+    monkeypatch.setenv("OKDATA_API_URL", server.url)
+    monkeypatch.setenv("OKDATA_ENVIRONMENT", "dev")
+    monkeypatch.setenv("OKDATA_CLIENT_ID", "my-client")
+    monkeypatch.setenv("OKDATA_CLIENT_SECRET", "my-secret")
+    monkeypatch.delenv("OKDATA_USERNAME", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+    def okdata(*args):
+        clients.reset()
+        argv = ["okdata", *args, "--format=json"]
+        monkeypatch.setattr(sys, "argv", argv)
+        run(argv)
+        out = capsys.readouterr().out
+        return json.loads(out) if out else None
+
+    yield okdata
+    clients.reset()
+
+
+def test_datasets_ls(okdata):
+    datasets = okdata("datasets", "ls")
+    assert sorted(d["Id"] for d in datasets) == [
+        "dataset-0",
+        "dataset-1",
+        "dataset-2",
+    ]
+
+
+def test_datasets_create(okdata, tmp_path):
+    dataset_file = tmp_path / "dataset.json"
+    dataset_file.write_text(json.dumps({"title": "Mock test", "keywords": []}))
+    dataset = okdata("datasets", "create", f"--file={dataset_file}")
+    assert dataset["Id"] == "mock-test"
+    assert okdata("datasets", "ls", "mock-test")["dataset"]["title"] == "Mock test"
+
+
+def test_upload_download_round_trip(okdata, tmp_path):
+    upload = tmp_path / "data.csv"
+    upload.write_text("a,b\n1,2\n")
+    uploaded = okdata("datasets", "cp", str(upload), "ds:dataset-1/1/latest")
+
+    status = okdata("status", uploaded["trace_id"], "--watch")
+    assert status["done"] is True
+
+    target = tmp_path / "download"
+    okdata("datasets", "cp", "ds:dataset-1/1/latest", str(target))
+    assert (target / "data.csv").read_text() == "a,b\n1,2\n"
+
+
+def test_stream_through_stdin_and_stdout(okdata, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"a,b\n1,2\n")))
+    okdata("datasets", "cp", "-", "ds:dataset-1/1", "--filename=piped.csv")
+
+    argv = ["okdata", "datasets", "cp", "ds:dataset-1/1/latest", "-"]
+    monkeypatch.setattr(sys, "argv", argv)
+    run(argv)
+    assert capsys.readouterr().out == "a,b\n1,2\n"
+
+
+def test_copy_between_datasets(okdata, server, tmp_path):
+    copied = okdata("datasets", "cp", "ds:dataset-0/1/latest", "ds:dataset-2/1")
+    assert [row["status"] for row in copied] == ["copied", "copied"]
+    assert all(row["size"] == 1000 for row in copied)
+
+    target = tmp_path / "download"
+    okdata("datasets", "cp", "ds:dataset-2/1/latest", str(target))
+    for name in ["file-0.csv", "file-1.csv"]:
+        source = requests.get(
+            f"{server.url}/s3-download/dataset-0/1/{SEEDED_EDITION}/{name}"
+        )
+        assert (target / name).read_bytes() == source.content
+
+
+def test_permissions(okdata):
+    okdata("permissions", "add", "okdata:dataset:dataset-2", "bob")
+    permissions = okdata("permissions", "ls", "okdata:dataset:dataset-2")
+    assert "bob" in {p["user_name"] for p in permissions}
+
+
+def test_teams_ls(okdata):
+    assert len(okdata("teams", "ls")) == 1
+
+
+def test_client_credentials_login(okdata, server):
+    okdata("datasets", "ls")
+    sdk = clients.get_client(PubsClient, "dev")
+    sdk.login()
+    assert sdk.auth._access_token.startswith("mock.client.my-client")
+
+
+def test_api_base_url(okdata, server):
+    sdk = clients.get_client(PubsClient, "dev")
+    assert api_base_url(sdk.config) == server.url
+    assert sdk.api_url == f"{server.url}/maskinporten"
+
+
+def test_unknown_route(server):
+    response = requests.get(f"{server.url}/nonexistent")
+    assert response.status_code == 404
+    assert "message" in response.json()
@@ -0,0 +1,103 @@
+import builtins
+import json
+
+from datetime import datetime, timezone
+
+from okdata.cli.output import NdjsonOutput, TableOutput, create_output, load_config
+
+rows = [
+    {"Id": "foo", "publisher": "Origo", "parent_id": None, "accessRights": "public"},
+    {"Id": "bar", "publisher": "Origo", "parent_id": "foo", "accessRights": "public"},
+]
+
+
+def test_create_output_ndjson():
+    out = create_output("ndjson", "datasets_config.json")
+    assert isinstance(out, NdjsonOutput)
+
+
+def test_ndjson_output_prints_rows_when_added(capsys):
+    out = create_output("ndjson", "datasets_config.json")
+
+    out.add_row(rows[0])
+    assert json.loads(capsys.readouterr().out) == rows[0]
+
+    out.add_rows(rows)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == rows
+
+
+def test_ndjson_output_does_not_retain_rows(capsys):
+    out = create_output("ndjson", "datasets_config.json")
+    out.add_rows({"Id": str(i)} for i in range(100))
+
+    assert len(capsys.readouterr().out.splitlines()) == 100
+    assert out.out == []
+    assert str(out) == ""
+
+
+def test_ndjson_output_matches_json_output(capsys):
+    json_out = create_output("json", "datasets_config.json")
+    json_out.add_rows(rows)
+
+    create_output("ndjson", "datasets_config.json").add_rows(rows)
+    lines = capsys.readouterr().out.splitlines()
+
+    assert [json.loads(line) for line in lines] == json.loads(str(json_out))
+
+
+def test_table_output_formats_datetime_columns_only():
+    config = {
+        "created": {"name": "Created", "key": "created", "type": "datetime"},
+        "note": {"name": "Note", "key": "note"},
+    }
+    out = TableOutput(config)
+    out.add_row(
+        {"created": "2020-01-01T12:00:00+00:00", "note": "2020-01-01T12:00:00+00:00"}
+    )
+
+    local = datetime(2020, 1, 1, 12, tzinfo=timezone.utc).astimezone()
+    assert out.rows == [
+        [local.isoformat(timespec="seconds"), "2020-01-01T12:00:00+00:00"]
+    ]
+
+
+def test_table_output_formats_cell_values():
+    config = {
+        "missing": {"name": "Missing", "key": "missing"},
+        "flag": {"name": "Flag", "key": "flag"},
+        "items": {"name": "Items", "key": "items"},
+        "contact": {"name": "Contact", "key": "contact", "fields": ["name", "email"]},
+        "text": {"name": "Text", "key": "text", "wrap": 10},
+    }
+    out = TableOutput(config)
+    out.add_rows(
+        [
+            {
+                "flag": True,
+                "items": ["a", "b"],
+                "contact": {"name": "Origo"},
+                "text": "a rather long text",
+            }
+        ]
+    )
+
+    assert out.rows == [["N/A", "Yes", "- a  \n- b", "Origo", "a rather\nlong text"]]
+    assert all(out.align[name] == "l" for name in out.field_names)
+
+
+def test_output_configs_are_loaded_once(mocker):
+    load_config.cache_clear()
+    open_ = mocker.spy(builtins, "open")
+
+    first = create_output("table", "datasets_config.json")
+    second = create_output("json", "datasets_config.json")
+
+    assert first.config is second.config
+    assert open_.call_count == 1
+
+
+def test_create_output_only_builds_requested_output(mocker):
+    table_init = mocker.spy(TableOutput, "__init__")
+    create_output("json", "datasets_config.json")
+    table_init.assert_not_called()
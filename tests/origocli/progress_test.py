@@ -0,0 +1,113 @@
+import json
+
+from okdata.cli.progress import (
+    EventProgress,
+    FileProgress,
+    LiveProgress,
+    TransferProgress,
+    create_progress,
+)
+
+
+def test_create_progress(mocker):
+    mocker.patch("sys.stderr.isatty", return_value=False)
+    assert isinstance(create_progress("json"), EventProgress)
+    assert isinstance(create_progress("ndjson"), EventProgress)
+    assert type(create_progress(None)) is TransferProgress
+    assert type(create_progress("csv")) is TransferProgress
+
+    mocker.patch("sys.stderr.isatty", return_value=True)
+    assert isinstance(create_progress(None), LiveProgress)
+    assert type(create_progress("csv")) is TransferProgress
+
+
+def test_file_progress(mocker):
+    monotonic = mocker.patch("okdata.cli.progress.time.monotonic", return_value=10)
+    file = FileProgress("a.csv")
+    assert file.throughput() is None
+    assert file.eta() is None
+
+    file.start(4_000_000, 1_000_000)
+    monotonic.return_value = 12
+    file.update(1_000_000)
+    assert file.as_dict() == {
+        "file": "a.csv",
+        "status": "active",
+        "bytes": 2_000_000,
+        "size": 4_000_000,
+        # The first megabyte was there already when the transfer resumed.
+        "throughput": 0.5,
+        "eta": 4,
+    }
+
+    file.finish("uploaded")
+    assert file.status == "uploaded"
+
+
+def test_totals(mocker):
+    mocker.patch("okdata.cli.progress.time.monotonic", return_value=0)
+    progress = TransferProgress()
+    a = progress.file("a.csv", 3_000_000)
+    b = progress.file("b.csv", 1_000_000)
+    a.start()
+    a.update(1_000_000)
+    b.start()
+    b.update(1_000_000)
+    b.finish("uploaded")
+
+    mocker.patch("okdata.cli.progress.time.monotonic", return_value=1)
+    assert progress.totals() == {
+        "files": 2,
+        "finished": 1,
+        "bytes": 2_000_000,
+        "size": 4_000_000,
+        "throughput": 2.0,
+        "eta": 1,
+    }
+
+    c = progress.file("c.csv", 2_000_000)
+    c.start(done=1_000_000)
+    assert progress.totals()["throughput"] == 2.0
+    assert progress.totals()["bytes"] == 3_000_000
+
+    progress.file("d.csv")
+    assert progress.totals()["size"] is None
+    assert progress.totals()["eta"] is None
+
+
+def test_event_progress(capsys):
+    with EventProgress() as progress:
+        file = progress.file("a.csv", 3)
+        file.start()
+        file.update(2)
+        progress.report()
+        file.update(1)
+        file.finish("uploaded")
+
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    events = [json.loads(line) for line in captured.err.splitlines()]
+    assert [(e["event"], e.get("status"), e["bytes"]) for e in events] == [
+        ("file", "active", 0),
+        ("progress", "active", 2),
+        ("total", None, 2),
+        ("file", "uploaded", 3),
+        ("total", None, 3),
+    ]
+    assert all("time" in event for event in events)
+
+
+def test_live_progress(capsys):
+    progress = LiveProgress()
+    file = progress.file("a.csv", 2_000_000)
+    file.start()
+    file.update(1_000_000)
+    progress.report()
+
+    lines = capsys.readouterr().err.splitlines()
+    assert lines[0].split()[:3] == ["a.csv", "1.0/2.0", "MB"]
+    assert "50%" in lines[0]
+    assert lines[1].startswith("0/1 files, 1.0/2.0 MB")
+
+    progress.close()
+    assert capsys.readouterr().err == "\x1b[2F\x1b[J"
@@ -0,0 +1,87 @@
+import io
+from datetime import timedelta
+
+import pytest
+from requests import PreparedRequest, Response
+
+from okdata.cli import timings
+
+
+@pytest.fixture(autouse=True)
+def stop_timings():
+    yield
+    timings.stop()
+
+
+def make_response(url, status=200, content_length=None, seconds=0.25):
+    request = PreparedRequest()
+    request.prepare(method="GET", url=url)
+    response = Response()
+    response.request = request
+    response.status_code = status
+    response.elapsed = timedelta(seconds=seconds)
+    if content_length is not None:
+        response.headers["Content-Length"] = str(content_length)
+    return response
+
+
+def test_disabled():
+    with timings.phase("command"):
+        pass
+    timings.record_response(make_response("https://example.org/"))
+    assert timings.stop() is None
+
+
+def test_phases_accumulate():
+    timings.start()
+    timings.record("render", 0.5)
+    timings.record("render", 0.25)
+    with timings.phase("command"):
+        pass
+    collected = timings.stop()
+    assert list(collected.phases) == ["render", "command"]
+    assert collected.phases["render"] == 0.75
+
+
+def test_nested_phases_counted_once(mocker):
+    clock = iter([0, 1, 3, 6])
+    mocker.patch("okdata.cli.timings.time.perf_counter", lambda: next(clock))
+    timings.start(started=0)
+    with timings.phase("command"):
+        with timings.phase("render"):
+            pass
+    collected = timings.stop()
+    assert collected.phases == {"render": 2, "command": 4}
+
+
+def test_record_response_strips_query():
+    timings.start()
+    timings.record_response(
+        make_response(
+            "https://bucket.example.org/file.csv?X-Amz-Signature=secret",
+            content_length=1234,
+        )
+    )
+    assert timings.stop().requests == [
+        {
+            "method": "GET",
+            "url": "https://bucket.example.org/file.csv",
+            "status": 200,
+            "seconds": 0.25,
+            "size": 1234,
+        }
+    ]
+
+
+def test_report():
+    timings.start()
+    timings.record("startup", 0.1)
+    timings.record_response(
+        make_response("https://example.org/datasets", content_length=2_500_000)
+    )
+    out = io.StringIO()
+    timings.report(timings.stop(), out)
+    report = out.getvalue()
+    assert "  startup      100 ms\n" in report
+    assert "HTTP requests (1, 250 ms in total):" in report
+    assert "GET    200     250 ms     2.5 MB  https://example.org/datasets" in report
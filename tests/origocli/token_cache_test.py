@@ -0,0 +1,160 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from okdata.sdk.auth.auth import Authenticate
+from okdata.sdk.auth.credentials.common import TokenProvider
+from okdata.sdk.config import Config
+
+from conftest import set_argv
+from okdata.cli import token_cache
+from okdata.cli.command import BaseCommand
+
+
+class FakeTokenProvider(TokenProvider):
+    def __init__(self, config, client_id="my-client"):
+        super().__init__(config)
+        self.client_id = client_id
+        self.new_token_calls = 0
+        self.refresh_token_calls = 0
+
+    def new_token(self):
+        self.new_token_calls += 1
+        return {
+            "access_token": f"access-{self.new_token_calls}",
+            "refresh_token": "refresh",
+            "expires_in": 300,
+            "refresh_expires_in": 1800,
+        }
+
+    def refresh_token(self, refresh_token):
+        self.refresh_token_calls += 1
+        return {
+            "access_token": "refreshed-access",
+            "refresh_token": "refresh",
+            "expires_in": 300,
+            "refresh_expires_in": 1800,
+        }
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.delenv("OKDATA_TOKEN_CACHE", raising=False)
+    return tmp_path / "okdata" / "tokens"
+
+
+def make_auth(env="dev", client_id="my-client"):
+    config = Config(env=env)
+    return Authenticate(config, FakeTokenProvider(config, client_id))
+
+
+def logged_in_auth(**kwargs):
+    auth = make_auth(**kwargs)
+    auth.login()
+    token_cache.store_tokens(auth)
+    return auth
+
+
+def test_store_and_restore_tokens(cache_dir):
+    logged_in_auth()
+    [cache_file] = os.listdir(cache_dir)
+    assert os.stat(cache_dir / cache_file).st_mode & 0o777 == 0o600
+
+    auth = make_auth()
+    assert token_cache.restore_tokens(auth)
+    auth.login()
+    assert auth.access_token == "access-1"
+    assert auth.token_provider.new_token_calls == 0
+
+
+def test_tokens_are_keyed_by_env_and_identity():
+    logged_in_auth()
+    assert not token_cache.restore_tokens(make_auth(env="prod"))
+    assert not token_cache.restore_tokens(make_auth(client_id="other-client"))
+
+
+def test_refresh_token_used_when_access_token_is_about_to_expire():
+    auth = make_auth()
+    auth.login()
+    auth._expires_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    token_cache.store_tokens(auth)
+
+    auth = make_auth()
+    token_cache.restore_tokens(auth)
+    auth.login()
+    assert auth.access_token == "refreshed-access"
+    assert auth.token_provider.refresh_token_calls == 1
+    assert auth.token_provider.new_token_calls == 0
+
+
+def test_refreshed_token_is_reused():
+    auth = make_auth()
+    auth.login()
+    auth._expires_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+    token_cache.store_tokens(auth)
+
+    for run in range(3):
+        auth = make_auth()
+        token_cache.restore_tokens(auth)
+        auth.login()
+        for _ in range(5):
+            assert auth.access_token == "refreshed-access"
+        token_cache.store_tokens(auth)
+
+        # Only the first run needs to refresh the near-expiry token; later
+        # runs get the refreshed token with its new expiry from the cache.
+        assert auth.token_provider.refresh_token_calls == (1 if run == 0 else 0)
+    assert auth.token_provider.new_token_calls == 0
+
+
+def test_ignore_cache_readable_by_others(cache_dir):
+    logged_in_auth()
+    [cache_file] = os.listdir(cache_dir)
+    os.chmod(cache_dir / cache_file, 0o644)
+    assert not token_cache.restore_tokens(make_auth())
+
+
+def test_cache_disabled(monkeypatch, cache_dir):
+    monkeypatch.setenv("OKDATA_TOKEN_CACHE", "off")
+    logged_in_auth()
+    assert not cache_dir.exists() or not os.listdir(cache_dir)
+
+
+def test_ignore_corrupt_cache(cache_dir):
+    logged_in_auth()
+    [cache_file] = os.listdir(cache_dir)
+    (cache_dir / cache_file).write_text('["not", "tokens"]')
+    assert not token_cache.restore_tokens(make_auth())
+
+
+def test_clear_tokens():
+    auth = logged_in_auth()
+    token_cache.clear_tokens(auth)
+    assert not token_cache.restore_tokens(make_auth())
+
+
+def test_login_uses_token_cache(mocker):
+    logged_in_auth()
+    set_argv("datasets", "--env=dev")
+    cmd = BaseCommand()
+    auth = make_auth()
+    mocker.patch.object(cmd.sdk, "auth", auth)
+    cmd.login()
+    assert auth.access_token == "access-1"
+    assert auth.token_provider.new_token_calls == 0
+
+
+@pytest.mark.parametrize("cache_home", ["not-a-directory", "/proc/nonexistent"])
+def test_login_without_writable_cache(mocker, monkeypatch, tmp_path, cache_home):
+    # A regular file in the way of the cache directory makes creating it fail
+    # even for users that can write anywhere.
+    (tmp_path / "not-a-directory").write_text("")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / cache_home))
+    set_argv("datasets", "--env=dev")
+    cmd = BaseCommand()
+    auth = make_auth()
+    mocker.patch.object(cmd.sdk, "auth", auth)
+    cmd.login()
+    assert auth.access_token == "access-1"
+    assert auth.token_provider.new_token_calls == 1